@@ -3,27 +3,46 @@ import subprocess
 import json
 import requests
 import re
-from flask import Flask, jsonify, request, abort, send_from_directory, session
+from flask import Flask, jsonify, request, abort, send_from_directory, session, Response
 from flask_cors import CORS
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from flasgger import Swagger
 from werkzeug.security import generate_password_hash, check_password_hash
-from threading import Thread, Lock
+from threading import Thread, Lock, Event, Condition
 import time
 import shutil
 import zipfile
 import collections
 import sys
+import signal
+import socket
+import codecs
+import select
+import asyncio
+import struct
+import array
+import math
+import fnmatch
+import queue
+import atexit
+import gzip
 import uuid
+import multiprocessing
 import sqlite3
 import secrets
 from functools import wraps
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
 from werkzeug.utils import secure_filename
 from datetime import datetime, timedelta
 try:
     import psutil
 except ImportError:
     psutil = None
+try:
+    import pty
+except ImportError:
+    pty = None  # Not available on Windows, where servers always run under screen in WSL
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 try:
@@ -31,6 +50,8 @@ try:
 except ImportError:
     jwt = None
     JWTError = None
+from log_workers import (LOG_SEARCH_CHUNK_SIZE, LOG_LEVELS, LOG_LEVEL_CODES, search_log_file, load_event_index,
+                         update_event_index, read_events, classify_session_message, extract_session_events)
 
 # --- Configuration ---
 app = Flask(__name__, static_folder='..', static_url_path='')
@@ -201,10 +222,14 @@ def load_config():
         save_config(default_config)
         return default_config
 
+config_revision = 0  # Bumped on every save, so caches derived from the config can tell it changed
+
 def save_config(config_data):
     """Saves the configuration to config.json."""
+    global config_revision
     with open(CONFIG_FILE, 'w') as f:
         json.dump(config_data, f, indent=4)
+    config_revision += 1
 
 # Load config on startup
 config = load_config()
@@ -236,11 +261,61 @@ class User(UserMixin):
     def is_active(self):
         return self._is_active
 
-def init_db():
-    """Initialize the user database with multi-user support."""
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-    
+class PooledConnection(sqlite3.Connection):
+    """
+    SQLite connection that goes back to the pool when closed, so helpers keep
+    the usual connect/close pattern without reconnecting (and re-preparing their
+    statements) on every call.
+    """
+    def close(self):
+        if self.pooled:
+            return  # Closed twice, it's already back in the pool
+        try:
+            if self.in_transaction:
+                self.rollback()  # Don't hand uncommitted work to the next user
+        except sqlite3.ProgrammingError:
+            return  # Already closed for real
+        self.row_factory = None
+        db_pool.release(self)
+
+class DatabasePool:
+    """
+    Process-wide pool of SQLite connections. Requests are served on a new
+    thread each, so connections aren't tied to a thread (check_same_thread=False)
+    but are only ever used by one at a time: get() takes a connection out of the
+    pool and closing it puts it back. Connections beyond `size` idle ones are
+    really closed.
+    """
+
+    def __init__(self, size=8):
+        self.size = size
+        self._idle = queue.LifoQueue()  # The most recently used connection has the warmest caches
+
+    def get(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = sqlite3.connect(DB_FILE, factory=PooledConnection, cached_statements=256, check_same_thread=False)
+            # Safe with WAL: a power loss can only drop the latest commits, never corrupt the database
+            conn.execute('PRAGMA synchronous=NORMAL')
+        conn.pooled = False
+        return conn
+
+    def release(self, conn):
+        if self._idle.qsize() < self.size:
+            conn.pooled = True
+            self._idle.put(conn)
+        else:
+            sqlite3.Connection.close(conn)
+
+db_pool = DatabasePool(size=int(config.get('db_pool_size', 8)))
+
+def get_db_connection():
+    """Returns a connection from the pool. Closing it returns it to the pool."""
+    return db_pool.get()
+
+def migrate_baseline_schema(c):
+    """Schema 1: tables and column upgrades from before migrations were versioned."""
     # Create users table with role and active status
     c.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -420,6 +495,14 @@ def init_db():
             WHERE can_delete = 1 AND can_delete_server = 0
         ''')
     
+    # Single-integer copy of each row's permissions, read by the permission resolver.
+    # Recomputed on startup so it also covers the legacy migrations above.
+    for table in ('user_server_permissions', 'group_server_permissions'):
+        c.execute(f"PRAGMA table_info({table})")
+        if 'permission_mask' not in {row[1] for row in c.fetchall()}:
+            c.execute(f"ALTER TABLE {table} ADD COLUMN permission_mask INTEGER NOT NULL DEFAULT 0")
+        c.execute(f"UPDATE {table} SET permission_mask = {permission_mask_sql()}")
+    
     # ===== OAUTH2 TABLES =====
     # Create OAuth2 clients table
     c.execute('''
@@ -460,12 +543,148 @@ def init_db():
         ON oauth2_tokens(expires_at)
     ''')
     
-    conn.commit()
+    # ===== PLAYER ANALYTICS TABLES =====
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS analytics_players (
+            server_name TEXT NOT NULL,
+            player TEXT NOT NULL,
+            first_join INTEGER NOT NULL,
+            last_join INTEGER NOT NULL,
+            total_playtime INTEGER NOT NULL DEFAULT 0,
+            join_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY(server_name, player)
+        )
+    ''')
+    
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS analytics_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            server_name TEXT NOT NULL,
+            player TEXT NOT NULL,
+            join_time INTEGER NOT NULL,
+            leave_time INTEGER NOT NULL,
+            duration INTEGER NOT NULL
+        )
+    ''')
+    
+    # Ingest checkpoint and players still online when the log was last read
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS analytics_state (
+            server_name TEXT PRIMARY KEY,
+            checkpoint_inode INTEGER,
+            checkpoint_offset INTEGER NOT NULL DEFAULT 0,
+            last_event_time INTEGER,
+            open_sessions TEXT NOT NULL DEFAULT '{}',
+            first_event_time INTEGER
+        )
+    ''')
+    
+    c.execute("PRAGMA table_info(analytics_state)")
+    if 'first_event_time' not in {row[1] for row in c.fetchall()}:
+        c.execute("ALTER TABLE analytics_state ADD COLUMN first_event_time INTEGER")
+    
+    # Occupancy of every calendar hour with players online: per-minute player
+    # counts (60 x uint16) plus exact player-seconds, keyed by local hour of the week
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS analytics_occupancy (
+            server_name TEXT NOT NULL,
+            hour_start INTEGER NOT NULL,
+            week_hour INTEGER NOT NULL,
+            player_seconds INTEGER NOT NULL DEFAULT 0,
+            peak INTEGER NOT NULL DEFAULT 0,
+            minutes BLOB NOT NULL,
+            PRIMARY KEY(server_name, hour_start)
+        )
+    ''')
+    
+    # Rotated logs whose sessions were loaded by a backfill
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS analytics_imported_logs (
+            server_name TEXT NOT NULL,
+            log_name TEXT NOT NULL,
+            imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY(server_name, log_name)
+        )
+    ''')
+    
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_analytics_sessions_server_time
+        ON analytics_sessions(server_name, join_time)
+    ''')
+    
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_analytics_sessions_player_time
+        ON analytics_sessions(server_name, player, join_time)
+    ''')
+    
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_analytics_players_playtime
+        ON analytics_players(server_name, total_playtime)
+    ''')
+
+def migrate_permission_lookup_indexes(c):
+    """Schema 2: indexes for looking up permissions and memberships by server and group."""
+    # (user_id, ...) lookups are already covered by the tables' UNIQUE constraints
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_user_server_permissions_server
+        ON user_server_permissions(server_name)
+    ''')
+    
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_group_server_permissions_server
+        ON group_server_permissions(server_name)
+    ''')
+    
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_user_group_memberships_group
+        ON user_group_memberships(group_id)
+    ''')
+
+def migrate_occupancy_rebuild_queue(c):
+    """Schema 3: queues the servers whose sessions predate the occupancy rollup for a rebuild."""
+    # query_occupancy bins their stored sessions once and removes them from the queue.
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS analytics_occupancy_pending (
+            server_name TEXT PRIMARY KEY
+        )
+    ''')
+    
+    c.execute('''
+        INSERT OR IGNORE INTO analytics_occupancy_pending (server_name)
+        SELECT DISTINCT server_name FROM analytics_sessions
+    ''')
+
+# Schema migrations in order. The last applied version is kept in PRAGMA user_version;
+# schema changes go into a new migration appended here, never into an existing one.
+SCHEMA_MIGRATIONS = [
+    (1, migrate_baseline_schema),
+    (2, migrate_permission_lookup_indexes),
+    (3, migrate_occupancy_rebuild_queue),
+]
+
+def init_db():
+    """Initialize the user database, applying the schema migrations it hasn't seen yet."""
+    conn = get_db_connection()
+    conn.execute('PRAGMA journal_mode=WAL')  # Persistent: stored in the database file
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for target, migration in SCHEMA_MIGRATIONS:
+        if target <= version:
+            continue
+        c = conn.cursor()
+        c.execute('BEGIN')
+        try:
+            migration(c)
+            c.execute(f'PRAGMA user_version = {target}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"Applied database migration {target} ({migration.__name__})")
     conn.close()
 
 def get_user_by_id(user_id):
     """Fetch user by ID."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     c.execute('SELECT id, username, role, is_active FROM users WHERE id = ?', (user_id,))
     row = c.fetchone()
@@ -476,7 +695,7 @@ def get_user_by_id(user_id):
 
 def get_user_by_username(username):
     """Fetch user by username."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     c.execute('SELECT id, username, password_hash, role, is_active FROM users WHERE username = ?', (username,))
     row = c.fetchone()
@@ -486,7 +705,7 @@ def get_user_by_username(username):
 def create_user(username, password, role='user', is_active=True):
     """Create a new user with role and active status."""
     password_hash = generate_password_hash(password)
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     try:
         c.execute(
@@ -503,7 +722,7 @@ def create_user(username, password, role='user', is_active=True):
 
 def has_users():
     """Check if any users exist in the database."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     c.execute('SELECT COUNT(*) FROM users')
     count = c.fetchone()[0]
@@ -546,99 +765,155 @@ def get_default_permissions():
         'can_delete': bool(defaults.get('can_delete', False))
     }
 
-def merge_permissions(base, override):
-    """Merge permissions using OR logic (any true = true)."""
-    for key in base.keys():
-        base[key] = bool(base[key]) or bool(override.get(key, False))
-    return base
+PERMISSION_COLUMNS = [
+    'can_view_logs', 'can_view_analytics',
+    'can_start_server', 'can_stop_server', 'can_restart_server',
+    'can_edit_properties', 'can_edit_files',
+    'can_manage_backups', 'can_manage_worlds', 'can_manage_scheduler',
+    'can_manage_plugins', 'can_change_settings',
+    'can_access_console', 'can_delete_server',
+    'can_view', 'can_start_stop', 'can_edit_config', 'can_delete'
+]
+# Every permission, legacy ones included, owns one bit of a permission mask. Bits
+# are stored in the permission_mask columns, so new permissions must be appended.
+PERMISSION_FLAGS = {name: 1 << bit for bit, name in enumerate(PERMISSION_COLUMNS)}
+# Any of these lets a user see a server.
+VIEW_PERMISSION_MASK = PERMISSION_FLAGS['can_view_logs'] | PERMISSION_FLAGS['can_view_analytics'] | PERMISSION_FLAGS['can_view']
+
+def permissions_to_mask(permissions):
+    """Packs a {permission: bool} dict into a permission mask."""
+    mask = 0
+    for name, flag in PERMISSION_FLAGS.items():
+        if permissions.get(name):
+            mask |= flag
+    return mask
+
+def permissions_to_dict(mask):
+    """Unpacks a permission mask into the {permission: bool} dict the API returns."""
+    return {name: bool(mask & flag) for name, flag in PERMISSION_FLAGS.items()}
+
+def has_permission(mask, permission_key):
+    """
+    Checks a single permission in a permission mask. Legacy permissions don't
+    imply the granular ones: the baseline migration copied them over once, so an
+    admin can still revoke a granular permission while the legacy one is set.
+    """
+    return bool(mask & PERMISSION_FLAGS.get(permission_key, 0))
+
+def permission_mask_sql():
+    """SQL expression computing a permission table row's mask from its columns."""
+    return ' | '.join(f'(CASE WHEN {name} THEN {flag} ELSE 0 END)' for name, flag in PERMISSION_FLAGS.items())
 
-def get_user_permissions(user_id, server_name):
-    """Resolve permissions for a user and server, including group permissions."""
-    default_permissions = get_default_permissions()
-    permissions = dict(default_permissions)
-    
-    conn = sqlite3.connect(DB_FILE)
+class PermissionCache:
+    """
+    Process-wide cache of resolved permission masks keyed by (user_id, server_name).
+    Entries carry the permission version they were resolved under; every admin
+    write to permissions, groups or memberships bumps it, and so does saving the
+    config (which holds the default permissions), so an entry from before a
+    change is never served. Callers take the version before reading the database,
+    which keeps a read that raced with a write from being cached as current.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._lock = Lock()
+        self._version = 0
+        self._entries = {}  # { (user_id, server_name): (version, mask) }
+
+    def _current_version(self):
+        return (self._version, config_revision)
+
+    def lookup(self, user_id, server_names):
+        """Returns (version, {server_name: mask} found, [server_name, ...] missing)."""
+        with self._lock:
+            version = self._current_version()
+            found, missing = {}, []
+            for server_name in server_names:
+                entry = self._entries.get((user_id, server_name))
+                if entry is not None and entry[0] == version:
+                    found[server_name] = entry[1]
+                else:
+                    missing.append(server_name)
+            return version, found, missing
+
+    def store(self, user_id, resolved, version):
+        with self._lock:
+            if version != self._current_version():
+                return  # Resolved from data that has changed since
+            if len(self._entries) + len(resolved) > self.max_entries:
+                self._entries.clear()
+            for server_name, mask in resolved.items():
+                self._entries[(user_id, server_name)] = (version, mask)
+
+    def bump(self):
+        """Invalidates every cached entry. Call after committing a permission change."""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+permission_cache = PermissionCache(max_entries=int(config.get('permission_cache_size', 10000)))
+
+def resolve_user_permissions(user_id, server_names):
+    """
+    Resolves a user's permissions for many servers at once, from the permission
+    cache where possible. Returns { server_name: permission mask } for every requested server.
+    """
+    version, resolved, missing = permission_cache.lookup(user_id, server_names)
+    if missing:
+        loaded = load_user_permissions(user_id, missing)
+        permission_cache.store(user_id, loaded, version)
+        resolved.update(loaded)
+    return resolved
+
+def load_user_permissions(user_id, server_names):
+    """
+    Reads a user's permissions for many servers from the database. Direct, group
+    and wildcard ('*') rows are loaded in a single query and OR-ed together, so
+    the cost doesn't grow with the number of servers. Returns
+    { server_name: permission mask } for every requested server.
+    """
+    server_names = list(server_names)
+    # Few servers: only fetch their rows. Many: a user's rows are cheaper to take whole
+    # than to spell out (SQLite caps the number of parameters).
+    server_filter = ''
+    server_params = ()
+    if len(server_names) <= 100:
+        placeholders = ','.join('?' for _ in server_names)
+        server_filter = f"AND {{alias}}.server_name IN ({placeholders + ',' if placeholders else ''}'*')"
+        server_params = tuple(server_names)
+
+    conn = get_db_connection()
     c = conn.cursor()
-    
-    # Get direct user permissions for this server (including wildcard '*')
-    c.execute('''
-        SELECT can_view_logs, can_view_analytics,
-               can_start_server, can_stop_server, can_restart_server,
-               can_edit_properties, can_edit_files,
-               can_manage_backups, can_manage_worlds, can_manage_scheduler,
-               can_manage_plugins, can_change_settings,
-               can_access_console, can_delete_server,
-               can_view, can_start_stop, can_edit_config, can_delete
-        FROM user_server_permissions
-        WHERE user_id = ? AND server_name IN (?, '*')
-    ''', (user_id, server_name))
-    
-    for row in c.fetchall():
-        permissions = merge_permissions(permissions, {
-            'can_view_logs': row[0],
-            'can_view_analytics': row[1],
-            'can_start_server': row[2],
-            'can_stop_server': row[3],
-            'can_restart_server': row[4],
-            'can_edit_properties': row[5],
-            'can_edit_files': row[6],
-            'can_manage_backups': row[7],
-            'can_manage_worlds': row[8],
-            'can_manage_scheduler': row[9],
-            'can_manage_plugins': row[10],
-            'can_change_settings': row[11],
-            'can_access_console': row[12],
-            'can_delete_server': row[13],
-            'can_view': row[14],
-            'can_start_stop': row[15],
-            'can_edit_config': row[16],
-            'can_delete': row[17]
-        })
-    
-    # Get user's group memberships
-    c.execute('SELECT group_id FROM user_group_memberships WHERE user_id = ?', (user_id,))
-    group_ids = [row[0] for row in c.fetchall()]
-    
-    # Get group permissions
-    if group_ids:
-        placeholders = ','.join('?' for _ in group_ids)
-        query = f'''
-            SELECT can_view_logs, can_view_analytics,
-                   can_start_server, can_stop_server, can_restart_server,
-                   can_edit_properties, can_edit_files,
-                   can_manage_backups, can_manage_worlds, can_manage_scheduler,
-                   can_manage_plugins, can_change_settings,
-                   can_access_console, can_delete_server,
-                   can_view, can_start_stop, can_edit_config, can_delete
-            FROM group_server_permissions
-            WHERE group_id IN ({placeholders}) AND server_name IN (?, '*')
-        '''
-        c.execute(query, (*group_ids, server_name))
-        
-        for row in c.fetchall():
-            permissions = merge_permissions(permissions, {
-                'can_view_logs': row[0],
-                'can_view_analytics': row[1],
-                'can_start_server': row[2],
-                'can_stop_server': row[3],
-                'can_restart_server': row[4],
-                'can_edit_properties': row[5],
-                'can_edit_files': row[6],
-                'can_manage_backups': row[7],
-                'can_manage_worlds': row[8],
-                'can_manage_scheduler': row[9],
-                'can_manage_plugins': row[10],
-                'can_change_settings': row[11],
-                'can_access_console': row[12],
-                'can_delete_server': row[13],
-                'can_view': row[14],
-                'can_start_stop': row[15],
-                'can_edit_config': row[16],
-                'can_delete': row[17]
-            })
-    
+    c.execute(f'''
+        SELECT usp.server_name, usp.permission_mask
+        FROM user_server_permissions usp
+        WHERE usp.user_id = ? {server_filter.format(alias='usp')}
+        UNION ALL
+        SELECT gsp.server_name, gsp.permission_mask
+        FROM group_server_permissions gsp
+        JOIN user_group_memberships ugm ON ugm.group_id = gsp.group_id
+        WHERE ugm.user_id = ? {server_filter.format(alias='gsp')}
+    ''', (user_id, *server_params, user_id, *server_params))
+    rows = c.fetchall()
     conn.close()
-    return permissions
+
+    # Wildcard rows apply to every server, on top of the configured defaults.
+    wildcard_mask = permissions_to_mask(get_default_permissions())
+    server_masks = collections.defaultdict(int)
+    for server_name, mask in rows:
+        if server_name == '*':
+            wildcard_mask |= mask
+        else:
+            server_masks[server_name] |= mask
+    return {server_name: wildcard_mask | server_masks.get(server_name, 0) for server_name in server_names}
+
+def get_user_permission_mask(user_id, server_name):
+    """Resolve the permission mask of a user for a server, including group permissions."""
+    return resolve_user_permissions(user_id, [server_name])[server_name]
+
+def get_user_permissions(user_id, server_name):
+    """Resolve permissions for a user and server, including group permissions."""
+    return permissions_to_dict(get_user_permission_mask(user_id, server_name))
 
 def require_admin(func):
     """Decorator to require admin role."""
@@ -669,8 +944,7 @@ def require_permission(permission_key, server_name_arg='server_name'):
                 return jsonify({'error': 'Server name required'}), 400
             
             # Check permissions
-            permissions = get_user_permissions(current_user.id, server_name)
-            if not permissions.get(permission_key, False):
+            if not has_permission(get_user_permission_mask(current_user.id, server_name), permission_key):
                 return jsonify({'error': 'Insufficient permissions'}), 403
             
             return func(*args, **kwargs)
@@ -749,8 +1023,7 @@ def api_require_permission(permission_key, server_name_arg='server_name'):
                 }), 400
             
             # Check permissions
-            permissions = get_user_permissions(api_user.id, server_name)
-            if not permissions.get(permission_key, False):
+            if not has_permission(get_user_permission_mask(api_user.id, server_name), permission_key):
                 return jsonify({
                     'msg': f'Insufficient permissions - {permission_key} required',
                     'code': 'ErrInsufficientPermissions',
@@ -787,7 +1060,7 @@ def create_oauth2_client(user_id, client_name):
     client_secret = secrets.token_urlsafe(32)
     client_secret_hash = generate_password_hash(client_secret)
     
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     try:
         c.execute('''
@@ -803,7 +1076,7 @@ def create_oauth2_client(user_id, client_name):
 
 def validate_client_credentials(client_id, client_secret):
     """Validate OAuth2 client credentials and return user_id if valid."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     c.execute('''
         SELECT client_secret_hash, user_id, client_name 
@@ -840,7 +1113,7 @@ def generate_access_token(client_id, user_id):
     token = jwt.encode(payload, oauth_config['jwt_secret'], algorithm='HS256')
     
     # Store token in database
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     try:
         c.execute('''
@@ -873,7 +1146,7 @@ def validate_access_token(token):
         payload = jwt.decode(token, oauth_config['jwt_secret'], algorithms=['HS256'])
         
         # Check if token exists in database and is not expired
-        conn = sqlite3.connect(DB_FILE)
+        conn = get_db_connection()
         c = conn.cursor()
         c.execute('''
             SELECT user_id, expires_at 
@@ -909,7 +1182,7 @@ def validate_access_token(token):
 
 def delete_oauth2_client(client_id, user_id):
     """Delete an OAuth2 client (only if owned by user)."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     
     # Delete tokens first (foreign key cascade should handle this, but let's be explicit)
@@ -925,7 +1198,7 @@ def delete_oauth2_client(client_id, user_id):
 
 def list_oauth2_clients(user_id):
     """List all OAuth2 clients for a user."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     c.execute('''
         SELECT client_id, client_name, created_at, last_used
@@ -946,7 +1219,7 @@ def list_oauth2_clients(user_id):
 
 def cleanup_expired_tokens():
     """Remove expired tokens from database."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     c.execute('DELETE FROM oauth2_tokens WHERE expires_at < ?', (datetime.utcnow().isoformat(),))
     deleted = c.rowcount
@@ -955,9 +1228,8 @@ def cleanup_expired_tokens():
     return deleted
 
 # --- Global State ---
-# This dictionary will hold the running server subprocesses
-# In a production app, you'd use a more robust solution than a global dict
-RUNNING_SERVERS = {} # { 'server_name': { 'process': Popen_object } }
+# This dictionary holds the lifecycle state table maintained by the ServerSupervisor
+RUNNING_SERVERS = {} # { 'server_name': { 'state': 'Running', 'pid': 1234, 'process': Popen_object or None, ... } }
 RUNNING_SERVERS_LOCK = Lock()
 INSTALLATION_LOGS = {} # { 'server_name': ['log line 1', 'log line 2'] }
 
@@ -970,43 +1242,842 @@ SUPPORTED_SERVER_TYPES = [
 
 
 
-# --- Helper Functions ---
-def get_server_process_info(pid):
-    """Gets CPU and Memory for a given PID, requires psutil."""
-    if not psutil or not psutil.pid_exists(pid):
-        return {'cpu_usage': 0, 'memory_usage': 0}
-    try:
-        proc = psutil.Process(pid)
-        return {
-            'cpu_usage': proc.cpu_percent(interval=0.1),
-            'memory_usage': proc.memory_info().rss / (1024 * 1024)  # in MB
-        }
-    except psutil.NoSuchProcess:
-        return {'cpu_usage': 0, 'memory_usage': 0}
-
-
 # --- Server Management Logic ---
 
 def get_screen_session_name(server_name):
     """Generates a consistent screen session name for a server."""
     return f"mc_{server_name}"
 
-def is_server_running(server_name):
-    """Check if a screen session for the server exists, using WSL if on Windows."""
-    screen_session_name = get_screen_session_name(server_name)
-    command = ['screen', '-ls']
-    if sys.platform == "win32":
-        command.insert(0, 'wsl')
+class ScreenSessionRegistry:
+    """
+    Caches a single `screen -ls` snapshot of all mc_* sessions.
+    Every lookup within the TTL is served from the snapshot, so listing
+    N servers costs one subprocess instead of N.
+    """
+    SESSION_PATTERN = re.compile(r'^\s*(\d+)\.(mc_\S+)\t', re.MULTILINE)
+
+    def __init__(self, ttl=2.0):
+        self.ttl = ttl
+        self._sessions = {}  # { 'mc_server_name': pid }
+        self._taken_at = 0.0
+        self._valid = False
+        self._lock = Lock()
+        self.snapshot_count = 0
+        self.lookup_count = 0
+
+    def _take_snapshot(self):
+        command = ['screen', '-ls']
+        if sys.platform == "win32":
+            command.insert(0, 'wsl')
+        try:
+            # screen -ls exits non-zero when no sessions exist, so we only look at stdout.
+            result = subprocess.run(command, capture_output=True, text=True, encoding='utf-8')
+        except FileNotFoundError:
+            # This handles the case where 'wsl' or 'screen' is not installed.
+            print("ERROR: The 'wsl' or 'screen' command was not found. Please ensure it is installed and in your system's PATH.")
+            return {}
+        return {name: int(pid) for pid, name in self.SESSION_PATTERN.findall(result.stdout)}
+
+    def _get_sessions(self):
+        with self._lock:
+            self.lookup_count += 1
+            if not self._valid or time.monotonic() - self._taken_at > self.ttl:
+                self._sessions = self._take_snapshot()
+                self._taken_at = time.monotonic()
+                self._valid = True
+                self.snapshot_count += 1
+            return self._sessions
+
+    def get_pid(self, server_name):
+        """Returns the screen PID for a server, or None if no session exists."""
+        return self._get_sessions().get(get_screen_session_name(server_name))
+
+    def is_running(self, server_name):
+        return self.get_pid(server_name) is not None
+
+    def invalidate(self):
+        """Forces the next lookup to take a fresh snapshot."""
+        with self._lock:
+            self._valid = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'ttl': self.ttl,
+                'snapshots': self.snapshot_count,
+                'lookups': self.lookup_count,
+                'sessions': len(self._sessions),
+                'snapshot_age': round(time.monotonic() - self._taken_at, 3) if self._valid else None
+            }
+
+screen_registry = ScreenSessionRegistry(ttl=float(config.get('screen_snapshot_ttl', 2.0)))
 
+SERVER_STATE_RUNNING = 'Running'
+SERVER_STATE_STOPPING = 'Stopping'
+SERVER_STATE_STOPPED = 'Stopped'
+SERVER_STATE_CRASHED = 'Crashed'
+
+def _wait_for_pid_exit(pid):
+    """Blocks until a process that is not our child exits."""
+    if hasattr(os, 'pidfd_open'):
+        # Linux 5.3+: the pidfd becomes readable when the process exits, no polling needed.
+        try:
+            pidfd = os.pidfd_open(pid)
+        except OSError:
+            return  # Already gone
+        try:
+            select.select([pidfd], [], [])
+        finally:
+            os.close(pidfd)
+    elif psutil:
+        try:
+            psutil.Process(pid).wait()
+        except psutil.NoSuchProcess:
+            pass
+    else:
+        while True:
+            try:
+                os.kill(pid, 0)
+            except OSError:
+                return
+            time.sleep(1)
+
+def _find_jvm(pid):
+    """Returns the java process that is (or runs under) pid, or None."""
     try:
-        # We check if the session name exists in the output of screen -ls.
-        result = subprocess.run(command, capture_output=True, text=True, encoding='utf-8')
-        # The server name in the list will be prepended by a pid and a dot, and followed by a tab.
-        return f".{screen_session_name}\t" in result.stdout
-    except FileNotFoundError:
-        # This handles the case where 'wsl' or 'screen' is not installed.
-        print("ERROR: The 'wsl' or 'screen' command was not found. Please ensure it is installed and in your system's PATH.")
+        root = psutil.Process(pid)
+        for proc in [root] + root.children(recursive=True):
+            try:
+                if proc.name().lower().startswith('java'):
+                    return proc
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                continue
+    except psutil.Error:
+        pass
+    return None
+
+class ServerSupervisor:
+    """
+    Records the screen process of every server and watches it for exit in a
+    wait thread, publishing Running/Stopping/Stopped/Crashed transitions to
+    RUNNING_SERVERS. Callers wait on exit events instead of polling screen.
+
+    With psutil, the JVM under the screen process is what is watched: a server
+    whose java process exits is down even if screen is still there (e.g. a start
+    script that pauses afterwards), and such a leftover session is closed.
+    """
+
+    def __init__(self, jvm_start_timeout=120.0):
+        self.jvm_start_timeout = jvm_start_timeout
+
+    def launch(self, server_name, command, cwd=None, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL):
+        """Spawns the (non-forking) screen or PTY process for a server and supervises it."""
+        process = subprocess.Popen(
+            command,
+            cwd=cwd,
+            stdin=stdin,
+            stdout=stdout,
+            stderr=subprocess.STDOUT if stdout != subprocess.DEVNULL else subprocess.DEVNULL,
+            start_new_session=True  # Survive panel restarts and don't receive our signals
+        )
+        self._track(server_name, process.pid, process)
+        return process.pid
+
+    def adopt(self, server_name, pid):
+        """
+        Supervises a session that was started outside this panel process (e.g.
+        before a restart). Returns whether the session's server is running.
+        """
+        if sys.platform == "win32":
+            return True  # PIDs reported by 'wsl screen -ls' live inside WSL and can't be watched from here
+        with RUNNING_SERVERS_LOCK:
+            entry = RUNNING_SERVERS.get(server_name)
+            if entry and entry['pid'] == pid:
+                # A session whose exit was already published stays down while screen lingers.
+                return entry['state'] in (SERVER_STATE_RUNNING, SERVER_STATE_STOPPING)
+        if psutil and _find_jvm(pid) is None:
+            return False  # Screen without a JVM isn't a running server
+        self._track(server_name, pid, None)
+        return True
+
+    def _track(self, server_name, pid, process):
+        exit_event = Event()
+        with RUNNING_SERVERS_LOCK:
+            RUNNING_SERVERS[server_name] = {
+                'state': SERVER_STATE_RUNNING,
+                'pid': pid,
+                'process': process,
+                'started_at': time.time(),
+                'changed_at': time.time(),
+                'exit_code': None,
+                'exit_event': exit_event
+            }
+        Thread(target=self._watch, args=(server_name, pid, process, exit_event), daemon=True).start()
+        print(f"DEBUG [{server_name}]: Supervising server process {pid}.")
+
+    def _wait_for_jvm(self, pid, process):
+        """Waits for the java process to appear under pid. None if it doesn't, or can't be watched."""
+        if psutil is None or sys.platform == "win32":
+            return None
+        deadline = time.monotonic() + self.jvm_start_timeout
+        while True:
+            jvm = _find_jvm(pid)
+            if jvm is not None or time.monotonic() >= deadline:
+                return jvm
+            if (process.poll() is not None) if process is not None else not psutil.pid_exists(pid):
+                return None
+            time.sleep(0.5)
+
+    def _close_session(self, server_name, pid, process):
+        """Gives the process a JVM ran under a moment to exit on its own, then terminates it."""
+        try:
+            if process is not None:
+                process.wait(timeout=5)
+            else:
+                psutil.Process(pid).wait(timeout=5)
+            return
+        except (subprocess.TimeoutExpired, psutil.TimeoutExpired):
+            pass
+        except psutil.NoSuchProcess:
+            return
+        print(f"DEBUG [{server_name}]: Closing session {pid} that outlived its server process.")
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            pass
+
+    def _watch(self, server_name, pid, process, exit_event):
+        exit_code = None
+        try:
+            jvm = self._wait_for_jvm(pid, process)
+            if jvm is not None and jvm.pid != pid:
+                try:
+                    jvm.wait()
+                except psutil.NoSuchProcess:
+                    pass
+                self._close_session(server_name, pid, process)
+            if process is not None:
+                exit_code = process.wait()
+            else:
+                _wait_for_pid_exit(pid)
+        except Exception as e:
+            print(f"ERROR [{server_name}]: Supervisor wait failed for pid {pid}: {e}")
+
+        with RUNNING_SERVERS_LOCK:
+            entry = RUNNING_SERVERS.get(server_name)
+            # Only publish if this watcher still owns the entry (a restart may have replaced it).
+            if entry and entry['exit_event'] is exit_event:
+                entry['state'] = SERVER_STATE_STOPPED if entry['state'] == SERVER_STATE_STOPPING else SERVER_STATE_CRASHED
+                entry['exit_code'] = exit_code
+                entry['process'] = None
+                entry['changed_at'] = time.time()
+                new_state = entry['state']
+            else:
+                new_state = None
+        screen_registry.invalidate()
+        exit_event.set()
+        if new_state:
+            print(f"DEBUG [{server_name}]: Server process {pid} exited ({new_state}).")
+
+    def _set_state(self, server_name, from_state, to_state):
+        with RUNNING_SERVERS_LOCK:
+            entry = RUNNING_SERVERS.get(server_name)
+            if entry and entry['state'] == from_state:
+                entry['state'] = to_state
+                entry['changed_at'] = time.time()
+
+    def mark_stopping(self, server_name):
+        """Flags the next exit as intentional, so it is published as Stopped instead of Crashed."""
+        self._set_state(server_name, SERVER_STATE_RUNNING, SERVER_STATE_STOPPING)
+
+    def clear_stopping(self, server_name):
+        self._set_state(server_name, SERVER_STATE_STOPPING, SERVER_STATE_RUNNING)
+
+    def is_alive(self, server_name):
+        """True/False for supervised servers, None if the server is not supervised."""
+        with RUNNING_SERVERS_LOCK:
+            entry = RUNNING_SERVERS.get(server_name)
+            if not entry:
+                return None
+            return entry['state'] in (SERVER_STATE_RUNNING, SERVER_STATE_STOPPING)
+
+    def wait_for_exit(self, server_name, timeout=None):
+        """Blocks until the supervised process exits. Returns False on timeout."""
+        with RUNNING_SERVERS_LOCK:
+            entry = RUNNING_SERVERS.get(server_name)
+            exit_event = entry['exit_event'] if entry else None
+        if exit_event is None:
+            return True
+        return exit_event.wait(timeout)
+
+    def get_state(self, server_name):
+        with RUNNING_SERVERS_LOCK:
+            entry = RUNNING_SERVERS.get(server_name)
+            if not entry:
+                return None
+            return {
+                'state': entry['state'],
+                'pid': entry['pid'],
+                'started_at': entry['started_at'],
+                'changed_at': entry['changed_at'],
+                'exit_code': entry['exit_code']
+            }
+
+    def get_all_states(self):
+        with RUNNING_SERVERS_LOCK:
+            server_names = list(RUNNING_SERVERS.keys())
+        return {name: self.get_state(name) for name in server_names}
+
+supervisor = ServerSupervisor(jvm_start_timeout=float(config.get('jvm_start_timeout', 120)))
+
+# --- PTY Console ---
+class PtyConsole:
+    """
+    Opt-in replacement for screen (config 'process_launcher': 'pty'). The start
+    script runs with its output on a PTY owned by the panel, which is read into
+    an in-memory ring buffer instead of a screen logfile, and commands are
+    written straight to the console's input with no process forked per command.
+
+    Input goes through a FIFO in the server's config dir rather than the PTY
+    itself, so a server that outlives a panel restart can be re-attached with a
+    working console. Output from before the restart is only in logs/latest.log.
+    """
+    ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]|\x1b\][^\x07]*\x07|\x1b[()][A-Z0-9]')
+
+    def __init__(self, buffer_lines=1000):
+        self.buffer_lines = buffer_lines
+        self._consoles = {}  # { server_name: { 'pid', 'stdin_fd', 'write_lock', 'buffer' } }
+        self._lock = Lock()
+
+    @staticmethod
+    def is_enabled():
+        return config.get('process_launcher', 'screen') == 'pty' and pty is not None
+
+    @staticmethod
+    def _session_file(server_name):
+        return os.path.join(CONFIGS_DIR, server_name, 'pty_session.json')
+
+    @staticmethod
+    def _fifo_path(server_name):
+        return os.path.join(CONFIGS_DIR, server_name, 'console.fifo')
+
+    def launch(self, server_name, commands, cwd):
+        """Starts the start script commands under a PTY and supervises the process. Returns the PID."""
+        fifo_path = self._fifo_path(server_name)
+        os.makedirs(os.path.dirname(fifo_path), exist_ok=True)
+        if not os.path.exists(fifo_path):
+            os.mkfifo(fifo_path, 0o600)
+        # Opened read-write so neither side blocks on open and the server never sees EOF on stdin.
+        stdin_fd = os.open(fifo_path, os.O_RDWR)
+        master_fd, slave_fd = pty.openpty()
+        try:
+            pid = supervisor.launch(server_name, ['bash', '-c', " && ".join(commands)], cwd=cwd,
+                                    stdin=stdin_fd, stdout=slave_fd)
+            # The panel writes through its own non-blocking descriptor; O_NONBLOCK on the
+            # shared read-write one would also make the server's stdin non-blocking.
+            writer_fd = os.open(fifo_path, os.O_WRONLY | os.O_NONBLOCK)
+        except Exception:
+            os.close(master_fd)
+            raise
+        finally:
+            os.close(slave_fd)
+            os.close(stdin_fd)
+
+        create_time = psutil.Process(pid).create_time() if psutil else None
+        with open(self._session_file(server_name), 'w') as f:
+            json.dump({'pid': pid, 'create_time': create_time}, f)
+
+        console = self._register(server_name, pid, writer_fd)
+        Thread(target=self._read_output, args=(server_name, master_fd, console['buffer']), daemon=True).start()
+        return pid
+
+    def _register(self, server_name, pid, stdin_fd):
+        console = {'pid': pid, 'stdin_fd': stdin_fd, 'write_lock': Lock(),
+                   'buffer': collections.deque(maxlen=self.buffer_lines)}
+        with self._lock:
+            previous = self._consoles.get(server_name)
+            self._consoles[server_name] = console
+        if previous and previous['stdin_fd'] is not None:
+            os.close(previous['stdin_fd'])
+        Thread(target=self._release_after_exit, args=(server_name, console), daemon=True).start()
+        return console
+
+    def _read_output(self, server_name, master_fd, buffer):
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        pending = ''
+        try:
+            while True:
+                try:
+                    chunk = os.read(master_fd, 4096)
+                except OSError:
+                    break  # EIO once every process holding the PTY has exited
+                if not chunk:
+                    break
+                pending += decoder.decode(chunk)
+                *lines, pending = pending.split('\n')
+                for line in lines:
+                    buffer.append(self.ANSI_ESCAPE.sub('', line).rstrip('\r'))
+        finally:
+            os.close(master_fd)
+            if pending:
+                buffer.append(self.ANSI_ESCAPE.sub('', pending).rstrip('\r'))
+
+    def _release_after_exit(self, server_name, console):
+        supervisor.wait_for_exit(server_name)
+        with self._lock:
+            if self._consoles.get(server_name) is not console:
+                return  # Replaced by a newer launch, which owns the session file now
+            del self._consoles[server_name]
+        if console['stdin_fd'] is not None:
+            os.close(console['stdin_fd'])
+        try:
+            os.remove(self._session_file(server_name))
+        except OSError:
+            pass
+
+    def reattach_all(self):
+        """Re-attaches to PTY servers that kept running while the panel was restarted."""
+        if pty is None or not os.path.isdir(CONFIGS_DIR):
+            return
+        stale_errors = (OSError, ValueError, KeyError) + ((psutil.Error,) if psutil else ())
+        for server_name in os.listdir(CONFIGS_DIR):
+            session_file = self._session_file(server_name)
+            if not os.path.exists(session_file):
+                continue
+            try:
+                with open(session_file, 'r') as f:
+                    session_info = json.load(f)
+                pid = session_info['pid']
+                # Guard against the PID having been reused by an unrelated process.
+                if psutil and session_info.get('create_time') is not None:
+                    if psutil.Process(pid).create_time() != session_info['create_time']:
+                        raise ProcessLookupError(pid)
+                else:
+                    os.kill(pid, 0)
+                stdin_fd = os.open(self._fifo_path(server_name), os.O_WRONLY | os.O_NONBLOCK)
+            except stale_errors as e:
+                print(f"DEBUG [{server_name}]: Discarding stale PTY session: {e}")
+                os.remove(session_file)
+                continue
+            supervisor.adopt(server_name, pid)
+            console = self._register(server_name, pid, stdin_fd)
+            console['buffer'].append('[Console re-attached after a panel restart. Earlier output is in logs/latest.log.]')
+            print(f"DEBUG [{server_name}]: Re-attached to PTY server process {pid}.")
+
+    def is_managed(self, server_name):
+        with self._lock:
+            return server_name in self._consoles
+
+    def send(self, server_name, command, timeout=5.0):
+        """
+        Writes a command line to the server's console input. Raises OSError if it
+        can't, including TimeoutError when the server stops draining its stdin.
+        """
+        with self._lock:
+            console = self._consoles.get(server_name)
+        if console is None:
+            raise FileNotFoundError(f"No PTY console for server '{server_name}'")
+        data = f"{command}\n".encode('utf-8')
+        deadline = time.monotonic() + timeout
+        # Only senders to this server wait on each other, and only until the deadline.
+        with console['write_lock']:
+            while data:
+                try:
+                    data = data[os.write(console['stdin_fd'], data):]
+                except BlockingIOError:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"Console input of server '{server_name}' is full")
+                    select.select([], [console['stdin_fd']], [], remaining)
+
+    def get_output(self, server_name, lines=None):
+        with self._lock:
+            console = self._consoles.get(server_name)
+            output = list(console['buffer']) if console else []
+        return output[-lines:] if lines else output
+
+    def kill(self, server_name, sig=signal.SIGKILL):
+        """Signals the whole process group of a PTY server (bash and the JVM it started)."""
+        with self._lock:
+            console = self._consoles.get(server_name)
+        if console is None:
+            return False
+        try:
+            os.killpg(console['pid'], sig)
+        except ProcessLookupError:
+            return False
+        return True
+
+    def kill_all(self, sig=signal.SIGTERM):
+        with self._lock:
+            server_names = list(self._consoles)
+        return [server_name for server_name in server_names if self.kill(server_name, sig)]
+
+pty_console = PtyConsole(buffer_lines=int(config.get('console_buffer_lines', 1000)))
+
+# --- RCON ---
+RCON_TYPE_RESPONSE = 0
+RCON_TYPE_COMMAND = 2
+RCON_TYPE_AUTH = 3
+RCON_TYPE_SENTINEL = 200  # Unknown to the server, which echoes it back with our request id
+
+class RconError(Exception):
+    def __init__(self, message, delivered=False):
+        super().__init__(message)
+        self.delivered = delivered  # The command reached the server, only its response is missing
+
+class RconConnection:
+    """
+    One authenticated RCON connection to a server. Commands are multiplexed
+    over it by request id: a reader thread routes response packets to the
+    waiting caller. Minecraft splits long responses over several packets and
+    doesn't mark the last one, so every command is followed by a sentinel
+    packet whose echo marks the end of the response.
+    """
+
+    def __init__(self, server_name, host, port, password, timeout=5.0):
+        self.server_name = server_name
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self._sock = None
+        self._connect_lock = Lock()  # One connect at a time, so concurrent callers share the socket
+        self._write_lock = Lock()
+        self._lock = Lock()
+        self._next_id = 1
+        self._pending = {}  # { request_id: {'chunks': [], 'event': Event, 'error': None} }
+        self._sentinels = {}  # { sentinel_id: request_id }
+
+    @staticmethod
+    def _encode(request_id, packet_type, body):
+        payload = struct.pack('<ii', request_id, packet_type) + body.encode('utf-8') + b'\x00\x00'
+        return struct.pack('<i', len(payload)) + payload
+
+    @staticmethod
+    def _recv_exact(sock, size):
+        data = b''
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError('RCON connection closed by server')
+            data += chunk
+        return data
+
+    def _recv_packet(self, sock):
+        length, = struct.unpack('<i', self._recv_exact(sock, 4))
+        if length < 10 or length > 1024 * 1024:
+            raise ConnectionError(f'Invalid RCON packet length {length}')
+        payload = self._recv_exact(sock, length)
+        request_id, packet_type = struct.unpack('<ii', payload[:8])
+        return request_id, packet_type, payload[8:-2].decode('utf-8', errors='replace')
+
+    def _allocate_id(self):
+        request_id = self._next_id
+        self._next_id = self._next_id + 1 if self._next_id < 0x7FFFFFFF else 1
+        return request_id
+
+    def is_connected(self):
+        with self._lock:
+            return self._sock is not None
+
+    def connect(self):
+        """Opens and authenticates the connection, unless another caller already has."""
+        with self._connect_lock:
+            if self.is_connected():
+                return
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            try:
+                sock.sendall(self._encode(0, RCON_TYPE_AUTH, self.password))
+                # The auth reply is the only packet on the connection at this point.
+                request_id, packet_type, _ = self._recv_packet(sock)
+                if request_id == -1:
+                    raise RconError('RCON authentication failed, check rcon.password')
+            except Exception:
+                sock.close()
+                raise
+            sock.settimeout(None)  # The reader thread blocks until the server sends something
+            with self._lock:
+                self._sock = sock
+            Thread(target=self._read_loop, args=(sock,), daemon=True).start()
+        print(f"DEBUG [{self.server_name}]: RCON connected on port {self.port}.")
+
+    def _read_loop(self, sock):
+        try:
+            while True:
+                request_id, packet_type, body = self._recv_packet(sock)
+                with self._lock:
+                    if request_id in self._sentinels:
+                        pending = self._pending.pop(self._sentinels.pop(request_id), None)
+                        if pending:
+                            pending['event'].set()
+                    elif request_id in self._pending:
+                        self._pending[request_id]['chunks'].append(body)
+        except (OSError, ConnectionError, struct.error) as e:
+            self._disconnect(sock, e)
+
+    def _disconnect(self, sock, reason):
+        with self._lock:
+            if self._sock is not sock:
+                return
+            self._sock = None
+            pending = list(self._pending.values())
+            self._pending.clear()
+            self._sentinels.clear()
+        try:
+            sock.close()
+        except OSError:
+            pass
+        for entry in pending:
+            entry['error'] = f'RCON connection lost: {reason}'
+            entry['event'].set()
+
+    def close(self):
+        with self._lock:
+            sock = self._sock
+        if sock:
+            self._disconnect(sock, 'closed')
+
+    def command(self, command):
+        """Runs a command and returns its response text. Raises RconError."""
+        if not self.is_connected():
+            try:
+                self.connect()
+            except (OSError, ConnectionError, struct.error) as e:
+                raise RconError(f'Could not connect to RCON on port {self.port}: {e}')
+
+        entry = {'chunks': [], 'event': Event(), 'error': None}
+        with self._lock:
+            sock = self._sock
+            if sock is None:
+                raise RconError('RCON connection lost')
+            request_id = self._allocate_id()
+            sentinel_id = self._allocate_id()
+            self._pending[request_id] = entry
+            self._sentinels[sentinel_id] = request_id
+        try:
+            with self._write_lock:
+                sock.sendall(self._encode(request_id, RCON_TYPE_COMMAND, command) +
+                             self._encode(sentinel_id, RCON_TYPE_SENTINEL, ''))
+        except OSError as e:
+            self._disconnect(sock, e)
+            raise RconError(f'Failed to send RCON command: {e}')
+
+        if not entry['event'].wait(self.timeout):
+            with self._lock:
+                self._pending.pop(request_id, None)
+                self._sentinels.pop(sentinel_id, None)
+            raise RconError(f'RCON command timed out after {self.timeout} seconds', delivered=True)
+        if entry['error']:
+            raise RconError(entry['error'], delivered=True)
+        return ''.join(entry['chunks'])
+
+class RconPool:
+    """Keeps one RCON connection per server, configured from its server.properties."""
+
+    def __init__(self, timeout=5.0):
+        self.timeout = timeout
+        self._connections = {}  # { server_name: RconConnection }
+        self._lock = Lock()
+
+    @staticmethod
+    def get_settings(server_name):
+        """Returns (port, password) if RCON is enabled for the server, otherwise None."""
+        properties = parse_properties(os.path.join(SERVERS_DIR, server_name, 'server.properties'))
+        if properties.get('enable-rcon', 'false').lower() != 'true' or not properties.get('rcon.password'):
+            return None
+        try:
+            return int(properties.get('rcon.port', 25575)), properties['rcon.password']
+        except ValueError:
+            return None
+
+    def get_connection(self, server_name):
+        settings = self.get_settings(server_name)
+        with self._lock:
+            connection = self._connections.get(server_name)
+            if connection and (connection.port, connection.password) != settings:
+                # server.properties changed, the old connection points at the wrong port/password.
+                del self._connections[server_name]
+                connection.close()
+                connection = None
+            if connection is None and settings:
+                connection = self._connections[server_name] = RconConnection(
+                    server_name, '127.0.0.1', settings[0], settings[1], timeout=self.timeout)
+            return connection
+
+    def command(self, server_name, command):
+        """Runs a command over RCON. Returns None if RCON isn't enabled for the server."""
+        connection = self.get_connection(server_name)
+        if connection is None:
+            return None
+        return connection.command(command)
+
+rcon_pool = RconPool(timeout=float(config.get('rcon_timeout', 5)))
+
+def send_console_command(server_name, command):
+    """
+    Sends a command to a server and returns its response, or None when it had to
+    be written blind to the console. RCON is used when enabled in server.properties,
+    otherwise the panel's PTY or screen's 'stuff'.
+    """
+    try:
+        response = rcon_pool.command(server_name, command)
+        if response is not None:
+            return response
+    except RconError as e:
+        if e.delivered:
+            # Don't resend, e.g. 'stop' closes the connection before the response is complete.
+            print(f"WARN [{server_name}]: No RCON response to '{command}': {e}")
+            return None
+        # Expected while the server is still starting, it doesn't listen on RCON yet.
+        print(f"DEBUG [{server_name}]: RCON unavailable, falling back to the console: {e}")
+    write_to_console(server_name, command)
+    return None
+
+def write_to_console(server_name, command):
+    """Types a command into the server's console (the panel's PTY or screen's 'stuff'), with no response."""
+    if pty_console.is_managed(server_name):
+        pty_console.send(server_name, command)
+        return
+    # On Windows, all screen commands must be prefixed with 'wsl'.
+    base_command = ['wsl'] if sys.platform == "win32" else []
+    full_command = base_command + ['screen', '-S', get_screen_session_name(server_name), '-p', '0', '-X', 'stuff', f"{command}\n"]
+    subprocess.run(full_command, check=True, capture_output=True, text=True)
+
+def is_server_running(server_name):
+    """Check if a screen session for the server exists, using WSL if on Windows."""
+    alive = supervisor.is_alive(server_name)
+    if alive:
+        return True
+    # Unsupervised (or exited) servers fall back to the screen snapshot. Sessions found
+    # there are adopted, so later checks are answered by the supervisor.
+    if screen_registry.get_pid(server_name) is None:
         return False
+    # The snapshot may predate the session's exit, so confirm it with a fresh one before adopting.
+    screen_registry.invalidate()
+    pid = screen_registry.get_pid(server_name)
+    if pid is None:
+        return False
+    return supervisor.adopt(server_name, pid)
+
+# --- Resource Sampling ---
+
+class ResourceSampler:
+    """
+    Samples CPU, RSS, thread count and open file handles of every supervised
+    server's process tree (screen -> bash -> java) from a single background
+    thread. /status reads the newest sample from the per-server ring buffer,
+    so the sampling cost does not depend on how many clients poll.
+    """
+
+    def __init__(self, interval=5.0, history_size=120, disk_interval=300.0):
+        self.interval = interval
+        self.history_size = history_size
+        self.disk_interval = disk_interval
+        self._history = {}  # { 'server_name': deque([sample, ...]) }
+        self._disk_usage = {}  # { 'server_name': (monotonic_timestamp, bytes) }
+        self._processes = {}  # { pid: psutil.Process }, reused so cpu_percent() has a baseline
+        self._lock = Lock()
+        self._thread = None
+
+    def start(self):
+        if psutil is None:
+            print("WARN: psutil is not installed. Server resource usage will not be available.")
+            return
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            started = time.monotonic()
+            try:
+                self.sample_all()
+            except Exception as e:
+                print(f"ERROR: Resource sampling failed: {e}")
+            time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def _sample_tree(self, root_pid, seen_pids):
+        root = self._processes.get(root_pid) or psutil.Process(root_pid)
+        tree = [root] + root.children(recursive=True)
+        sample = {'timestamp': time.time(), 'cpu_percent': 0.0, 'rss': 0, 'threads': 0, 'open_files': 0}
+        for proc in tree:
+            proc = self._processes.setdefault(proc.pid, proc)
+            seen_pids.add(proc.pid)
+            try:
+                with proc.oneshot():
+                    sample['cpu_percent'] += proc.cpu_percent(interval=None)
+                    sample['rss'] += proc.memory_info().rss
+                    sample['threads'] += proc.num_threads()
+                    sample['open_files'] += proc.num_fds() if hasattr(proc, 'num_fds') else proc.num_handles()
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+        sample['cpu_percent'] = round(sample['cpu_percent'], 1)
+        return sample
+
+    def _get_disk_usage(self, server_name):
+        # Walking a world is expensive, so the size is only re-measured every disk_interval seconds.
+        cached = self._disk_usage.get(server_name)
+        if cached is None or time.monotonic() - cached[0] >= self.disk_interval:
+            cached = self._disk_usage[server_name] = (time.monotonic(), get_directory_size(os.path.join(SERVERS_DIR, server_name)))
+        return cached[1]
+
+    def _record_metrics(self, server_name, sample):
+        try:
+            tick_monitor.update(server_name)
+            tick = tick_monitor.take_sample(server_name)
+            metrics_store.record(server_name, sample['timestamp'], {
+                'cpu_percent': sample['cpu_percent'],
+                'rss': sample['rss'],
+                'players': len(online_players.get(server_name)[0]),
+                'tps': tick['tps'],
+                'mspt': tick['mspt'],
+                'lag_ms': tick['lag_ms'],
+                'disk': self._get_disk_usage(server_name)
+            })
+        except Exception as e:
+            print(f"ERROR [{server_name}]: Could not record metrics: {e}")
+
+    def sample_all(self):
+        seen_pids = set()
+        for server_name, state in supervisor.get_all_states().items():
+            if state['state'] not in (SERVER_STATE_RUNNING, SERVER_STATE_STOPPING):
+                with self._lock:
+                    stopped = self._history.pop(server_name, None) is not None
+                if stopped:
+                    self._disk_usage.pop(server_name, None)
+                    metrics_store.flush(server_name)
+                continue
+            try:
+                sample = self._sample_tree(state['pid'], seen_pids)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            with self._lock:
+                history = self._history.get(server_name)
+                if history is None:
+                    history = self._history[server_name] = collections.deque(maxlen=self.history_size)
+                history.append(sample)
+            self._record_metrics(server_name, sample)
+        # Forget processes that have exited so their PIDs can be reused safely.
+        for pid in list(self._processes):
+            if pid not in seen_pids:
+                del self._processes[pid]
+
+    def get_latest(self, server_name):
+        with self._lock:
+            history = self._history.get(server_name)
+            return dict(history[-1]) if history else None
+
+    def get_history(self, server_name):
+        with self._lock:
+            return list(self._history.get(server_name, ()))
+
+resource_sampler = ResourceSampler(
+    interval=float(config.get('resource_sample_interval', 5.0)),
+    history_size=int(config.get('resource_history_size', 120)),
+    disk_interval=float(config.get('metrics_disk_interval', 300.0))
+)
 
 def get_server_metadata(server_path):
     """Reads metadata from a .metadata file."""
@@ -1069,25 +2140,737 @@ def download_jar(url, path):
     Thread(target=task, daemon=True).start()
 
 
-# --- Authentication API Endpoints ---
+# --- Server List Ping ---
 
-@app.route('/api/auth/setup-required', methods=['GET'])
-def setup_required():
-    """Check if initial setup is required
-    ---
-    tags:
-      - Authentication
-    responses:
-      200:
-        description: Setup status
-        schema:
-          type: object
-          properties:
-            setup_required:
-              type: boolean
-              description: True if no users exist and setup is needed
+def _encode_varint(value):
+    """Encodes an int as a Minecraft protocol VarInt."""
+    value &= 0xFFFFFFFF
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+def _encode_packet(packet_id, payload=b''):
+    body = _encode_varint(packet_id) + payload
+    return _encode_varint(len(body)) + body
+
+def _decode_varint(data, offset=0):
+    """Decodes a VarInt from a buffer. Returns (value, new_offset)."""
+    value = 0
+    for shift in range(0, 35, 7):
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+    raise ValueError("VarInt is too big")
+
+async def _read_varint(reader):
+    value = 0
+    for shift in range(0, 35, 7):
+        byte = (await reader.readexactly(1))[0]
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value
+    raise ValueError("VarInt is too big")
+
+async def _read_packet(reader):
+    length = await _read_varint(reader)
+    data = await reader.readexactly(length)
+    packet_id, offset = _decode_varint(data)
+    return packet_id, data[offset:]
+
+def _flatten_motd(description):
+    """Turns a status 'description' (plain string or chat component) into plain text."""
+    if isinstance(description, str):
+        return re.sub(r'\u00a7.', '', description)
+    if isinstance(description, dict):
+        text = description.get('text', '')
+        for extra in description.get('extra', []):
+            text += _flatten_motd(extra)
+        return re.sub(r'\u00a7.', '', text)
+    if isinstance(description, list):
+        return ''.join(_flatten_motd(part) for part in description)
+    return ''
+
+async def ping_minecraft_server(host, port, timeout=2.0):
     """
-    return jsonify({'setup_required': not has_users()})
+    Performs a Server List Ping (handshake + status + ping) against a Minecraft server.
+    Returns a dict with online/max players, latency, MOTD and version.
+    """
+    async def _ping():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            host_bytes = host.encode('utf-8')
+            handshake = (
+                _encode_varint(-1)  # Protocol version: -1 means "just tell me yours"
+                + _encode_varint(len(host_bytes)) + host_bytes
+                + struct.pack('>H', port)
+                + _encode_varint(1)  # Next state: status
+            )
+            writer.write(_encode_packet(0x00, handshake) + _encode_packet(0x00))
+            await writer.drain()
+
+            packet_id, data = await _read_packet(reader)
+            if packet_id != 0x00:
+                raise ValueError(f"Unexpected status packet id {packet_id}")
+            json_length, offset = _decode_varint(data)
+            status = json.loads(data[offset:offset + json_length].decode('utf-8'))
+
+            sent_at = time.perf_counter()
+            writer.write(_encode_packet(0x01, struct.pack('>q', int(sent_at * 1000))))
+            await writer.drain()
+            await _read_packet(reader)
+            latency = (time.perf_counter() - sent_at) * 1000
+        finally:
+            writer.close()
+        players = status.get('players', {})
+        version = status.get('version', {})
+        return {
+            'online': True,
+            'players_online': players.get('online', 0),
+            'max_players': players.get('max', 0),
+            'latency': round(latency, 1),
+            'motd': _flatten_motd(status.get('description', '')),
+            'version': version.get('name'),
+            'protocol': version.get('protocol')
+        }
+    return await asyncio.wait_for(_ping(), timeout)
+
+class ServerListPinger:
+    """
+    Pings all running servers concurrently in one event-loop pass and caches
+    each result for a few seconds, so polling /status never opens a socket
+    per HTTP request.
+    """
+
+    def __init__(self, cache_ttl=5.0, timeout=2.0):
+        self.cache_ttl = cache_ttl
+        self.timeout = timeout
+        self._cache = {}  # { 'server_name': (monotonic_timestamp, result) }
+        self._cache_lock = Lock()
+        self._refresh_lock = Lock()
+
+    def _get_cached(self, server_name):
+        with self._cache_lock:
+            cached = self._cache.get(server_name)
+        if cached and time.monotonic() - cached[0] <= self.cache_ttl:
+            return cached[1]
+        return None
+
+    def _get_targets(self, extra_server_name=None):
+        server_names = {name for name, state in supervisor.get_all_states().items()
+                        if state['state'] == SERVER_STATE_RUNNING}
+        if extra_server_name:
+            server_names.add(extra_server_name)
+        targets = {}
+        for server_name in server_names:
+            try:
+                port = int(get_server_properties(os.path.join(SERVERS_DIR, server_name)).get('port', 25565))
+            except (ValueError, TypeError, OSError):
+                continue
+            targets[server_name] = port
+        return targets
+
+    async def _ping_all(self, targets):
+        async def _ping_one(server_name, port):
+            try:
+                return server_name, await ping_minecraft_server('127.0.0.1', port, self.timeout)
+            except (OSError, asyncio.TimeoutError, ValueError, IndexError, asyncio.IncompleteReadError) as e:
+                return server_name, {'online': False, 'error': str(e) or e.__class__.__name__}
+        return await asyncio.gather(*(_ping_one(name, port) for name, port in targets.items()))
+
+    def refresh(self, extra_server_name=None):
+        """Pings every running server (plus an optional extra one) concurrently."""
+        targets = self._get_targets(extra_server_name)
+        if not targets:
+            return
+        results = asyncio.run(self._ping_all(targets))
+        now = time.monotonic()
+        with self._cache_lock:
+            for server_name, result in results:
+                self._cache[server_name] = (now, result)
+
+    def get_status(self, server_name):
+        result = self._get_cached(server_name)
+        if result is not None:
+            return result
+        with self._refresh_lock:
+            # Another request may have refreshed the whole fleet while we waited.
+            result = self._get_cached(server_name)
+            if result is None:
+                self.refresh(extra_server_name=server_name)
+                result = self._get_cached(server_name)
+        return result or {'online': False}
+
+server_list_pinger = ServerListPinger(
+    cache_ttl=float(config.get('slp_cache_ttl', 5.0)),
+    timeout=float(config.get('slp_timeout', 2.0))
+)
+
+# --- Metrics Store ---
+METRICS_DIR = 'metrics'
+METRIC_NAMES = ('cpu_percent', 'rss', 'players', 'tps', 'disk', 'mspt', 'lag_ms')
+# Every record: time (uint32), sample count (uint16), then avg and max (float32) per metric.
+METRIC_RECORD = struct.Struct('<IH' + 'ff' * len(METRIC_NAMES))
+# Every file starts with: magic, format version, metrics per record.
+METRIC_HEADER = struct.Struct('<4sHH')
+METRIC_MAGIC = b'MSGM'
+METRIC_FORMAT_VERSION = 1
+# (name, resolution in seconds, retention in seconds), finest first.
+METRIC_TIERS = (
+    ('raw', 0, 24 * 3600),
+    ('1m', 60, 30 * 24 * 3600),
+    ('1h', 3600, 365 * 24 * 3600),
+)
+METRICS_MAX_POINTS = 1000
+
+class MetricsStore:
+    """
+    Keeps per-server metric history in three append-only files of fixed-size
+    records under configs/<server>/metrics/: raw samples for a day, 1-minute
+    rollups for a month and 1-hour rollups for a year. Rollups are accumulated
+    in memory and appended once their minute/hour has passed. Records are in
+    time order, so a range is found with a binary search over the file and
+    expired records are dropped by rewriting the file once they make up a
+    tenth of it, which is checked whenever a minute closes. Missing values (e.g. TPS before it is known) are NaN.
+
+    Files carry a header with the format version and the number of metrics per
+    record. A file with any other header is moved aside, never reinterpreted.
+    """
+
+    def __init__(self, sample_interval=5.0):
+        self.sample_interval = sample_interval
+        self._locks = collections.defaultdict(Lock)
+        self._pending = {}  # { (server_name, tier): [bucket_start, count, sums, maxes] }
+        self._checked = set()  # (server_name, tier) whose file has the current format
+
+    @staticmethod
+    def _path(server_name, tier):
+        return os.path.join(get_server_config_dir(server_name), METRICS_DIR, f'{tier}.bin')
+
+    def _check_format(self, server_name, tier):
+        """Moves aside a tier file that isn't in the current format, once per process."""
+        key = (server_name, tier)
+        if key in self._checked:
+            return
+        path = self._path(server_name, tier)
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(METRIC_HEADER.size)
+        except FileNotFoundError:
+            header = None
+        if header and header != METRIC_HEADER.pack(METRIC_MAGIC, METRIC_FORMAT_VERSION, len(METRIC_NAMES)):
+            os.replace(path, path + '.incompatible')
+            print(f"WARN [{server_name}]: Moved metrics file {tier}.bin aside, its format is not readable by this version.")
+        self._checked.add(key)
+
+    def _append(self, server_name, tier, records):
+        path = self._path(server_name, tier)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._check_format(server_name, tier)
+        with open(path, 'ab') as f:
+            if f.tell() == 0:
+                f.write(METRIC_HEADER.pack(METRIC_MAGIC, METRIC_FORMAT_VERSION, len(METRIC_NAMES)))
+            f.write(b''.join(METRIC_RECORD.pack(*record) for record in records))
+
+    def _read_range(self, server_name, tier, since, until):
+        """Returns the records of a tier with since <= time < until."""
+        self._check_format(server_name, tier)
+        try:
+            f = open(self._path(server_name, tier), 'rb')
+        except FileNotFoundError:
+            return []
+        with f:
+            count = max(0, os.fstat(f.fileno()).st_size - METRIC_HEADER.size) // METRIC_RECORD.size
+
+            def time_at(index):
+                f.seek(METRIC_HEADER.size + index * METRIC_RECORD.size)
+                return struct.unpack('<I', f.read(4))[0]
+
+            low, high = 0, count
+            while low < high:
+                middle = (low + high) // 2
+                if time_at(middle) < since:
+                    low = middle + 1
+                else:
+                    high = middle
+            f.seek(METRIC_HEADER.size + low * METRIC_RECORD.size)
+            records = []
+            while True:
+                data = f.read(METRIC_RECORD.size * 4096)
+                if len(data) < METRIC_RECORD.size:
+                    break
+                for record in METRIC_RECORD.iter_unpack(data[:len(data) - len(data) % METRIC_RECORD.size]):
+                    if record[0] >= until:
+                        return records
+                    records.append(record)
+            return records
+
+    def _expire(self, server_name, tier, retention):
+        path = self._path(server_name, tier)
+        self._check_format(server_name, tier)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        count = max(0, size - METRIC_HEADER.size) // METRIC_RECORD.size
+        if count < 100:
+            return
+        cutoff = time.time() - retention
+        with open(path, 'rb') as f:
+            f.seek(METRIC_HEADER.size)
+            oldest = struct.unpack('<I', f.read(4))[0]
+            f.seek(METRIC_HEADER.size + (count // 10) * METRIC_RECORD.size)
+            tenth = struct.unpack('<I', f.read(4))[0]
+        if oldest >= cutoff or tenth >= cutoff:
+            return
+        records = self._read_range(server_name, tier, cutoff, float('inf'))
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(METRIC_HEADER.pack(METRIC_MAGIC, METRIC_FORMAT_VERSION, len(METRIC_NAMES)))
+            f.write(b''.join(METRIC_RECORD.pack(*record) for record in records))
+        os.replace(temp_path, path)
+
+    def _accumulate(self, server_name, tier, resolution, record):
+        """Adds a record to the tier's open bucket and returns the bucket it closed, if any."""
+        key = (server_name, tier)
+        bucket_start = record[0] - record[0] % resolution
+        pending = self._pending.get(key)
+        closed = None
+        if pending is not None and pending[0] != bucket_start:
+            closed = self._close_bucket(pending)
+            pending = None
+        if pending is None:
+            pending = self._pending[key] = [bucket_start, 0, [0.0] * len(METRIC_NAMES), [math.nan] * len(METRIC_NAMES)]
+            pending.append([0] * len(METRIC_NAMES))  # Samples per metric that had a value
+        count = record[1]
+        pending[1] += count
+        for i in range(len(METRIC_NAMES)):
+            avg, peak = record[2 + 2 * i], record[3 + 2 * i]
+            if math.isnan(avg):
+                continue
+            pending[2][i] += avg * count
+            pending[4][i] += count
+            pending[3][i] = peak if math.isnan(pending[3][i]) else max(pending[3][i], peak)
+        return closed
+
+    @staticmethod
+    def _close_bucket(pending):
+        bucket_start, count, sums, maxes, counts = pending
+        values = []
+        for i in range(len(METRIC_NAMES)):
+            values.extend((sums[i] / counts[i] if counts[i] else math.nan, maxes[i]))
+        return (bucket_start, min(count, 0xFFFF), *values)
+
+    def record(self, server_name, timestamp, values):
+        """Stores one raw sample ({metric: value or None}) and rolls it up into the coarser tiers."""
+        timestamp = int(timestamp)
+        fields = []
+        for name in METRIC_NAMES:
+            value = values.get(name)
+            value = math.nan if value is None else float(value)
+            fields.extend((value, value))
+        record = (timestamp, 1, *fields)
+        with self._locks[server_name]:
+            self._append(server_name, 'raw', [record])
+            # Each closed bucket feeds the next tier up.
+            expiring = []
+            for tier, resolution, retention in METRIC_TIERS[1:]:
+                record = self._accumulate(server_name, tier, resolution, record)
+                if record is None:
+                    break
+                self._append(server_name, tier, [record])
+                expiring.append((tier, retention))
+            # Checked when a minute closes rather than on every sample.
+            if expiring:
+                expiring.append((METRIC_TIERS[0][0], METRIC_TIERS[0][2]))
+            for tier, retention in expiring:
+                self._expire(server_name, tier, retention)
+
+    def flush(self, server_name):
+        """
+        Writes the open rollup buckets of a server that stopped, so its last minutes
+        aren't lost. If it starts again within the same minute or hour, that bucket
+        gets a second record, which queries merge like any two records in a step.
+        """
+        with self._locks[server_name]:
+            record = None
+            for tier, resolution, _ in METRIC_TIERS[1:]:
+                if record is not None:
+                    closed = self._accumulate(server_name, tier, resolution, record)
+                    if closed is not None:
+                        self._append(server_name, tier, [closed])
+                pending = self._pending.pop((server_name, tier), None)
+                record = self._close_bucket(pending) if pending else None
+                if record is not None:
+                    self._append(server_name, tier, [record])
+
+    def flush_all(self):
+        for server_name, _ in list(self._pending):
+            self.flush(server_name)
+
+    def forget(self, server_name):
+        with self._locks[server_name]:
+            for tier, _, _ in METRIC_TIERS[1:]:
+                self._pending.pop((server_name, tier), None)
+            for tier, _, _ in METRIC_TIERS:
+                self._checked.discard((server_name, tier))
+
+    def choose_tier(self, since, until, step=None):
+        """
+        Picks the finest tier that still covers `since` and isn't finer than the
+        requested step (by default whatever keeps the answer under METRICS_MAX_POINTS).
+        Returns (tier, step).
+        """
+        step = step or (until - since) / METRICS_MAX_POINTS
+        now = time.time()
+        for index, (tier, resolution, retention) in enumerate(METRIC_TIERS):
+            coarser = METRIC_TIERS[index + 1] if index + 1 < len(METRIC_TIERS) else None
+            if since < now - retention and coarser is not None:
+                continue
+            if coarser is not None and step >= coarser[1]:
+                continue
+            resolution = resolution or self.sample_interval
+            # Whole multiples of the tier's resolution, so every point covers the same number of records.
+            return tier, math.ceil(max(resolution, step) / resolution) * resolution
+        resolution = METRIC_TIERS[-1][1]
+        return METRIC_TIERS[-1][0], math.ceil(max(resolution, step) / resolution) * resolution
+
+    def query(self, server_name, since, until, step=None):
+        """Returns the metrics between since and until, downsampled into `step` second buckets."""
+        tier, step = self.choose_tier(since, until, step)
+        step = max(1, int(math.ceil(step)))
+        with self._locks[server_name]:
+            records = self._read_range(server_name, tier, since, until)
+            # The newest rollup bucket is still open in memory.
+            pending = self._pending.get((server_name, tier))
+            if pending is not None and since <= pending[0] < until:
+                records.append(self._close_bucket(pending))
+
+        buckets = collections.OrderedDict()
+        for record in records:
+            bucket_start = record[0] - (record[0] - int(since)) % step
+            bucket = buckets.get(bucket_start)
+            if bucket is None:
+                bucket = buckets[bucket_start] = [bucket_start, 0, [0.0] * len(METRIC_NAMES), [math.nan] * len(METRIC_NAMES), [0] * len(METRIC_NAMES)]
+            bucket[1] += record[1]
+            for i in range(len(METRIC_NAMES)):
+                avg, peak = record[2 + 2 * i], record[3 + 2 * i]
+                if math.isnan(avg):
+                    continue
+                bucket[2][i] += avg * record[1]
+                bucket[4][i] += record[1]
+                bucket[3][i] = peak if math.isnan(bucket[3][i]) else max(bucket[3][i], peak)
+
+        result = {'tier': tier, 'step': step, 'from': since, 'to': until, 'timestamps': list(buckets)}
+        for i, name in enumerate(METRIC_NAMES):
+            result[name] = {
+                'avg': [round(b[2][i] / b[4][i], 3) if b[4][i] else None for b in buckets.values()],
+                'max': [None if math.isnan(b[3][i]) else round(b[3][i], 3) for b in buckets.values()]
+            }
+        return result
+
+metrics_store = MetricsStore(sample_interval=float(config.get('resource_sample_interval', 5.0)))
+atexit.register(metrics_store.flush_all)
+
+# --- Tick Health ---
+MINECRAFT_FORMATTING = re.compile(r'\u00a7[0-9a-fk-orx]|\x1b\[[0-9;]*[A-Za-z]', re.IGNORECASE)
+TICK_LAG_PATTERN = re.compile(r"Can't keep up! Is the server overloaded\? Running (\d+)ms or (\d+) ticks behind")
+# Paper/Spigot/Purpur 'tps': TPS from last 1m, 5m, 15m: *20.0, 20.0, 20.0
+TICK_TPS_PATTERN = re.compile(r'TPS from last 1m, 5m, 15m: \*?([\d.]+)')
+# Paper/Purpur 'mspt': a header line, then avg/min/max for 5s, 10s and 1m
+TICK_MSPT_HEADER = re.compile(r'Server tick times \(avg/min/max\)')
+TICK_MSPT_VALUES = re.compile(r'([\d.]+)/[\d.]+/[\d.]+')
+# Forge/NeoForge 'forge tps': Overall: Mean tick time: 1.234 ms. Mean TPS: 20.000
+TICK_FORGE_PATTERN = re.compile(r'Overall\s*: Mean tick time: ([\d.]+) ms\. Mean TPS: ([\d.]+)')
+# Vanilla 1.20.3+ 'tick query': Target tick rate: 20.0 per second. / Average time per tick: 1.2ms (Target: 50.0ms)
+TICK_TARGET_PATTERN = re.compile(r'Target tick rate: ([\d.]+) per second')
+TICK_QUERY_PATTERN = re.compile(r'Average time per tick: ([\d.]+) ?ms')
+UNKNOWN_COMMAND_PATTERN = re.compile(r'Unknown (?:or incomplete )?command', re.IGNORECASE)
+TICK_POLL_COMMANDS = {
+    'paper': ['tps', 'mspt'],
+    'purpur': ['tps', 'mspt'],
+    'forge': ['forge tps'],
+    'neoforge': ['neoforge tps'],
+    'vanilla': ['tick query'],
+    'fabric': ['tick query'],
+    'quilt': ['tick query'],
+}
+
+class TickMonitor:
+    """
+    Turns a server's lag signals into tick-health numbers: "Can't keep up!"
+    warnings plus the output of the TPS/MSPT command its server type supports,
+    which is sent over RCON every poll_interval seconds. Typing the commands
+    into the console instead is opt-in (console_polling), as each poll then
+    shows up in latest.log and the console; their output is picked up from
+    latest.log through a byte cursor that the resource sampler advances every
+    sample. Commands the server rejects aren't sent again. Readings older than
+    a few poll intervals are reported as unknown.
+    """
+
+    def __init__(self, poll_interval=60.0, lag_window=300.0, console_polling=False):
+        self.poll_interval = poll_interval
+        self.lag_window = lag_window
+        self.console_polling = console_polling
+        self.stale_after = max(3 * poll_interval, 180.0)
+        self._lock = Lock()
+        self._states = {}  # { 'server_name': state }
+        self._thread = None
+
+    def _state(self, server_name):
+        state = self._states.get(server_name)
+        if state is None:
+            state = self._states[server_name] = {
+                'cursor': None,
+                'tps': None,
+                'mspt': None,
+                'target_tps': 20.0,
+                'updated_at': None,
+                'lag_events': collections.deque(),  # (time, ms, ticks)
+                'pending_lag_ms': 0,
+                'awaiting_mspt': False,
+                'console_probes': collections.deque(),  # Commands typed into the console, awaiting their answer
+                'unsupported': set()
+            }
+        return state
+
+    @staticmethod
+    def _answered(state, rejected=False):
+        """Pairs an answer in the log with the oldest console probe still waiting for one."""
+        if state['console_probes']:
+            command = state['console_probes'].popleft()
+            if rejected:
+                state['unsupported'].add(command)
+
+    def _parse(self, state, lines):
+        now = time.time()
+        for line in lines:
+            text = MINECRAFT_FORMATTING.sub('', line)
+            lag_match = TICK_LAG_PATTERN.search(text)
+            if lag_match:
+                ms, ticks = int(lag_match.group(1)), int(lag_match.group(2))
+                state['lag_events'].append((now, ms, ticks))
+                state['pending_lag_ms'] += ms
+                continue
+            if UNKNOWN_COMMAND_PATTERN.search(text):
+                self._answered(state, rejected=True)
+                continue
+            if state['awaiting_mspt']:
+                mspt_match = TICK_MSPT_VALUES.search(text)
+                if mspt_match:
+                    state['awaiting_mspt'] = False
+                    state['mspt'] = float(mspt_match.group(1))
+                    state['updated_at'] = now
+                    continue
+            if TICK_MSPT_HEADER.search(text):
+                self._answered(state)
+                state['awaiting_mspt'] = True
+                continue
+            tps_match = TICK_TPS_PATTERN.search(text)
+            if tps_match:
+                self._answered(state)
+                state['tps'] = min(float(tps_match.group(1)), 20.0)
+                state['updated_at'] = now
+                continue
+            forge_match = TICK_FORGE_PATTERN.search(text)
+            if forge_match:
+                self._answered(state)
+                state['mspt'] = float(forge_match.group(1))
+                state['tps'] = float(forge_match.group(2))
+                state['updated_at'] = now
+                continue
+            target_match = TICK_TARGET_PATTERN.search(text)
+            if target_match:
+                self._answered(state)
+                state['target_tps'] = float(target_match.group(1))
+            query_match = TICK_QUERY_PATTERN.search(text)
+            if query_match:
+                mspt = float(query_match.group(1))
+                state['mspt'] = mspt
+                # A tick can't start early, so TPS is capped by the target rate.
+                state['tps'] = round(min(state['target_tps'], 1000.0 / mspt), 2) if mspt > 0 else state['target_tps']
+                state['updated_at'] = now
+        while state['lag_events'] and state['lag_events'][0][0] < now - self.lag_window:
+            state['lag_events'].popleft()
+
+    def update(self, server_name):
+        """Parses what the server logged since the last call. The first call starts at the end of the log."""
+        log_file = os.path.join(SERVERS_DIR, server_name, 'logs', 'latest.log')
+        with self._lock:
+            state = self._state(server_name)
+            try:
+                while True:
+                    lines, state['cursor'], reset = read_log_increment(log_file, state['cursor'], tail_bytes=0)
+                    if not lines:
+                        break
+                    self._parse(state, lines)
+            except FileNotFoundError:
+                pass
+
+    def _fresh(self, state):
+        return state['updated_at'] is not None and time.time() - state['updated_at'] <= self.stale_after
+
+    def take_sample(self, server_name):
+        """Returns the current tps/mspt and the lag reported since the previous sample, in ms."""
+        with self._lock:
+            state = self._state(server_name)
+            fresh = self._fresh(state)
+            lag_ms, state['pending_lag_ms'] = state['pending_lag_ms'], 0
+            return {
+                'tps': state['tps'] if fresh else None,
+                'mspt': state['mspt'] if fresh else None,
+                'lag_ms': lag_ms
+            }
+
+    def get_status(self, server_name):
+        with self._lock:
+            state = self._state(server_name)
+            fresh = self._fresh(state)
+            last_lag = state['lag_events'][-1] if state['lag_events'] else None
+            return {
+                'tps': state['tps'] if fresh else None,
+                'mspt': state['mspt'] if fresh else None,
+                'lag_warnings': len(state['lag_events']),
+                'last_lag': {'time': last_lag[0], 'ms': last_lag[1], 'ticks': last_lag[2]} if last_lag else None
+            }
+
+    def poll(self, server_name):
+        """Sends the server type's TPS/MSPT commands over RCON, or the console if console polling is on."""
+        server_type = str(get_server_metadata(os.path.join(SERVERS_DIR, server_name)).get('server_type', '')).lower()
+        with self._lock:
+            state = self._state(server_name)
+            unsupported = set(state['unsupported'])
+            state['console_probes'].clear()  # Probes still unanswered from the last poll never will be
+        for command in TICK_POLL_COMMANDS.get(server_type, []):
+            if command in unsupported:
+                continue
+            try:
+                response = rcon_pool.command(server_name, command)
+            except RconError as e:
+                if e.delivered:
+                    continue
+                response = None  # RCON isn't up (yet)
+            if response is None:
+                if not self.console_polling:
+                    return
+                with self._lock:
+                    self._state(server_name)['console_probes'].append(command)
+                # update() reads the answer, or the unknown-command error, from the log
+                write_to_console(server_name, command)
+                continue
+            with self._lock:
+                state = self._state(server_name)
+                if UNKNOWN_COMMAND_PATTERN.search(response):
+                    state['unsupported'].add(command)
+                else:
+                    self._parse(state, response.splitlines())
+
+    def start(self):
+        if self.poll_interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.poll_interval)
+            for server_name, state in supervisor.get_all_states().items():
+                if state['state'] != SERVER_STATE_RUNNING:
+                    continue
+                try:
+                    self.poll(server_name)
+                except Exception as e:
+                    print(f"WARN [{server_name}]: Could not poll tick health: {e}")
+
+    def forget(self, server_name):
+        with self._lock:
+            self._states.pop(server_name, None)
+
+tick_monitor = TickMonitor(
+    poll_interval=float(config.get('tick_poll_interval', 60.0)),
+    lag_window=float(config.get('tick_lag_window', 300.0)),
+    console_polling=bool(config.get('tick_poll_console', False))
+)
+
+@app.route('/api/servers/<server_name>/metrics', methods=['GET'])
+@api_auth_required
+def get_server_metrics(server_name, api_user=None):
+    """Get Server Metrics History
+    ---
+    tags:
+      - Servers
+    security:
+      - Bearer: []
+      - Session: []
+    parameters:
+      - name: server_name
+        in: path
+        type: string
+        required: true
+      - name: from
+        in: query
+        type: number
+        required: false
+        description: Start of the range (unix time), defaults to one hour before `to`
+      - name: to
+        in: query
+        type: number
+        required: false
+        description: End of the range (unix time), defaults to now
+      - name: step
+        in: query
+        type: number
+        required: false
+        description: Seconds per point. Defaults to whatever keeps the answer under 1000 points
+    responses:
+      200:
+        description: Timestamps plus avg/max series for cpu_percent, rss, players, tps, disk, mspt and lag_ms, and the tier they came from
+      400:
+        description: Invalid range
+      404:
+        description: Server not found
+    """
+    if not os.path.isdir(os.path.join(SERVERS_DIR, server_name)):
+        return jsonify({"error": "Server not found"}), 404
+    try:
+        until = float(request.args.get('to', time.time()))
+        since = float(request.args.get('from', until - 3600))
+        step = float(request.args['step']) if request.args.get('step') else None
+    except ValueError:
+        return jsonify({"error": "from, to and step must be numbers"}), 400
+    if since >= until or (step is not None and step <= 0):
+        return jsonify({"error": "from must be before to and step must be positive"}), 400
+    if step is not None and (until - since) / step > 10 * METRICS_MAX_POINTS:
+        return jsonify({"error": f"Too many points, use a step of at least {math.ceil((until - since) / (10 * METRICS_MAX_POINTS))}s"}), 400
+    return jsonify(metrics_store.query(server_name, since, until, step))
+
+
+# --- Authentication API Endpoints ---
+
+@app.route('/api/auth/setup-required', methods=['GET'])
+def setup_required():
+    """Check if initial setup is required
+    ---
+    tags:
+      - Authentication
+    responses:
+      200:
+        description: Setup status
+        schema:
+          type: object
+          properties:
+            setup_required:
+              type: boolean
+              description: True if no users exist and setup is needed
+    """
+    return jsonify({'setup_required': not has_users()})
 
 @app.route('/api/auth/setup', methods=['POST'])
 def setup():
@@ -1419,7 +3202,7 @@ def get_current_user_info(api_user=None):
 @api_require_admin
 def list_users(api_user=None):
     """List all users (admin only)."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     c.execute('SELECT id, username, role, is_active, created_at FROM users ORDER BY username')
     rows = c.fetchall()
@@ -1489,7 +3272,7 @@ def update_user_admin(user_id, api_user=None):
         return jsonify({'error': 'No updates provided'}), 400
     
     params.append(user_id)
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     c.execute(f'UPDATE users SET {", ".join(updates)} WHERE id = ?', params)
     conn.commit()
@@ -1504,7 +3287,7 @@ def update_user_admin(user_id, api_user=None):
 @api_require_admin
 def delete_user_admin(user_id, api_user=None):
     """Delete user (admin only)."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     c.execute('DELETE FROM user_group_memberships WHERE user_id = ?', (user_id,))
     c.execute('DELETE FROM user_server_permissions WHERE user_id = ?', (user_id,))
@@ -1512,6 +3295,7 @@ def delete_user_admin(user_id, api_user=None):
     conn.commit()
     deleted = c.rowcount
     conn.close()
+    permission_cache.bump()
     
     if deleted == 0:
         return jsonify({'error': 'User not found'}), 404
@@ -1521,7 +3305,7 @@ def delete_user_admin(user_id, api_user=None):
 @api_require_admin
 def list_groups(api_user=None):
     """List all groups (admin only)."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     c.execute('SELECT id, name, description, created_at FROM user_groups ORDER BY name')
     groups = []
@@ -1552,7 +3336,7 @@ def create_group(api_user=None):
     if not name:
         return jsonify({'error': 'Group name is required'}), 400
     
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     try:
         c.execute('INSERT INTO user_groups (name, description) VALUES (?, ?)', (name, description))
@@ -1589,7 +3373,7 @@ def update_group(group_id, api_user=None):
         return jsonify({'error': 'No updates provided'}), 400
     
     params.append(group_id)
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     try:
         c.execute(f'UPDATE user_groups SET {", ".join(updates)} WHERE id = ?', params)
@@ -1608,7 +3392,7 @@ def update_group(group_id, api_user=None):
 @api_require_admin
 def delete_group(group_id, api_user=None):
     """Delete group (admin only)."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     c.execute('DELETE FROM user_group_memberships WHERE group_id = ?', (group_id,))
     c.execute('DELETE FROM group_server_permissions WHERE group_id = ?', (group_id,))
@@ -1616,6 +3400,7 @@ def delete_group(group_id, api_user=None):
     conn.commit()
     deleted = c.rowcount
     conn.close()
+    permission_cache.bump()
     
     if deleted == 0:
         return jsonify({'error': 'Group not found'}), 404
@@ -1625,7 +3410,7 @@ def delete_group(group_id, api_user=None):
 @api_require_admin
 def list_group_members(group_id, api_user=None):
     """List members of a group (admin only)."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     c.execute('''
         SELECT u.id, u.username, u.role, ugm.assigned_at
@@ -1655,12 +3440,13 @@ def add_group_member(group_id, api_user=None):
     if not user_id:
         return jsonify({'error': 'user_id is required'}), 400
     
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     try:
         c.execute('INSERT INTO user_group_memberships (user_id, group_id) VALUES (?, ?)', (user_id, group_id))
         conn.commit()
         conn.close()
+        permission_cache.bump()
         return jsonify({'message': 'User added to group successfully'}), 201
     except sqlite3.IntegrityError:
         conn.close()
@@ -1670,12 +3456,13 @@ def add_group_member(group_id, api_user=None):
 @api_require_admin
 def remove_group_member(group_id, user_id, api_user=None):
     """Remove user from group (admin only)."""
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     c.execute('DELETE FROM user_group_memberships WHERE group_id = ? AND user_id = ?', (group_id, user_id))
     conn.commit()
     deleted = c.rowcount
     conn.close()
+    permission_cache.bump()
     
     if deleted == 0:
         return jsonify({'error': 'Member not found in group'}), 404
@@ -1688,7 +3475,7 @@ def get_server_permissions(server_name, api_user=None):
     if not is_valid_server_name(server_name):
         return jsonify({'error': 'Invalid server name'}), 400
     
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     
     # Get user permissions
@@ -1793,7 +3580,7 @@ def set_user_permissions(server_name, user_id, api_user=None):
         1 if data.get('can_delete_server') else 0
     )
     
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     c.execute('''
         INSERT INTO user_server_permissions (
@@ -1822,8 +3609,11 @@ def set_user_permissions(server_name, user_id, api_user=None):
             can_access_console = excluded.can_access_console,
             can_delete_server = excluded.can_delete_server
     ''', (user_id, server_name, *values))
+    c.execute(f"UPDATE user_server_permissions SET permission_mask = {permission_mask_sql()} WHERE user_id = ? AND server_name = ?",
+              (user_id, server_name))
     conn.commit()
     conn.close()
+    permission_cache.bump()
     
     return jsonify({'message': 'User permissions updated successfully'}), 200
 
@@ -1854,7 +3644,7 @@ def set_group_permissions(server_name, group_id, api_user=None):
         1 if data.get('can_delete_server') else 0
     )
     
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     c.execute('''
         INSERT INTO group_server_permissions (
@@ -1883,8 +3673,11 @@ def set_group_permissions(server_name, group_id, api_user=None):
             can_access_console = excluded.can_access_console,
             can_delete_server = excluded.can_delete_server
     ''', (group_id, server_name, *values))
+    c.execute(f"UPDATE group_server_permissions SET permission_mask = {permission_mask_sql()} WHERE group_id = ? AND server_name = ?",
+              (group_id, server_name))
     conn.commit()
     conn.close()
+    permission_cache.bump()
     
     return jsonify({'message': 'Group permissions updated successfully'}), 200
 
@@ -1895,12 +3688,13 @@ def delete_user_permissions(server_name, user_id, api_user=None):
     if not is_valid_server_name(server_name):
         return jsonify({'error': 'Invalid server name'}), 400
     
-    conn = sqlite3.connect(DB_FILE)
+    conn = get_db_connection()
     c = conn.cursor()
     c.execute('DELETE FROM user_server_permissions WHERE user_id = ? AND server_name = ?', (user_id, server_name))
     conn.commit()
     deleted = c.rowcount
     conn.close()
+    permission_cache.bump()
     
     if deleted == 0:
         return jsonify({'error': 'Permission entry not found'}), 404
@@ -1949,13 +3743,7 @@ def get_server_details(server_name, api_user=None):
     
     # Allow access if user is admin OR has any viewing permission (old or new)
     if not is_admin_user(api_user):
-        permissions = get_user_permissions(api_user.id, server_name)
-        has_any_view_permission = (
-            permissions.get('can_view_logs', False) or 
-            permissions.get('can_view_analytics', False) or
-            permissions.get('can_view', False)
-        )
-        if not has_any_view_permission:
+        if not get_user_permission_mask(api_user.id, server_name) & VIEW_PERMISSION_MASK:
             return jsonify({'error': 'You do not have permission to view this server'}), 403
 
     server_path = os.path.join(SERVERS_DIR, server_name)
@@ -2182,18 +3970,17 @@ def handle_servers(api_user=None):
     if not os.path.exists(SERVERS_DIR):
         return jsonify([])
 
-    for server_name in os.listdir(SERVERS_DIR):
+    server_names = [name for name in os.listdir(SERVERS_DIR) if os.path.isdir(os.path.join(SERVERS_DIR, name))]
+    # Filter servers based on permissions (admins see all), resolved for all servers in one query
+    permission_map = None if is_admin_user(api_user) else resolve_user_permissions(api_user.id, server_names)
+    for server_name in server_names:
         server_path = os.path.join(SERVERS_DIR, server_name)
         if os.path.isdir(server_path):
-            # Filter servers based on permissions (admins see all)
-            if is_admin_user(api_user):
+            if permission_map is None:
                 has_access = True
             else:
-                permissions = get_user_permissions(api_user.id, server_name)
                 # User needs at least one viewing permission to see the server
-                has_access = (permissions.get('can_view_logs', False) or 
-                            permissions.get('can_view_analytics', False) or
-                            permissions.get('can_view', False))
+                has_access = bool(permission_map[server_name] & VIEW_PERMISSION_MASK)
             
             if has_access:
                 properties = get_server_properties(server_path)
@@ -2236,13 +4023,17 @@ def server_action(server_name, action, api_user=None):
         type: string
         description: Bearer token (optional if using session)
     responses:
-      200:
-        description: Action completed successfully
+      202:
+        description: Action queued. Poll status_url for progress and the outcome.
         schema:
           type: object
           properties:
             message:
               type: string
+            job_id:
+              type: string
+            status_url:
+              type: string
       400:
         description: Invalid action specified
       401:
@@ -2251,38 +4042,35 @@ def server_action(server_name, action, api_user=None):
         description: Insufficient permissions for this action
       404:
         description: Server not found
-      500:
-        description: Action failed
     """
     # Check granular permissions based on specific action
     if not is_admin_user(api_user):
-        permissions = get_user_permissions(api_user.id, server_name)
+        permission_mask = get_user_permission_mask(api_user.id, server_name)
         
         if action == 'start':
-            if not (permissions.get('can_start_server', False) or permissions.get('can_start_stop', False)):
+            if not (has_permission(permission_mask, 'can_start_server') or has_permission(permission_mask, 'can_start_stop')):
                 return jsonify({'error': 'You do not have permission to start this server'}), 403
         elif action == 'stop':
-            if not (permissions.get('can_stop_server', False) or permissions.get('can_start_stop', False)):
+            if not (has_permission(permission_mask, 'can_stop_server') or has_permission(permission_mask, 'can_start_stop')):
                 return jsonify({'error': 'You do not have permission to stop this server'}), 403
         elif action == 'restart':
-            if not (permissions.get('can_restart_server', False) or permissions.get('can_start_stop', False)):
+            if not (has_permission(permission_mask, 'can_restart_server') or has_permission(permission_mask, 'can_start_stop')):
                 return jsonify({'error': 'You do not have permission to restart this server'}), 403
         else:
             return jsonify({'error': 'Invalid action specified'}), 400
     
-    if action == 'start':
-        result, status_code = start_server(server_name)
-        return jsonify(result), status_code
-    
-    elif action == 'stop':
-        result, status_code = stop_server(server_name)
-        return jsonify(result), status_code
-        
-    elif action == 'restart':
-        result, status_code = restart_server_logic(server_name)
-        return jsonify(result), status_code
+    if action not in LifecycleJobQueue.ACTIONS:
+        return jsonify({'error': 'Invalid action specified'}), 400
 
-    return jsonify({'error': 'Invalid action specified'}), 400
+    if not os.path.isdir(os.path.join(SERVERS_DIR, server_name)):
+        return jsonify({'error': f"Server '{server_name}' not found"}), 404
+
+    job = lifecycle_jobs.submit(server_name, action, submitted_by=api_user.id)
+    return jsonify({
+        'message': f'{action.capitalize()} of {server_name} has been queued.',
+        'job_id': job['id'],
+        'status_url': f"/api/jobs/{job['id']}"
+    }), 202
 
 
 @app.route('/api/servers/<server_name>/clear-logs', methods=['POST'])
@@ -2420,6 +4208,130 @@ def handle_file_content(server_name, api_user=None):
             return jsonify({"error": f"Could not save file: {e}"}), 500
 
 
+# --- Buffered Server Log Writer ---
+class ServerLogWriter:
+    """
+    Appends panel-generated lines (installer output and the like) to a server's
+    latest.log. Lines are queued and written by a background thread once
+    `flush_bytes` are buffered or `flush_interval` has passed, through a file
+    handle that stays open while output keeps coming. Subscribers get every line
+    as it is written, and the last `history_lines` are kept for late viewers.
+    """
+
+    def __init__(self, server_name, flush_bytes=64 * 1024, flush_interval=0.5, idle_timeout=30, history_lines=500):
+        self.server_name = server_name
+        self.log_file = os.path.join(SERVERS_DIR, server_name, 'logs', 'latest.log')
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.idle_timeout = idle_timeout
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._history = collections.deque(maxlen=history_lines)
+        self._subscribers = set()
+        self._lock = Lock()
+        self._flush_lock = Lock()
+        self._wakeup = Event()
+        self._handle = None
+        self._thread = None
+
+    def write(self, line):
+        line = line.rstrip('\n')
+        with self._lock:
+            self._buffer.append(line + '\n')
+            self._buffered_bytes += len(line) + 1
+            self._history.append(line)
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber.put_nowait(line)
+                except queue.Full:
+                    self._subscribers.discard(subscriber)  # A viewer that stopped reading
+            if self._thread is None:
+                self._thread = Thread(target=self._run, daemon=True)
+                self._thread.start()
+            if self._buffered_bytes >= self.flush_bytes:
+                self._wakeup.set()
+
+    def _run(self):
+        idle_since = time.monotonic()
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self.flush():
+                idle_since = time.monotonic()
+                continue
+            if time.monotonic() - idle_since >= self.idle_timeout:
+                with self._lock:
+                    if self._buffer:
+                        continue
+                    self._thread = None  # The next write starts a new flusher
+                self._close()
+                return
+
+    def flush(self):
+        """Writes out everything buffered so far. Returns False if there was nothing to write."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._buffer, self._buffered_bytes = self._buffer, [], 0
+            if not pending:
+                return False
+            try:
+                if self._handle is None:
+                    os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+                    self._handle = open(self.log_file, 'a', encoding='utf-8')
+                self._handle.write(''.join(pending))
+                self._handle.flush()
+            except OSError as e:
+                print(f"ERROR [{self.server_name}]: Failed to write to {self.log_file}: {e}")
+                self._handle = None
+            return True
+
+    def _close(self):
+        with self._flush_lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+    def subscribe(self, max_backlog=1000):
+        subscriber = queue.Queue(maxsize=max_backlog)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def recent_lines(self):
+        with self._lock:
+            return list(self._history)
+
+class ServerLogWriterPool:
+    """Hands out one shared ServerLogWriter per server."""
+
+    def __init__(self, **writer_options):
+        self.writer_options = writer_options
+        self._writers = {}
+        self._lock = Lock()
+
+    def get(self, server_name):
+        with self._lock:
+            writer = self._writers.get(server_name)
+            if writer is None:
+                writer = self._writers[server_name] = ServerLogWriter(server_name, **self.writer_options)
+            return writer
+
+    def flush_all(self):
+        with self._lock:
+            writers = list(self._writers.values())
+        for writer in writers:
+            writer.flush()
+
+server_log_writers = ServerLogWriterPool(
+    flush_bytes=int(config.get('log_writer_flush_bytes', 64 * 1024)),
+    flush_interval=float(config.get('log_writer_flush_interval', 0.5))
+)
+atexit.register(server_log_writers.flush_all)  # Don't lose the tail of an install when the panel exits
+
 # --- Installation Script API Endpoints ---
 
 def get_install_script_path(server_name):
@@ -2494,15 +4406,13 @@ def run_install_script(server_name, api_user=None):
     
     def run_commands_and_log():
         """
-        Runs installation commands, logging output directly to the server's log file.
+        Runs installation commands, logging output to the server's log file.
         """
-        log_file_path = os.path.join(server_path, 'logs', 'latest.log')
-        os.makedirs(os.path.dirname(log_file_path), exist_ok=True)
+        log_writer = server_log_writers.get(server_name)
 
         def log_to_file(message):
-            """Appends a message to the latest.log file."""
-            with open(log_file_path, 'a', encoding='utf-8') as f:
-                f.write(f"[{time.strftime('%H:%M:%S')}] [Installer] {message}\n")
+            """Queues a message for the latest.log file."""
+            log_writer.write(f"[{time.strftime('%H:%M:%S')}] [Installer] {message}")
             print(f"[{server_name}] {message}")
 
         try:
@@ -2538,6 +4448,8 @@ def run_install_script(server_name, api_user=None):
             log_to_file(error_message)
         except Exception as e:
             log_to_file(f"An unexpected error occurred: {e}")
+        finally:
+            log_writer.flush()
 
     Thread(target=run_commands_and_log, daemon=True).start()
     
@@ -2546,8 +4458,39 @@ def run_install_script(server_name, api_user=None):
 @app.route('/api/servers/<server_name>/install/log', methods=['GET'])
 @api_auth_required
 def get_install_log(server_name, api_user=None):
-    """Retrieves the current installation log for a server."""
-    return jsonify({"log": ["This endpoint is deprecated. Check the main log file."]})
+    """
+    Retrieves the recent installer output for a server. With ?stream=true the
+    lines are pushed as Server-Sent Events while the installer runs.
+    """
+    if not is_valid_server_name(server_name) or not os.path.isdir(os.path.join(SERVERS_DIR, server_name)):
+        return jsonify({"error": "Server not found"}), 404
+    log_writer = server_log_writers.get(server_name)
+    if request.args.get('stream', 'false').lower() != 'true':
+        return jsonify({"log": log_writer.recent_lines()})
+
+    subscriber = log_writer.subscribe()
+    keepalive = float(config.get('log_stream_keepalive', 15))
+
+    def generate():
+        try:
+            yield 'retry: 2000\n\n'
+            while True:
+                try:
+                    lines = [subscriber.get(timeout=keepalive)]
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                while len(lines) < 500:
+                    try:
+                        lines.append(subscriber.get_nowait())
+                    except queue.Empty:
+                        break
+                yield f"event: log\ndata: {json.dumps({'lines': lines})}\n\n"
+        finally:
+            log_writer.unsubscribe(subscriber)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 
 @app.route('/api/servers/<server_name>/status', methods=['GET'])
@@ -2587,40 +4530,77 @@ def get_server_status(server_name, api_user=None):
               description: Maximum players or N/A
             ping:
               type: string
-              description: Server ping or N/A
+              description: Server List Ping latency in ms or N/A
+            motd:
+              type: string
+              description: MOTD reported by the server or N/A
+            version:
+              type: string
+              description: Version name reported by the server or N/A
             cpu_usage:
               type: string
-              description: CPU usage or N/A
+              description: CPU usage in percent (summed over the process tree) or N/A
             memory_usage:
               type: string
-              description: Memory usage or N/A
+              description: Resident memory in MB or N/A
+            threads:
+              type: string
+              description: Thread count of the process tree or N/A
+            open_files:
+              type: string
+              description: Open file handles of the process tree or N/A
+            tps:
+              type: string
+              description: Ticks per second from the server's tps/tick command or N/A
+            mspt:
+              type: string
+              description: Milliseconds per tick or N/A
+            lag_warnings:
+              type: integer
+              description: "Can't keep up!" warnings in the last tick_lag_window seconds
+            last_lag:
+              type: object
+              description: Time, ms and ticks behind of the newest warning, or null
       401:
         description: Authentication required
       404:
         description: Server not found
     """
     if is_server_running(server_name):
+        resources = resource_sampler.get_latest(server_name)
+        ping = server_list_pinger.get_status(server_name)
+        tick_monitor.update(server_name)
+        tick = tick_monitor.get_status(server_name)
         return jsonify({
-            "status": "Running", "players_online": "N/A", "max_players": "N/A",
-            "ping": "N/A", "cpu_usage": "N/A", "memory_usage": "N/A"
+            "status": "Running",
+            "players_online": ping['players_online'] if ping.get('online') else "N/A",
+            "max_players": ping['max_players'] if ping.get('online') else "N/A",
+            "ping": ping['latency'] if ping.get('online') else "N/A",
+            "motd": ping.get('motd', "N/A"),
+            "version": ping.get('version') or "N/A",
+            "cpu_usage": resources['cpu_percent'] if resources else "N/A",
+            "memory_usage": round(resources['rss'] / (1024 * 1024), 1) if resources else "N/A",  # in MB
+            "threads": resources['threads'] if resources else "N/A",
+            "open_files": resources['open_files'] if resources else "N/A",
+            "tps": tick['tps'] if tick['tps'] is not None else "N/A",
+            "mspt": tick['mspt'] if tick['mspt'] is not None else "N/A",
+            "lag_warnings": tick['lag_warnings'],
+            "last_lag": tick['last_lag']
         })
     else:
         return jsonify({
             "status": "Stopped", "players_online": 0, "max_players": 0,
-            "ping": 0, "cpu_usage": 0, "memory_usage": 0
+            "ping": 0, "cpu_usage": 0, "memory_usage": 0,
+            "threads": 0, "open_files": 0,
+            "tps": 0, "mspt": 0, "lag_warnings": 0, "last_lag": None
         })
 
 @app.route('/api/servers/<server_name>/console', methods=['GET', 'POST'])
 @api_require_permission('can_access_console')
 def handle_console(server_name, api_user=None):
     """
-    Handles getting console output and sending commands via screen.
+    Handles getting console output and sending commands via screen or the panel's PTY.
     """
-    screen_session_name = get_screen_session_name(server_name)
-    
-    # On Windows, all screen commands must be prefixed with 'wsl'.
-    base_command = ['wsl'] if sys.platform == "win32" else []
-
     if not is_server_running(server_name):
         # If server is stopped, return a helpful message instead of 404
         return jsonify({"output": ["[Server is stopped. Start the server to see console output.]"], "line_count": 1})
@@ -2629,15 +4609,22 @@ def handle_console(server_name, api_user=None):
         data = request.get_json()
         command = data.get('command')
         if command:
+            if command.strip() == 'stop':
+                supervisor.mark_stopping(server_name)
             try:
-                # Use screen's 'stuff' command to send the command string to the session.
-                full_command = base_command + ['screen', '-S', screen_session_name, '-p', '0', '-X', 'stuff', f"{command}\n"]
-                subprocess.run(full_command, check=True, text=True)
-                return jsonify({"message": "Command sent to server screen session."})
-            except (subprocess.CalledProcessError, FileNotFoundError) as e:
-                return jsonify({"error": f"Failed to send command via screen: {e}"}), 500
+                response = send_console_command(server_name, command)
+                if response is not None:
+                    return jsonify({"message": "Command executed via RCON.", "response": response})
+                return jsonify({"message": "Command sent to server console."})
+            except (subprocess.CalledProcessError, OSError) as e:
+                supervisor.clear_stopping(server_name)
+                return jsonify({"error": f"Failed to send command to server console: {e}"}), 500
         return jsonify({"error": "No command provided"}), 400
 
+    if pty_console.is_managed(server_name):
+        output = pty_console.get_output(server_name, request.args.get('lines', type=int))
+        return jsonify({"output": output, "line_count": len(output)})
+
     # GET request for console output is now deprecated in favor of /log,
     # but we'll keep it for sending the static "how to connect" message.
     return jsonify({
@@ -2648,105 +4635,903 @@ def handle_console(server_name, api_user=None):
         "line_count": 2
     })
 
+def parse_log_cursor(cursor):
+    """Parses an opaque '<inode>:<offset>' log cursor. Returns (None, 0) if it is missing or malformed."""
+    try:
+        inode, offset = cursor.split(':', 1)
+        return int(inode), max(0, int(offset))
+    except (AttributeError, ValueError):
+        return None, 0
+
+def read_log_increment(log_file_path, cursor=None, max_bytes=1024 * 1024, tail_bytes=256 * 1024):
+    """
+    Reads the complete lines written to a log since `cursor`, seeking straight
+    to the byte offset instead of re-reading the file. Without a cursor, only
+    the last `tail_bytes` are returned. A cursor from a rotated (new inode) or
+    truncated (shrunk) file starts over at the beginning of the current file.
+    Returns (lines, next_cursor, reset).
+    """
+    inode, offset = parse_log_cursor(cursor)
+    with open(log_file_path, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        reset = inode is None or inode != stat.st_ino or offset > stat.st_size
+        if reset:
+            offset = max(0, stat.st_size - tail_bytes) if inode is None else 0
+        f.seek(offset)
+        chunk = f.read(min(max_bytes, stat.st_size - offset))
+
+        if reset and offset > 0:
+            # The tail starts mid-line, skip to the first full line.
+            first_newline = chunk.find(b'\n')
+            skipped = first_newline + 1 if first_newline != -1 else len(chunk)
+            chunk = chunk[skipped:]
+            offset += skipped
+
+    # Only hand out complete lines, a partial last line is picked up by the next read.
+    # A single line longer than max_bytes is returned in pieces rather than stalling.
+    last_newline = chunk.rfind(b'\n')
+    if last_newline != -1:
+        chunk = chunk[:last_newline + 1]
+    elif len(chunk) < max_bytes:
+        chunk = b''
+    text = chunk.decode('utf-8', errors='replace')
+    lines = [line + '\n' for line in text.split('\n')[:-1]] if last_newline != -1 else ([text] if text else [])
+    return lines, f"{stat.st_ino}:{offset + len(chunk)}", reset
+
 @app.route('/api/servers/<server_name>/log', methods=['GET'])
 @api_auth_required
 def get_server_log(server_name, api_user=None):
-    """Tails the server's latest.log file."""
-    server_path = os.path.join(SERVERS_DIR, server_name)
-    log_file_path = os.path.join(server_path, 'logs', 'latest.log')
-
-    #if not os.path.exists(log_file_path):
-    #    return jsonify({"lines": ["Log file not found. It will be created when the server starts."], "line_count": 1})
+    """Tails the server's latest.log file from an opaque byte cursor."""
+    if not is_valid_server_name(server_name):
+        return jsonify({"error": "Invalid server name"}), 400
+    log_file_path = os.path.join(SERVERS_DIR, server_name, 'logs', 'latest.log')
 
     try:
-        with open(log_file_path, 'r', encoding='utf-8', errors='replace') as f:
-            lines = f.readlines()
-
-        # Get the line number from which to start reading, default to 0
-        since_line = int(request.args.get('since', 0))
-        
-        # Get new lines since the last request
-        new_lines = lines[since_line:]
-        line_count = len(lines)
-
-        return jsonify({"lines": new_lines, "line_count": line_count})
-        
+        lines, cursor, reset = read_log_increment(
+            log_file_path,
+            request.args.get('cursor'),
+            max_bytes=int(config.get('log_max_read_bytes', 1024 * 1024)),
+            tail_bytes=int(config.get('log_tail_bytes', 256 * 1024))
+        )
+        return jsonify({"lines": lines, "cursor": cursor, "reset": reset})
+    except FileNotFoundError:
+        return jsonify({"lines": [], "cursor": None, "reset": False})
     except Exception as e:
         return jsonify({"error": f"Could not read log file: {e}"}), 500
 
+class LogWatcher:
+    """
+    Follows one server's latest.log with a cheap stat poll and reads new bytes
+    once into a bounded ring buffer of (seq, line) entries that every stream
+    subscriber reads from. A None line marks a rotation/truncation. The epoch
+    makes event ids from an earlier watcher (or panel run) detectable.
+    """
 
-@app.errorhandler(404)
-def not_found_error(error):
-    return jsonify({"error": "API endpoint not found"}), 404
+    def __init__(self, server_name, buffer_lines=2000, interval=0.5):
+        self.server_name = server_name
+        self.log_file = os.path.join(SERVERS_DIR, server_name, 'logs', 'latest.log')
+        self.interval = interval
+        self.epoch = uuid.uuid4().hex[:8]
+        self.subscribers = 0
+        self._entries = collections.deque(maxlen=buffer_lines)
+        self._seq = 0
+        self._condition = Condition()
+        self._stopped = Event()
+
+    def start(self):
+        Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+        with self._condition:
+            self._condition.notify_all()
+
+    def _publish(self, lines, reset):
+        with self._condition:
+            if reset and self._seq:
+                self._seq += 1
+                self._entries.append((self._seq, None))
+            for line in lines:
+                self._seq += 1
+                self._entries.append((self._seq, line))
+            self._condition.notify_all()
 
-# --- Settings and File Browsing API ---
+    def _run(self):
+        cursor = None
+        while not self._stopped.is_set():
+            try:
+                stat = os.stat(self.log_file)
+                if cursor != f"{stat.st_ino}:{stat.st_size}":
+                    lines, cursor, reset = read_log_increment(self.log_file, cursor)
+                    if lines or reset:
+                        self._publish(lines, reset)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"ERROR [{self.server_name}]: Log watcher failed to read {self.log_file}: {e}")
+            self._stopped.wait(self.interval)
 
-@app.route('/api/settings', methods=['GET', 'POST'])
+    def read_since(self, last_seq, timeout):
+        """
+        Waits up to `timeout` for entries newer than last_seq (None for everything
+        buffered). Returns (lines, reset, last_seq). reset means the client must
+        clear its view: the file rotated, or it fell behind the ring buffer.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._seq != (last_seq or 0) or self._stopped.is_set(), timeout)
+            oldest_seq = self._entries[0][0] if self._entries else self._seq + 1
+            reset = last_seq is None or last_seq + 1 < oldest_seq or last_seq > self._seq
+            if reset:
+                last_seq = 0
+            lines = []
+            for seq, line in self._entries:
+                if seq <= last_seq:
+                    continue
+                if line is None:
+                    lines, reset = [], True
+                else:
+                    lines.append(line)
+            return lines, reset, self._seq
+
+class LogStreamHub:
+    """Shares one LogWatcher per server between all of its stream subscribers."""
+
+    def __init__(self, buffer_lines=2000, interval=0.5):
+        self.buffer_lines = buffer_lines
+        self.interval = interval
+        self._watchers = {}  # { server_name: LogWatcher }
+        self._lock = Lock()
+
+    def subscribe(self, server_name):
+        with self._lock:
+            watcher = self._watchers.get(server_name)
+            if watcher is None:
+                watcher = self._watchers[server_name] = LogWatcher(server_name, self.buffer_lines, self.interval)
+                watcher.start()
+            watcher.subscribers += 1
+            return watcher
+
+    def unsubscribe(self, watcher):
+        with self._lock:
+            watcher.subscribers -= 1
+            if watcher.subscribers <= 0 and self._watchers.get(watcher.server_name) is watcher:
+                del self._watchers[watcher.server_name]
+                watcher.stop()
+
+    def stats(self):
+        with self._lock:
+            return {name: watcher.subscribers for name, watcher in self._watchers.items()}
+
+log_stream_hub = LogStreamHub(
+    buffer_lines=int(config.get('log_stream_buffer_lines', 2000)),
+    interval=float(config.get('log_stream_interval', 0.5))
+)
+
+@app.route('/api/servers/<server_name>/log/stream', methods=['GET'])
 @api_auth_required
-def handle_settings(api_user=None):
-    """Handles getting and saving application settings."""
-    global SERVERS_DIR, config
-    if request.method == 'POST':
-        data = request.get_json()
-        new_path = data.get('servers_dir')
-
-        if not new_path or not os.path.isdir(new_path):
-            return jsonify({"error": "Invalid or non-existent directory provided."}), 400
+def stream_server_log(server_name, api_user=None):
+    """Streams new latest.log lines as Server-Sent Events.
+    ---
+    tags:
+      - Servers
+    security:
+      - Bearer: []
+      - Session: []
+    parameters:
+      - name: server_name
+        in: path
+        type: string
+        required: true
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: Id of the last event received, for clients that can't send the Last-Event-ID header
+    responses:
+      200:
+        description: "text/event-stream of 'log' events with {lines, reset} data; reset means the view must be cleared"
+      400:
+        description: Invalid server name
+    """
+    if not is_valid_server_name(server_name):
+        return jsonify({"error": "Invalid server name"}), 400
 
-        # Update config and save
-        config['servers_dir'] = new_path
-        save_config(config)
+    # Browsers resend the id of the last event on reconnect, which lets us resume from the ring buffer.
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('cursor') or ''
+    keepalive = float(config.get('log_stream_keepalive', 15))
+    watcher = log_stream_hub.subscribe(server_name)
 
-        # Update the global variable for the current session
-        SERVERS_DIR = new_path
-        
-        # You might need to restart the app or dynamically reload resources
-        # for this change to be fully effective everywhere.
-        return jsonify({"message": "Settings updated. A restart may be required for all changes to take effect."})
+    def generate():
+        try:
+            epoch, _, seq = last_event_id.partition('-')
+            last_seq = int(seq) if epoch == watcher.epoch and seq.isdigit() else None
+            yield 'retry: 2000\n\n'
+            while True:
+                lines, reset, newest_seq = watcher.read_since(last_seq, keepalive)
+                if newest_seq == last_seq and not reset:
+                    yield ': keepalive\n\n'  # Also how we notice a client that went away
+                    continue
+                last_seq = newest_seq
+                payload = json.dumps({'lines': lines, 'reset': reset})
+                yield f"id: {watcher.epoch}-{last_seq}\nevent: log\ndata: {payload}\n\n"
+        finally:
+            log_stream_hub.unsubscribe(watcher)
 
-    # GET request
-    return jsonify(config)
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
-@app.route('/api/browse', methods=['GET'])
-@api_auth_required
-def browse_files(api_user=None):
-    """An unrestricted file browser API to list directories."""
-    req_path = request.args.get('path')
+# --- Log Search ---
+ROTATED_LOG_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2})-(\d+)\.log\.gz$')
 
-    # If no path is given, show drives on Windows or root on other systems.
-    if not req_path:
-        if sys.platform == "win32":
-            drives = [f"{d}:\\" for d in "ABCDEFGHIJKLMNOPQRSTUVWXYZ" if os.path.exists(f"{d}:")]
-            return jsonify({
-                "current_path": "My Computer",
-                "parent_path": "", # No parent for the drive list
-                "directories": drives
-            })
-        else: # On Linux/macOS, start at the root directory
-            req_path = '/'
+def get_searchable_logs(server_name, since=None, until=None):
+    """
+    Returns the log files covering [since, until] (unix times, None = open), oldest
+    first: Minecraft's own archives (dated by name) and latest.log. The console
+    capture and its segments hold the same lines and are left out.
+    """
+    log_dir = os.path.join(SERVERS_DIR, server_name, 'logs')
+    if not os.path.isdir(log_dir):
+        return []
+    since_day = datetime.fromtimestamp(since).strftime('%Y-%m-%d') if since is not None else None
+    until_day = datetime.fromtimestamp(until).strftime('%Y-%m-%d') if until is not None else None
+    candidates = []
+    for file_name in os.listdir(log_dir):
+        match = ROTATED_LOG_PATTERN.match(file_name)
+        if not match:
+            continue
+        day = match.group(1)
+        # An archive is named after the day its log was started, so it can still hold later lines.
+        if until_day is not None and day > until_day:
+            continue
+        if since_day is not None and day < since_day and os.path.getmtime(os.path.join(log_dir, file_name)) < since:
+            continue
+        day_start = datetime.strptime(day, '%Y-%m-%d').timestamp()
+        candidates.append(((day_start, int(match.group(2))), os.path.join(log_dir, file_name)))
 
-    # Normalize the path to prevent security issues and handle paths correctly
-    current_path = os.path.abspath(req_path)
+    log_files = [path for _, path in sorted(candidates)]
+    latest_log = os.path.join(log_dir, 'latest.log')
+    if os.path.exists(latest_log):
+        log_files.append(latest_log)
+    return log_files
 
-    if not os.path.isdir(current_path):
-        return jsonify({"error": f"Path '{req_path}' is not a valid directory."}), 400
+_log_worker_pool = None
+_log_worker_pool_lock = Lock()
 
-    try:
-        # Determine the parent directory
-        parent_path = os.path.dirname(current_path)
-        # If the parent is the same as the current (e.g., at C:\), we have reached the top of this branch.
-        # On Windows, this means we should go back to the drive list.
-        if parent_path == current_path:
-            parent_path = "" # An empty path will be interpreted by the frontend as the root/drive list
+def _log_worker_context():
+    # Forking the multithreaded panel could hand a worker locks held by other threads.
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
 
-        dirs = []
-        for item in os.listdir(current_path):
+def submit_log_work(fn, *args):
+    """
+    Runs fn(*args), a function from log_workers, on the log worker processes and
+    returns its future. Regex scans and line splitting hold the GIL, so searches
+    and backfills need processes to use more than one core. A pool broken by a
+    worker that died is replaced instead of failing every later submission.
+    """
+    global _log_worker_pool
+    with _log_worker_pool_lock:
+        if _log_worker_pool is not None:
             try:
-                item_path = os.path.join(current_path, item)
-                # Filter out hidden files/folders and system/recycle bin folders on Windows
-                if not item.startswith('.') and not item.lower().startswith('$recycle.bin'):
-                    if os.path.isdir(item_path):
-                        dirs.append(item)
+                return _log_worker_pool.submit(fn, *args)
+            except BrokenProcessPool:
+                print("WARNING: A log worker process died, starting new workers")
+                _log_worker_pool.shutdown(wait=False, cancel_futures=True)
+        workers = int(config.get('log_search_workers', os.cpu_count() or 2))
+        _log_worker_pool = ProcessPoolExecutor(max_workers=workers, mp_context=_log_worker_context())
+        return _log_worker_pool.submit(fn, *args)
+
+@app.route('/api/servers/<server_name>/logs/search', methods=['GET'])
+@api_require_permission('can_view_logs')
+def search_server_logs(server_name, api_user=None):
+    """Search latest.log and all rotated .log.gz archives
+    ---
+    tags:
+      - Servers
+    security:
+      - Bearer: []
+      - Session: []
+    parameters:
+      - name: server_name
+        in: path
+        type: string
+        required: true
+      - name: q
+        in: query
+        type: string
+        required: true
+        description: Text to search for
+      - name: regex
+        in: query
+        type: boolean
+        required: false
+        description: Treat q as a regular expression
+      - name: case_sensitive
+        in: query
+        type: boolean
+        required: false
+      - name: context
+        in: query
+        type: integer
+        required: false
+        description: Lines of context before and after each match (max 10)
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Stop after this many matches
+      - name: from
+        in: query
+        type: number
+        required: false
+        description: Only search files covering times after this unix timestamp
+      - name: to
+        in: query
+        type: number
+        required: false
+        description: Only search files covering times before this unix timestamp
+    responses:
+      200:
+        description: Newline-delimited JSON matches, oldest first ({file, line, text, before, after}), followed by a summary object
+      400:
+        description: Missing query or invalid regular expression
+      404:
+        description: Server not found
+    """
+    if not is_valid_server_name(server_name) or not os.path.isdir(os.path.join(SERVERS_DIR, server_name)):
+        return jsonify({'error': f"Server '{server_name}' not found"}), 404
+
+    query = request.args.get('q', '')
+    if not query:
+        return jsonify({'error': "Query parameter 'q' is required"}), 400
+    use_regex = request.args.get('regex', 'false').lower() == 'true'
+    pattern = query if use_regex else re.escape(query)
+    ignore_case = request.args.get('case_sensitive', 'false').lower() != 'true'
+    try:
+        re.compile(pattern.encode('utf-8'))
+    except re.error as e:
+        return jsonify({'error': f'Invalid regular expression: {e}'}), 400
+    try:
+        max_limit = int(config.get('log_search_max_matches', 5000))
+        limit = min(max(1, int(request.args.get('limit', 500))), max_limit)
+        context = min(max(0, int(request.args.get('context', 0))), 10)
+        since = request.args.get('from', type=float)
+        until = request.args.get('to', type=float)
+    except ValueError:
+        return jsonify({'error': 'limit and context must be integers'}), 400
+
+    log_files = get_searchable_logs(server_name, since, until)
+    futures = [submit_log_work(search_log_file, path, pattern, ignore_case, context, limit) for path in log_files]
+
+    def generate():
+        found = 0
+        files_searched = 0
+        error = None
+        try:
+            # Files are searched in parallel but reported in order, so results stay in time order.
+            for path, future in zip(log_files, futures):
+                try:
+                    matches = future.result()
+                except Exception as e:
+                    print(f"ERROR [{server_name}]: Log search failed for {path}: {e}")
+                    error = f'Failed to search {os.path.basename(path)}: {e}'
+                    continue
+                files_searched += 1
+                for match in matches[:limit - found]:
+                    found += 1
+                    yield json.dumps(match) + '\n'
+                if found >= limit:
+                    break
+        finally:
+            # Early termination: files that haven't been picked up by a worker yet are skipped.
+            for future in futures:
+                future.cancel()
+        summary = {'summary': True, 'matches': found, 'files_searched': files_searched,
+                   'files_total': len(log_files), 'truncated': found >= limit}
+        if error:
+            summary['error'] = error
+        yield json.dumps(summary) + '\n'
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+# --- Console Log Rotation ---
+CONSOLE_CAPTURE_FILE = 'console.log'
+CONSOLE_SEGMENT_DIR = 'console'
+CONSOLE_INDEX_FILE = 'index.json'
+
+class ConsoleLogRotator:
+    """
+    Rotates the console capture (logs/console.log, written by screen -L and
+    nothing else) into gzip segments under logs/console/ once it exceeds a size
+    or age, and keeps an index of each segment's time range, byte offsets in the
+    overall capture and the players online at its end. Readers use the index to
+    open only the segments they need. Minecraft's own logs/latest.log is left to
+    Minecraft, which archives it on every start.
+
+    The capture is renamed, never truncated, and screen is told to reopen its
+    logfile, so lines written in between end up in the renamed file.
+    """
+
+    def __init__(self, max_bytes, max_age, keep_segments, interval=60, enabled=True):
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.keep_segments = keep_segments
+        self.interval = interval
+        self.enabled = enabled
+        self._locks = collections.defaultdict(Lock)
+        self._started = False
+
+    def start(self):
+        if self._started or not self.enabled:
+            return
+        self._started = True
+        Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            if not os.path.isdir(SERVERS_DIR):
+                continue
+            for server_name in os.listdir(SERVERS_DIR):
+                if os.path.isdir(os.path.join(SERVERS_DIR, server_name)):
+                    try:
+                        self.maybe_rotate(server_name)
+                    except Exception as e:
+                        print(f"ERROR [{server_name}]: Console log rotation failed: {e}")
+
+    @staticmethod
+    def _paths(server_name):
+        log_dir = os.path.join(SERVERS_DIR, server_name, 'logs')
+        segment_dir = os.path.join(log_dir, CONSOLE_SEGMENT_DIR)
+        return os.path.join(log_dir, CONSOLE_CAPTURE_FILE), segment_dir, os.path.join(segment_dir, CONSOLE_INDEX_FILE)
+
+    def load_index(self, server_name):
+        index_path = self._paths(server_name)[2]
+        try:
+            with open(index_path, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {'segments': [], 'next_offset': 0, 'current_started_at': None}
+
+    def _save_index(self, server_name, index):
+        index_path = self._paths(server_name)[2]
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        temp_path = index_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(temp_path, index_path)  # Readers never see a half-written index
+
+    def maybe_rotate(self, server_name):
+        log_file = self._paths(server_name)[0]
+        try:
+            size = os.path.getsize(log_file)
+        except OSError:
+            return None
+        index = self.load_index(server_name)
+        if index['current_started_at'] is None:
+            # First time we see this log: its age counts from now.
+            index['current_started_at'] = time.time()
+            self._save_index(server_name, index)
+        too_old = self.max_age > 0 and time.time() - index['current_started_at'] >= self.max_age
+        if size > 0 and ((self.max_bytes > 0 and size >= self.max_bytes) or too_old):
+            return self.rotate(server_name)
+        return None
+
+    @staticmethod
+    def _reopen_screen_log(server_name):
+        """Makes screen close the renamed capture and start a new one under its configured name."""
+        session_name = get_screen_session_name(server_name)
+        base_command = ['wsl'] if sys.platform == "win32" else []
+        for toggle in ('off', 'on'):
+            subprocess.run(base_command + ['screen', '-S', session_name, '-p', '0', '-X', 'log', toggle],
+                           check=True, capture_output=True, text=True)
+
+    def rotate(self, server_name):
+        """
+        Moves the current console capture into a new compressed segment. Returns its
+        index entry, or None if the capture is empty.
+        """
+        log_file, segment_dir, _ = self._paths(server_name)
+        with self._locks[server_name]:
+            if os.path.getsize(log_file) == 0:
+                return None
+            # Servers under a PTY don't have a capture, whatever is left of one is from an earlier run.
+            screen_writes = is_server_running(server_name) and not pty_console.is_managed(server_name)
+
+            index = self.load_index(server_name)
+            rotated_at = time.time()
+            online = set(index['segments'][-1]['online_at_end']) if index['segments'] else set()
+            # The start offset keeps names unique even for several rotations within a second.
+            segment_name = f"console-{datetime.fromtimestamp(rotated_at).strftime('%Y%m%d-%H%M%S')}-{index['next_offset']}.log.gz"
+            os.makedirs(segment_dir, exist_ok=True)
+            segment_path = os.path.join(segment_dir, segment_name)
+            staging_path = os.path.join(segment_dir, f'.{segment_name[:-len(".gz")]}')
+
+            os.rename(log_file, staging_path)
+            if screen_writes:
+                try:
+                    self._reopen_screen_log(server_name)
+                except (OSError, subprocess.SubprocessError) as e:
+                    # Screen still writes the renamed file, so it can simply go back.
+                    os.rename(staging_path, log_file)
+                    raise OSError(f'screen did not reopen its logfile: {e}')
+
+            copied = 0
+            lines = 0
+            pending = b''
+            with open(staging_path, 'rb') as source, gzip.open(segment_path, 'wb', compresslevel=6) as segment:
+                while True:
+                    chunk = source.read(LOG_SEARCH_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    segment.write(chunk)
+                    copied += len(chunk)
+                    lines += chunk.count(b'\n')
+                    # Track joins/leaves so the index knows who was online when the segment ended.
+                    *complete, pending = (pending + chunk).split(b'\n')
+                    for raw_line in complete:
+                        line = raw_line.decode('utf-8', errors='replace')
+                        join_match = PLAYER_JOIN_PATTERN.search(line)
+                        if join_match:
+                            online.add(join_match.group(1))
+                        leave_match = PLAYER_LEAVE_PATTERN.search(line)
+                        if leave_match:
+                            online.discard(leave_match.group(1))
+            os.remove(staging_path)
+
+            if copied == 0:
+                os.remove(segment_path)
+                return None
+            if pending:
+                lines += 1
+
+            entry = {
+                'file': segment_name,
+                'start_time': index['current_started_at'] or rotated_at,
+                'end_time': rotated_at,
+                'start_offset': index['next_offset'],
+                'end_offset': index['next_offset'] + copied,
+                'bytes': copied,
+                'compressed_bytes': os.path.getsize(segment_path),
+                'lines': lines,
+                'online_at_end': sorted(online)
+            }
+            index['segments'].append(entry)
+            index['next_offset'] += copied
+            index['current_started_at'] = rotated_at
+
+            # Compaction: only the newest segments are kept.
+            if self.keep_segments > 0:
+                while len(index['segments']) > self.keep_segments:
+                    expired = index['segments'].pop(0)
+                    try:
+                        os.remove(os.path.join(segment_dir, expired['file']))
+                    except OSError:
+                        pass
+            self._save_index(server_name, index)
+            print(f"DEBUG [{server_name}]: Rotated {copied} bytes of console log into {segment_name}.")
+            return entry
+
+console_log_rotator = ConsoleLogRotator(
+    max_bytes=int(config.get('console_log_max_bytes', 64 * 1024 * 1024)),
+    max_age=float(config.get('console_log_max_age_hours', 24)) * 3600,
+    keep_segments=int(config.get('console_log_keep_segments', 100)),
+    interval=float(config.get('console_log_rotate_interval', 60)),
+    enabled=bool(config.get('console_log_rotation', True))
+)
+
+@app.route('/api/servers/<server_name>/logs/segments', methods=['GET'])
+@api_require_permission('can_view_logs')
+def get_console_log_segments(server_name, api_user=None):
+    """Returns the index of rotated console log segments."""
+    if not is_valid_server_name(server_name) or not os.path.isdir(os.path.join(SERVERS_DIR, server_name)):
+        return jsonify({'error': f"Server '{server_name}' not found"}), 404
+    return jsonify(console_log_rotator.load_index(server_name))
+
+@app.route('/api/servers/<server_name>/logs/rotate', methods=['POST'])
+@api_require_permission('can_edit_config')
+def rotate_console_log(server_name, api_user=None):
+    """Rotates the console log into a compressed segment right away."""
+    if not is_valid_server_name(server_name) or not os.path.isdir(os.path.join(SERVERS_DIR, server_name)):
+        return jsonify({'error': f"Server '{server_name}' not found"}), 404
+    try:
+        entry = console_log_rotator.rotate(server_name)
+    except FileNotFoundError:
+        entry = None
+    except OSError as e:
+        return jsonify({'error': f'Failed to rotate console log: {e}'}), 500
+    if entry is None:
+        return jsonify({'message': 'Console log is empty, nothing to rotate.'})
+    return jsonify({'message': 'Console log rotated.', 'segment': entry})
+
+# --- Log Event Index ---
+LOG_EVENT_INDEX_DIR = '.events'
+
+class LogEventIndex:
+    """
+    Parses log lines once into compact event records (byte offset, timestamp,
+    level, thread, logger, message start) and persists them per log file as a
+    columnar index under logs/.events/<file>/: one typed array file per column
+    plus a meta.json with the string tables and ingestion state. Lines that
+    don't start an event (stack traces, wrapped output) belong to the event
+    before them. Plain logs are indexed incrementally from the last ingested
+    offset; compressed segments and archives are immutable and indexed once.
+    The index format and parsing live in log_workers, so rotated logs can also
+    be indexed on the log worker processes.
+    """
+
+    def __init__(self):
+        self._locks = collections.defaultdict(Lock)
+
+    @staticmethod
+    def _index_dir(server_name, log_name):
+        return os.path.join(SERVERS_DIR, server_name, 'logs', LOG_EVENT_INDEX_DIR, log_name.replace('/', '__'))
+
+    @staticmethod
+    def _anchor(server_name, log_name):
+        """Where the date of a file's first (or last) event comes from, given that lines only carry the time."""
+        archive_match = ROTATED_LOG_PATTERN.match(os.path.basename(log_name))
+        if archive_match:
+            return ('start', datetime.strptime(archive_match.group(1), '%Y-%m-%d').timestamp())
+        if log_name.startswith(CONSOLE_SEGMENT_DIR + '/'):
+            # A segment ends exactly when it was rotated, its start time is only when the panel first saw it.
+            for segment in console_log_rotator.load_index(server_name)['segments']:
+                if segment['file'] == os.path.basename(log_name):
+                    return ('end', segment['end_time'])
+        return None  # The file's mtime
+
+    def update(self, server_name, log_name):
+        """Brings the index of one log file (e.g. 'latest.log', 'console/x.log.gz') up to date. Returns its meta."""
+        log_path = os.path.join(SERVERS_DIR, server_name, 'logs', log_name)
+        with self._locks[(server_name, log_name)]:
+            return update_event_index(log_path, self._index_dir(server_name, log_name), self._anchor(server_name, log_name))
+
+    def events_since(self, server_name, log_name, start_offset=0):
+        """
+        Brings the index up to date and returns (meta, iterator) over the events at or
+        after start_offset as (offset, time, level, thread, message) tuples. The file
+        is read once, sequentially, from the first of those events.
+        """
+        self.update(server_name, log_name)
+        with self._locks[(server_name, log_name)]:
+            meta, columns = load_event_index(self._index_dir(server_name, log_name))
+        log_path = os.path.join(SERVERS_DIR, server_name, 'logs', log_name)
+        return meta, read_events(log_path, meta, columns, start_offset)
+
+    def extract_session_events(self, server_name, log_names, progress=None):
+        """
+        Indexes rotated logs on the log worker processes, in parallel, and returns the
+        session events of each (see log_workers.extract_session_events) by log name.
+        Their index locks are held until all of them are done. progress(files_done)
+        is called as files finish.
+        """
+        locks = [self._locks[(server_name, log_name)] for log_name in log_names]
+        for lock in locks:
+            lock.acquire()
+        try:
+            log_dir = os.path.join(SERVERS_DIR, server_name, 'logs')
+            futures = {submit_log_work(extract_session_events, os.path.join(log_dir, log_name),
+                                       self._index_dir(server_name, log_name), self._anchor(server_name, log_name)): log_name
+                       for log_name in log_names}
+            results = {}
+            try:
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+                    if progress:
+                        progress(len(results))
+            finally:
+                for future in futures:
+                    future.cancel()
+                # The workers may still be writing the indexes of files that failed to cancel.
+                wait(futures)
+            return results
+        finally:
+            for lock in locks:
+                lock.release()
+
+    def query(self, server_name, log_name, levels=None, threads=None, loggers=None, since=None, until=None, limit=200):
+        """Returns the newest `limit` events matching the filters, oldest first, with their text."""
+        meta = self.update(server_name, log_name)
+        with self._locks[(server_name, log_name)]:
+            meta, columns = load_event_index(self._index_dir(server_name, log_name))
+        level_codes = {LOG_LEVEL_CODES[level] for level in levels} if levels else None
+        thread_ids = {i for i, name in enumerate(meta['threads']) if name in threads} if threads else None
+        logger_ids = {i for i, name in enumerate(meta['loggers']) if name in loggers} if loggers else None
+
+        # Filtering only touches the columns, the log text is read for the selected events alone.
+        selected = []
+        offsets, times, levels_column = columns['offset'], columns['time'], columns['level']
+        for i in range(meta['count'] - 1, -1, -1):
+            if len(selected) >= limit:
+                break
+            if level_codes is not None and levels_column[i] not in level_codes:
+                continue
+            if thread_ids is not None and columns['thread'][i] not in thread_ids:
+                continue
+            if logger_ids is not None and columns['logger'][i] not in logger_ids:
+                continue
+            if (since is not None and times[i] < since) or (until is not None and times[i] > until):
+                continue
+            selected.append(i)
+        selected.reverse()
+
+        events = []
+        log_path = os.path.join(SERVERS_DIR, server_name, 'logs', log_name)
+        opener = gzip.open if log_name.endswith('.gz') else open
+        with opener(log_path, 'rb') as f:
+            for i in selected:
+                end = offsets[i + 1] if i + 1 < meta['count'] else meta['ingested_offset']
+                f.seek(offsets[i])
+                raw = f.read(min(end - offsets[i], 64 * 1024)).rstrip(b'\n')
+                events.append({
+                    'offset': offsets[i],
+                    'time': times[i],
+                    'level': LOG_LEVELS[levels_column[i]],
+                    'thread': meta['threads'][columns['thread'][i]],
+                    'logger': meta['loggers'][columns['logger'][i]],
+                    'message': raw[columns['message'][i]:].decode('utf-8', errors='replace'),
+                    'text': raw.decode('utf-8', errors='replace')
+                })
+        return {'events': events, 'indexed_events': meta['count'],
+                'threads': meta['threads'][1:], 'loggers': meta['loggers'][1:]}
+
+log_event_index = LogEventIndex()
+
+@app.route('/api/servers/<server_name>/logs/events', methods=['GET'])
+@api_require_permission('can_view_logs')
+def get_log_events(server_name, api_user=None):
+    """Query the structured log event index
+    ---
+    tags:
+      - Servers
+    security:
+      - Bearer: []
+      - Session: []
+    parameters:
+      - name: server_name
+        in: path
+        type: string
+        required: true
+      - name: file
+        in: query
+        type: string
+        required: false
+        description: Log file relative to logs/ (default latest.log, e.g. console/<segment>.log.gz or 2024-01-01-1.log.gz)
+      - name: level
+        in: query
+        type: string
+        required: false
+        description: Comma-separated levels, e.g. WARN,ERROR
+      - name: thread
+        in: query
+        type: string
+        required: false
+        description: Comma-separated thread names
+      - name: logger
+        in: query
+        type: string
+        required: false
+        description: Comma-separated logger names
+      - name: from
+        in: query
+        type: number
+        required: false
+      - name: to
+        in: query
+        type: number
+        required: false
+      - name: limit
+        in: query
+        type: integer
+        required: false
+    responses:
+      200:
+        description: Matching events (offset, time, level, thread, logger, message, text), oldest first
+      400:
+        description: Invalid filter
+      404:
+        description: Server or log file not found
+    """
+    if not is_valid_server_name(server_name) or not os.path.isdir(os.path.join(SERVERS_DIR, server_name)):
+        return jsonify({'error': f"Server '{server_name}' not found"}), 404
+    log_name = request.args.get('file', 'latest.log')
+    log_dir = os.path.join(SERVERS_DIR, server_name, 'logs')
+    if os.path.join(log_dir, log_name) not in get_searchable_logs(server_name):
+        return jsonify({'error': f"Log file '{log_name}' not found"}), 404
+
+    def split_arg(name):
+        value = request.args.get(name)
+        return [item.strip() for item in value.split(',') if item.strip()] if value else None
+
+    levels = [level.upper() for level in split_arg('level') or []] or None
+    if levels and any(level not in LOG_LEVEL_CODES for level in levels):
+        return jsonify({'error': f"Unknown log level, use one of {', '.join(LOG_LEVELS)}"}), 400
+    try:
+        limit = min(max(1, int(request.args.get('limit', 200))), 5000)
+        since = request.args.get('from', type=float)
+        until = request.args.get('to', type=float)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    try:
+        return jsonify(log_event_index.query(server_name, log_name, levels, split_arg('thread'),
+                                             split_arg('logger'), since, until, limit))
+    except OSError as e:
+        return jsonify({'error': f'Could not index log file: {e}'}), 500
+
+
+@app.errorhandler(404)
+def not_found_error(error):
+    return jsonify({"error": "API endpoint not found"}), 404
+
+# --- Settings and File Browsing API ---
+
+@app.route('/api/settings', methods=['GET', 'POST'])
+@api_auth_required
+def handle_settings(api_user=None):
+    """Handles getting and saving application settings."""
+    global SERVERS_DIR, config
+    if request.method == 'POST':
+        data = request.get_json()
+        new_path = data.get('servers_dir')
+
+        if not new_path or not os.path.isdir(new_path):
+            return jsonify({"error": "Invalid or non-existent directory provided."}), 400
+
+        # Update config and save
+        config['servers_dir'] = new_path
+        save_config(config)
+
+        # Update the global variable for the current session
+        SERVERS_DIR = new_path
+        
+        # You might need to restart the app or dynamically reload resources
+        # for this change to be fully effective everywhere.
+        return jsonify({"message": "Settings updated. A restart may be required for all changes to take effect."})
+
+    # GET request
+    return jsonify(config)
+
+@app.route('/api/browse', methods=['GET'])
+@api_auth_required
+def browse_files(api_user=None):
+    """An unrestricted file browser API to list directories."""
+    req_path = request.args.get('path')
+
+    # If no path is given, show drives on Windows or root on other systems.
+    if not req_path:
+        if sys.platform == "win32":
+            drives = [f"{d}:\\" for d in "ABCDEFGHIJKLMNOPQRSTUVWXYZ" if os.path.exists(f"{d}:")]
+            return jsonify({
+                "current_path": "My Computer",
+                "parent_path": "", # No parent for the drive list
+                "directories": drives
+            })
+        else: # On Linux/macOS, start at the root directory
+            req_path = '/'
+
+    # Normalize the path to prevent security issues and handle paths correctly
+    current_path = os.path.abspath(req_path)
+
+    if not os.path.isdir(current_path):
+        return jsonify({"error": f"Path '{req_path}' is not a valid directory."}), 400
+
+    try:
+        # Determine the parent directory
+        parent_path = os.path.dirname(current_path)
+        # If the parent is the same as the current (e.g., at C:\), we have reached the top of this branch.
+        # On Windows, this means we should go back to the drive list.
+        if parent_path == current_path:
+            parent_path = "" # An empty path will be interpreted by the frontend as the root/drive list
+
+        dirs = []
+        for item in os.listdir(current_path):
+            try:
+                item_path = os.path.join(current_path, item)
+                # Filter out hidden files/folders and system/recycle bin folders on Windows
+                if not item.startswith('.') and not item.lower().startswith('$recycle.bin'):
+                    if os.path.isdir(item_path):
+                        dirs.append(item)
             except OSError:
                 continue # Skip files that can't be accessed
 
@@ -2789,13 +5574,11 @@ def install_java(server_name, api_user=None):
         return jsonify({"error": f"Invalid Java version specified: {java_version}"}), 400
 
     def install_and_log():
-        log_file_path = os.path.join(server_path, 'logs', 'latest.log')
-        os.makedirs(os.path.dirname(log_file_path), exist_ok=True)
+        log_writer = server_log_writers.get(server_name)
         
         def log_to_file(message):
-            """Appends a message to the latest.log file."""
-            with open(log_file_path, 'a', encoding='utf-8') as f:
-                f.write(f"[{time.strftime('%H:%M:%S')}] [Java Installer] {message}\n")
+            """Queues a message for the latest.log file."""
+            log_writer.write(f"[{time.strftime('%H:%M:%S')}] [Java Installer] {message}")
             print(f"[{server_name}] {message}")
 
         java_dir = os.path.join(server_path, 'java')
@@ -2863,6 +5646,8 @@ def install_java(server_name, api_user=None):
             log_to_file(f"Installation failed: {e}")
         except Exception as e:
             log_to_file(f"An unexpected error occurred during Java installation: {e}")
+        finally:
+            log_writer.flush()
 
     Thread(target=install_and_log, daemon=True).start()
     return jsonify({"message": f"Java {java_version} installation started. Check Logs tab for output."})
@@ -2889,6 +5674,10 @@ def delete_server(server_name, api_user=None):
         server_config_path = os.path.join(CONFIGS_DIR, server_name)
         if os.path.isdir(server_config_path):
             shutil.rmtree(server_config_path)
+        delete_analytics(server_name)
+        online_players.forget(server_name)
+        metrics_store.forget(server_name)
+        tick_monitor.forget(server_name)
         return jsonify({"message": f"Server '{server_name}' deleted successfully."}), 200
     except Exception as e:
         return jsonify({"error": f"Failed to delete server directory: {e}"}), 500
@@ -2910,6 +5699,8 @@ def start_server(server_name):
     server_path = os.path.join(SERVERS_DIR, server_name)
     screen_session_name = get_screen_session_name(server_name)
     
+    # Never decide on a cached snapshot when changing the lifecycle state.
+    screen_registry.invalidate()
     if is_server_running(server_name):
         return {'error': 'Server is already running in a screen session'}, 409
 
@@ -2925,10 +5716,17 @@ def start_server(server_name):
         return {'error': 'No commands found in start_script.json. Cannot start server.'}, 400
 
     def start_and_launch():
-        log_file = os.path.join(server_path, 'logs', 'latest.log')
+        # Screen captures the console into its own file: latest.log belongs to Minecraft, which
+        # writes it at its own offset and archives it on start, so only the capture can be rotated.
+        log_file = os.path.join(server_path, 'logs', CONSOLE_CAPTURE_FILE)
         os.makedirs(os.path.dirname(log_file), exist_ok=True)
 
         try:
+            if PtyConsole.is_enabled() and sys.platform != "win32":
+                # The PTY output only goes to the console buffer, there is no capture file.
+                pid = pty_console.launch(server_name, commands, cwd=server_path)
+                print(f"DEBUG [{server_name}]: Server process launched under a PTY (pid {pid}) using start script.")
+                return None
             if sys.platform == "win32":
                 def to_wsl_path(win_path):
                     path = win_path.replace('\\', '/')
@@ -2942,69 +5740,94 @@ def start_server(server_name):
                 all_commands = [f"cd '{wsl_server_path}'"] + commands
                 final_command = " && ".join(all_commands)
                 
+                # '-Dm' starts detached without forking, so the supervisor owns the screen process.
                 launch_command = [
-                    'wsl', 'screen', '-L', '-Logfile', wsl_log_path, '-S', screen_session_name, '-dm', 'bash', '-c', final_command
+                    'wsl', 'screen', '-L', '-Logfile', wsl_log_path, '-S', screen_session_name, '-Dm', 'bash', '-c', final_command
                 ]
-                subprocess.run(launch_command, check=True)
+                pid = supervisor.launch(server_name, launch_command)
             else: # Linux/macOS
                 final_command = " && ".join(commands)
                 
                 launch_command = [
-                    'screen', '-L', '-Logfile', log_file, '-S', screen_session_name, '-dm',
+                    'screen', '-L', '-Logfile', log_file, '-S', screen_session_name, '-Dm',
                     'bash', '-c', final_command
                 ]
-                subprocess.run(launch_command, cwd=server_path, check=True)
+                pid = supervisor.launch(server_name, launch_command, cwd=server_path)
 
-            print(f"DEBUG [{server_name}]: Server process launched in screen '{screen_session_name}' using start script.")
+            screen_registry.invalidate()
+            print(f"DEBUG [{server_name}]: Server process launched in screen '{screen_session_name}' (pid {pid}) using start script.")
+            return None
 
-        except (subprocess.CalledProcessError, FileNotFoundError) as e:
+        except (OSError, subprocess.SubprocessError) as e:
             print(f"FATAL [{server_name}]: Failed to launch screen session: {e}")
+            return f"Failed to launch screen session: {e}"
         except Exception as e:
-            print(f"FATAL [{server_name}]: An uncaught exception occurred in startup thread: {e}")
-            
-    Thread(target=start_and_launch, daemon=True).start()
+            print(f"FATAL [{server_name}]: An uncaught exception occurred while launching: {e}")
+            return f"Failed to launch server: {e}"
+
+    # Launching is a non-blocking Popen, so it runs inline: once we return, the
+    # supervisor already tracks the session and a queued follow-up job sees it.
+    launch_error = start_and_launch()
+    if launch_error:
+        return {'error': launch_error}, 500
     return {'message': f'Server {server_name} is starting using commands from start script.'}, 200
 
+def wait_for_server_exit(server_name, timeout):
+    """Waits for a server to exit. Returns True if it is gone before the timeout."""
+    if supervisor.is_alive(server_name) is not None:
+        return supervisor.wait_for_exit(server_name, timeout)
+    # Sessions that can't be supervised (e.g. inside WSL) fall back to polling screen.
+    deadline = time.monotonic() + timeout
+    while True:
+        screen_registry.invalidate()
+        if not screen_registry.is_running(server_name):
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(1)
+
 def stop_server(server_name):
     """Stops the server by sending the 'stop' command and waiting for it to terminate."""
     screen_session_name = get_screen_session_name(server_name)
+    screen_registry.invalidate()
     if not is_server_running(server_name):
         return {'error': 'Server is not running'}, 409
 
     base_command = ['wsl'] if sys.platform == "win32" else []
-    full_command = base_command + ['screen', '-S', screen_session_name, '-p', '0', '-X', 'stuff', 'stop\n']
 
     try:
         # Send the stop command
-        print(f"DEBUG [{server_name}]: Sending 'stop' command to screen session.")
-        subprocess.run(full_command, check=True, capture_output=True, text=True)
-
-        # Poll for up to 30 seconds for the screen session to terminate
-        for i in range(30):
-            if not is_server_running(server_name):
-                print(f"DEBUG [{server_name}]: Screen session terminated gracefully after {i+1} seconds.")
-                return {'message': 'Server stopped successfully.'}, 200
-            time.sleep(1)
-
-        # If the loop finishes, the server did not stop in time.
-        print(f"WARN [{server_name}]: Server did not stop within 30 seconds. Force-quitting screen.")
-        quit_command = base_command + ['screen', '-S', screen_session_name, '-X', 'quit']
-        subprocess.run(quit_command, check=False) # Use check=False as it might already be gone
+        print(f"DEBUG [{server_name}]: Sending 'stop' command to server console.")
+        supervisor.mark_stopping(server_name)
+        stop_requested_at = time.monotonic()
+        send_console_command(server_name, 'stop')
+
+        # Wait up to 30 seconds for the exit event of the server process
+        if wait_for_server_exit(server_name, 30):
+            print(f"DEBUG [{server_name}]: Server terminated gracefully after {time.monotonic() - stop_requested_at:.1f} seconds.")
+            return {'message': 'Server stopped successfully.'}, 200
+
+        # If the wait times out, the server did not stop in time.
+        print(f"WARN [{server_name}]: Server did not stop within 30 seconds. Force-quitting.")
+        if not pty_console.kill(server_name):
+            quit_command = base_command + ['screen', '-S', screen_session_name, '-X', 'quit']
+            subprocess.run(quit_command, check=False) # Use check=False as it might already be gone
         
         # Give it a moment to disappear after quitting
-        time.sleep(2)
-        if is_server_running(server_name):
+        if not wait_for_server_exit(server_name, 5):
             return {'error': 'Failed to stop or force-quit the server screen.'}, 500
 
         return {'message': 'Server was unresponsive and has been force-quit.'}, 200
 
-    except (subprocess.CalledProcessError, FileNotFoundError) as e:
-        error_message = f"Failed to send stop command via screen: {e}"
+    except (subprocess.CalledProcessError, OSError) as e:
+        supervisor.clear_stopping(server_name)
+        error_message = f"Failed to send stop command to server console: {e}"
         if hasattr(e, 'stderr') and "No screen session found" in str(e.stderr):
             return {'error': 'Server is not running'}, 409
         print(f"ERROR [{server_name}]: {error_message} - Stderr: {e.stderr if hasattr(e, 'stderr') else 'N/A'}")
         return {'error': error_message}, 500
     except Exception as e:
+        supervisor.clear_stopping(server_name)
         print(f"ERROR [{server_name}]: An unexpected error occurred while trying to stop the server: {e}")
         return {'error': f'Failed to stop server: {e}'}, 500
 
@@ -3119,12 +5942,28 @@ def list_screens(api_user=None):
             return jsonify([]) # Return an empty list if no screens are running
         return jsonify({'error': f"Failed to list screens: {e.stderr}"}), 500
 
+@app.route('/api/screens/registry', methods=['GET'])
+@api_auth_required
+def get_screen_registry_stats(api_user=None):
+    """Reports how many screen snapshots were taken and how many lookups they served."""
+    return jsonify(screen_registry.stats())
+
+@app.route('/api/supervisor/states', methods=['GET'])
+@api_require_admin
+def get_supervisor_states(api_user=None):
+    """Returns the lifecycle state table (Running/Stopping/Stopped/Crashed) of all supervised servers."""
+    return jsonify(supervisor.get_all_states())
+
 @app.route('/api/screens/terminate-all', methods=['POST'])
 @api_auth_required
 def terminate_all_screens(api_user=None):
     try:
         # This command gracefully terminates all screen sessions
+        for server_name in supervisor.get_all_states():
+            supervisor.mark_stopping(server_name)
+        pty_console.kill_all()
         subprocess.run(['pkill', 'screen'], check=True)
+        screen_registry.invalidate()
         return jsonify({'message': 'All screen sessions terminated.'})
     except FileNotFoundError:
         return jsonify({'error': 'pkill command not found. Is pkill installed?'}), 500
@@ -3672,20 +6511,16 @@ TASK_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sch
 def execute_task(server_name, action, command=None):
     """The function executed by the scheduler for a given task."""
     print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] Executing scheduled task for server '{server_name}': Action='{action}'")
-    if action == 'start':
-        start_server(server_name)
-    elif action == 'stop':
-        stop_server(server_name)
-    elif action == 'restart':
-        restart_server_logic(server_name)
+    if action in LifecycleJobQueue.ACTIONS:
+        # Goes through the per-server queue so it can't race with clicks in the UI.
+        lifecycle_jobs.submit(server_name, action)
     elif action == 'command' and command:
-        screen_session_name = get_screen_session_name(server_name)
-        base_command = ['wsl'] if sys.platform == "win32" else []
         if is_server_running(server_name):
+            if command.strip() == 'stop':
+                supervisor.mark_stopping(server_name)
             try:
-                full_command = base_command + ['screen', '-S', screen_session_name, '-p', '0', '-X', 'stuff', f"{command}\n"]
-                subprocess.run(full_command, check=True, text=True)
-                print(f"Successfully sent command '{command}' to '{server_name}'")
+                response = send_console_command(server_name, command)
+                print(f"Successfully sent command '{command}' to '{server_name}'" + (f": {response}" if response else ""))
             except Exception as e:
                 print(f"Failed to send scheduled command '{command}' to '{server_name}': {e}")
         else:
@@ -3843,18 +6678,25 @@ def initialize_app():
     task_manager.schedule_all_tasks()
     if not scheduler.running:
         scheduler.start()
+    pty_console.reattach_all()
+    resource_sampler.start()
+    tick_monitor.start()
+    console_log_rotator.start()
 
-def restart_server_logic(server_name):
+def restart_server_logic(server_name, progress=None):
     """A blocking function that attempts to stop and then start a server."""
+    if progress:
+        progress('Stopping server')
     stop_result, stop_status = stop_server(server_name)
     # Check if stop was successful or if the server was already stopped.
     if stop_status not in [200, 409]:
         print(f"ERROR [{server_name}]: Could not stop server before restart: {stop_result.get('error')}")
         return {'error': f"Could not stop server before restart: {stop_result.get('error')}"}, 500
     
-    # Wait a moment for resources to free up before starting again.
-    time.sleep(2) 
-    
+    # stop_server only returns once the exit event fired, so the port and world
+    # locks are already released and we can start again right away.
+    if progress:
+        progress('Starting server')
     start_result, start_status = start_server(server_name)
     if start_status != 200:
         print(f"ERROR [{server_name}]: Server stopped but failed to start again: {start_result.get('error')}")
@@ -3862,6 +6704,396 @@ def restart_server_logic(server_name):
 
     return {'message': f'Server {server_name} is restarting.'}, 200
 
+# --- Lifecycle Job Queue ---
+JOB_STATE_QUEUED = 'queued'
+JOB_STATE_RUNNING = 'running'
+JOB_STATE_SUCCEEDED = 'succeeded'
+JOB_STATE_FAILED = 'failed'
+
+class LifecycleJobQueue:
+    """
+    Runs start/stop/restart as jobs on a bounded worker pool. Every server has
+    its own ordered queue that is drained by at most one worker at a time, so
+    concurrent clicks on the same server run one after another instead of racing.
+    """
+    ACTIONS = ('start', 'stop', 'restart')
+
+    def __init__(self, max_workers=4, history_size=500):
+        self.history_size = history_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='lifecycle')
+        self._lock = Lock()
+        self._jobs = collections.OrderedDict()  # { job_id: job }
+        self._done_events = {}  # { job_id: Event }
+        self._server_queues = {}  # { 'server_name': deque([job_id, ...]) }
+        self._active_servers = set()
+
+    def submit(self, server_name, action, submitted_by=None):
+        job = {
+            'id': str(uuid.uuid4()),
+            'server_name': server_name,
+            'action': action,
+            'state': JOB_STATE_QUEUED,
+            'progress': 'Queued',
+            'result': None,
+            'status_code': None,
+            'submitted_by': submitted_by,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None
+        }
+        with self._lock:
+            self._jobs[job['id']] = job
+            self._done_events[job['id']] = Event()
+            self._prune()
+            self._server_queues.setdefault(server_name, collections.deque()).append(job['id'])
+            if server_name not in self._active_servers:
+                self._active_servers.add(server_name)
+                self._executor.submit(self._drain, server_name)
+        return dict(job)
+
+    def _prune(self):
+        # Drop the oldest finished jobs once the history is full.
+        overflow = len(self._jobs) - self.history_size
+        for job_id in list(self._jobs):
+            if overflow <= 0:
+                break
+            if self._jobs[job_id]['state'] in (JOB_STATE_SUCCEEDED, JOB_STATE_FAILED):
+                del self._jobs[job_id]
+                self._done_events.pop(job_id, None)
+                overflow -= 1
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job.update(fields)
+
+    def _drain(self, server_name):
+        while True:
+            with self._lock:
+                pending = self._server_queues.get(server_name)
+                if not pending:
+                    self._server_queues.pop(server_name, None)
+                    self._active_servers.discard(server_name)
+                    return
+                job_id = pending.popleft()
+                action = self._jobs[job_id]['action'] if job_id in self._jobs else None
+            if action:
+                self._run(job_id, server_name, action)
+
+    def _run(self, job_id, server_name, action):
+        self._update(job_id, state=JOB_STATE_RUNNING, started_at=time.time(), progress=f'Running {action}')
+        progress = lambda message: self._update(job_id, progress=message)
+        try:
+            if action == 'start':
+                result, status_code = start_server(server_name)
+            elif action == 'stop':
+                progress('Waiting for the server to exit')
+                result, status_code = stop_server(server_name)
+            else:
+                result, status_code = restart_server_logic(server_name, progress=progress)
+        except Exception as e:
+            print(f"ERROR [{server_name}]: Lifecycle job {job_id} ({action}) failed: {e}")
+            result, status_code = {'error': f'Failed to {action} server: {e}'}, 500
+        succeeded = 200 <= status_code < 300
+        self._update(
+            job_id,
+            state=JOB_STATE_SUCCEEDED if succeeded else JOB_STATE_FAILED,
+            progress='Done' if succeeded else 'Failed',
+            result=result,
+            status_code=status_code,
+            finished_at=time.time()
+        )
+        with self._lock:
+            done_event = self._done_events.get(job_id)
+        if done_event:
+            done_event.set()
+
+    def get_job(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def wait_for_job(self, job_id, timeout=None):
+        """
+        Blocks until a job has finished and returns it (or its current state on
+        timeout). Returns None if the job had already been pruned from the history.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            done_event = self._done_events.get(job_id)
+        if job is None:
+            return None
+        if done_event:
+            done_event.wait(timeout)
+        # Held from before the wait, so the outcome survives the job being pruned meanwhile.
+        with self._lock:
+            return dict(job)
+
+lifecycle_jobs = LifecycleJobQueue(
+    max_workers=int(config.get('lifecycle_workers', 4)),
+    history_size=int(config.get('lifecycle_job_history', 500))
+)
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@api_auth_required
+def get_job_status(job_id, api_user=None):
+    """Get Lifecycle Job Status
+    ---
+    tags:
+      - Servers
+    security:
+      - Bearer: []
+      - Session: []
+    parameters:
+      - name: job_id
+        in: path
+        type: string
+        required: true
+        description: Job id returned by a start/stop/restart or analytics backfill request
+    responses:
+      200:
+        description: Job state, progress and (once finished) its outcome
+        schema:
+          type: object
+          properties:
+            id:
+              type: string
+            server_name:
+              type: string
+            action:
+              type: string
+            state:
+              type: string
+              enum: [queued, running, succeeded, failed]
+            progress:
+              type: string
+            result:
+              type: object
+            status_code:
+              type: integer
+      404:
+        description: Job not found
+    """
+    job = lifecycle_jobs.get_job(job_id) or analytics_backfill.get_job(job_id)
+    if not job or (not is_admin_user(api_user) and job['submitted_by'] != api_user.id):
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job), 200
+
+# --- Bulk Server Actions ---
+SERVER_READY_PATTERN = re.compile(r'Done \([\d.,]+s\)!')
+
+def get_log_position(server_name):
+    """Returns (inode, size) of the server's latest.log, or (None, 0) if it doesn't exist."""
+    try:
+        stat = os.stat(os.path.join(SERVERS_DIR, server_name, 'logs', 'latest.log'))
+        return stat.st_ino, stat.st_size
+    except OSError:
+        return None, 0
+
+def wait_for_server_ready(server_name, timeout, log_position=(None, 0)):
+    """
+    Waits until the server logs its 'Done (X.XXXs)!' line after log_position.
+    Returns False on timeout or if the server exits first.
+    """
+    log_file = os.path.join(SERVERS_DIR, server_name, 'logs', 'latest.log')
+    inode, position = log_position
+    pending = ''
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if supervisor.is_alive(server_name) is False:
+            return False
+        try:
+            stat = os.stat(log_file)
+            # Minecraft rotates latest.log on startup, so start over on a new or shrunken file.
+            if stat.st_ino != inode or stat.st_size < position:
+                inode, position, pending = stat.st_ino, 0, ''
+            if stat.st_size > position:
+                with open(log_file, 'rb') as f:
+                    f.seek(position)
+                    chunk = f.read(stat.st_size - position)
+                position += len(chunk)
+                pending += chunk.decode('utf-8', errors='replace')
+                if SERVER_READY_PATTERN.search(pending):
+                    return True
+                pending = pending.rsplit('\n', 1)[-1]  # Keep a partial last line for the next read
+        except OSError:
+            pass
+        time.sleep(0.5)
+    return False
+
+def select_servers(selector):
+    """Resolves a bulk selector ('all', 'running', 'stopped' or a glob like 'lobby-*') to server names."""
+    if not os.path.isdir(SERVERS_DIR):
+        return []
+    server_names = sorted(name for name in os.listdir(SERVERS_DIR) if os.path.isdir(os.path.join(SERVERS_DIR, name)))
+    if selector == 'all':
+        return server_names
+    if selector == 'running':
+        return [name for name in server_names if is_server_running(name)]
+    if selector == 'stopped':
+        return [name for name in server_names if not is_server_running(name)]
+    return [name for name in server_names if fnmatch.fnmatchcase(name, selector)]
+
+def run_bulk_action(server_names, action, concurrency, stagger, wait_for_done, done_timeout, submitted_by, emit):
+    """
+    Runs an action over many servers in batches of `concurrency`, waiting `stagger`
+    seconds between launches. With wait_for_done, a batch must log 'Done' before
+    the next one is launched, so world loading never pins every core at once.
+    """
+    first_launch = True
+    for batch_start in range(0, len(server_names), concurrency):
+        batch = []
+        for server_name in server_names[batch_start:batch_start + concurrency]:
+            if not first_launch and stagger > 0:
+                time.sleep(stagger)
+            first_launch = False
+            log_position = get_log_position(server_name)
+            job = lifecycle_jobs.submit(server_name, action, submitted_by=submitted_by)
+            batch.append((server_name, job['id'], log_position))
+
+        for server_name, job_id, log_position in batch:
+            job = lifecycle_jobs.wait_for_job(job_id)
+            if job is None:
+                # Finished and pruned from the job history while earlier servers were awaited.
+                emit({'server': server_name, 'action': action, 'job_id': job_id, 'state': JOB_STATE_FAILED,
+                      'status_code': None, 'result': {'error': 'Job outcome is no longer available'}})
+                continue
+            outcome = {
+                'server': server_name,
+                'action': action,
+                'job_id': job_id,
+                'state': job['state'],
+                'status_code': job['status_code'],
+                'result': job['result']
+            }
+            if wait_for_done and action in ('start', 'restart') and job['state'] == JOB_STATE_SUCCEEDED:
+                outcome['ready'] = wait_for_server_ready(server_name, done_timeout, log_position)
+            emit(outcome)
+
+@app.route('/api/servers/bulk-action', methods=['POST'])
+@api_auth_required
+def bulk_server_action(api_user=None):
+    """Start, Stop, or Restart Many Servers
+    ---
+    tags:
+      - Servers
+    security:
+      - Bearer: []
+      - Session: []
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          required:
+            - action
+          properties:
+            action:
+              type: string
+              enum: [start, stop, restart]
+            servers:
+              type: array
+              items:
+                type: string
+              description: Explicit list of server names (takes precedence over selector)
+            selector:
+              type: string
+              description: all, running, stopped or a glob such as lobby-*
+            concurrency:
+              type: integer
+              description: Servers per batch
+            stagger:
+              type: number
+              description: Seconds to wait between launches
+            wait_for_done:
+              type: boolean
+              description: Wait until a batch logs 'Done' before launching the next one
+            done_timeout:
+              type: number
+              description: Seconds to wait for 'Done' per server
+    responses:
+      200:
+        description: Newline-delimited JSON, one object per server as it finishes, followed by a summary object
+      400:
+        description: Invalid action or parameters
+    """
+    data = request.get_json() or {}
+    action = data.get('action')
+    if action not in LifecycleJobQueue.ACTIONS:
+        return jsonify({'error': 'Invalid action specified'}), 400
+
+    if data.get('servers') is not None:
+        if not isinstance(data['servers'], list):
+            return jsonify({'error': "'servers' must be a list of server names"}), 400
+        requested = list(dict.fromkeys(data['servers']))  # De-duplicate, keep order
+    elif data.get('selector'):
+        requested = select_servers(str(data['selector']))
+    else:
+        return jsonify({'error': "Provide either 'servers' or 'selector'"}), 400
+
+    try:
+        concurrency = max(1, int(data.get('concurrency', config.get('bulk_concurrency', 2))))
+        stagger = max(0.0, float(data.get('stagger', config.get('bulk_stagger', 5))))
+        done_timeout = max(1.0, float(data.get('done_timeout', config.get('bulk_done_timeout', 300))))
+    except (ValueError, TypeError):
+        return jsonify({'error': 'concurrency, stagger and done_timeout must be numbers'}), 400
+    wait_for_done = bool(data.get('wait_for_done', False))
+
+    permission_keys = {'start': 'can_start_server', 'stop': 'can_stop_server', 'restart': 'can_restart_server'}
+    permission_map = None if is_admin_user(api_user) else resolve_user_permissions(
+        api_user.id, [name for name in requested if isinstance(name, str)])
+    rejected = []
+    server_names = []
+    for server_name in requested:
+        if not isinstance(server_name, str) or not is_valid_server_name(server_name) \
+                or not os.path.isdir(os.path.join(SERVERS_DIR, server_name)):
+            rejected.append({'server': server_name, 'action': action, 'state': JOB_STATE_FAILED,
+                             'status_code': 404, 'result': {'error': 'Server not found'}})
+            continue
+        if permission_map is not None:
+            permission_mask = permission_map[server_name]
+            if not (has_permission(permission_mask, permission_keys[action]) or has_permission(permission_mask, 'can_start_stop')):
+                rejected.append({'server': server_name, 'action': action, 'state': JOB_STATE_FAILED,
+                                 'status_code': 403, 'result': {'error': f'You do not have permission to {action} this server'}})
+                continue
+        server_names.append(server_name)
+
+    results = queue.Queue()
+    finished = object()
+    submitted_by = api_user.id  # current_user is request-bound, resolve it before leaving the request
+
+    def run():
+        try:
+            run_bulk_action(server_names, action, concurrency, stagger, wait_for_done, done_timeout,
+                            submitted_by, results.put)
+        except Exception as e:
+            print(f"ERROR: Bulk {action} failed: {e}")
+            results.put({'error': f'Bulk {action} failed: {e}'})
+        finally:
+            results.put(finished)
+
+    # The batch keeps running even if the client disconnects from the stream.
+    Thread(target=run, daemon=True).start()
+
+    def generate():
+        counts = {JOB_STATE_SUCCEEDED: 0, JOB_STATE_FAILED: 0}
+        for outcome in rejected:
+            counts[JOB_STATE_FAILED] += 1
+            yield json.dumps(outcome) + '\n'
+        while True:
+            outcome = results.get()
+            if outcome is finished:
+                break
+            if outcome.get('state') in counts:
+                counts[outcome['state']] += 1
+            yield json.dumps(outcome) + '\n'
+        yield json.dumps({'summary': True, 'action': action, 'total': len(requested),
+                          'succeeded': counts[JOB_STATE_SUCCEEDED], 'failed': counts[JOB_STATE_FAILED]}) + '\n'
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
 # --- Player Management (Whitelist & Operators) ---
 
 def get_player_whitelist_path(server_name):
@@ -4064,117 +7296,515 @@ def remove_operator(server_name, player_uuid, api_user=None):
 # --- Player Session Analytics ---
 
 ANALYTICS_FILE = 'player_analytics.json'
+PLAYER_JOIN_PATTERN = re.compile(r'\[.*?\]: (.*?) joined the game')
+PLAYER_LEAVE_PATTERN = re.compile(r'\[.*?\]: (.*?) left the game')
 
 def get_analytics_path(server_name):
-    """Returns the path to player analytics file."""
+    """Returns the path to the legacy player analytics file."""
     server_config_dir = get_server_config_dir(server_name)
     return os.path.join(server_config_dir, ANALYTICS_FILE)
 
-def load_analytics(server_name):
-    """Loads player analytics data."""
+def new_analytics_batch(state):
+    """Returns an empty ingest batch carrying over the stored checkpoint and open sessions."""
+    return {
+        'players': {},
+        'sessions': [],
+        'open_sessions': dict(state['open_sessions']),
+        'last_event_time': state['last_event_time'],
+        'first_event_time': state['first_event_time'],
+        'checkpoint': dict(state['checkpoint'])
+    }
+
+def import_legacy_analytics(conn, server_name):
+    """
+    Moves a player_analytics.json from before the database store into the analytics
+    tables. Files without a checkpoint were counted from refresh times and are dropped,
+    the log is re-ingested instead. Returns the imported state or None.
+    """
     path = get_analytics_path(server_name)
     if not os.path.exists(path):
-        return {'players': {}, 'sessions': []}
+        return None
     try:
         with open(path, 'r') as f:
-            return json.load(f)
+            legacy = json.load(f)
     except (json.JSONDecodeError, IOError):
-        return {'players': {}, 'sessions': []}
+        legacy = {}
+
+    state = None
+    if 'checkpoint' in legacy:
+        batch = new_analytics_batch({
+            'open_sessions': legacy.get('open_sessions', {}),
+            'last_event_time': legacy.get('last_event_time'),
+            'first_event_time': min((session['join_time'] for session in legacy.get('sessions', [])), default=None),
+            'checkpoint': legacy['checkpoint']
+        })
+        batch['players'] = legacy.get('players', {})
+        batch['sessions'] = legacy.get('sessions', [])
+        save_analytics(conn, server_name, batch)
+        state = batch
+    os.replace(path, path + '.bak')
+    return state
+
+def load_analytics_state(conn, server_name):
+    """Loads the ingest checkpoint and open sessions for a server."""
+    row = conn.execute('''
+        SELECT checkpoint_inode, checkpoint_offset, last_event_time, open_sessions, first_event_time
+        FROM analytics_state WHERE server_name = ?
+    ''', (server_name,)).fetchone()
+    if row is None:
+        state = import_legacy_analytics(conn, server_name)
+        if state is not None:
+            return state
+        return {'checkpoint': {'inode': None, 'offset': 0}, 'open_sessions': {},
+                'last_event_time': None, 'first_event_time': None}
+    return {
+        'checkpoint': {'inode': row[0], 'offset': row[1]},
+        'last_event_time': row[2],
+        'open_sessions': json.loads(row[3]),
+        'first_event_time': row[4]
+    }
 
-def save_analytics(server_name, analytics_data):
-    """Saves player analytics data."""
-    path = get_analytics_path(server_name)
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, 'w') as f:
-        json.dump(analytics_data, f, indent=2)
+def save_analytics(conn, server_name, batch, save_state=True):
+    """
+    Writes an ingest batch: appends its closed sessions, adds its per-player
+    deltas to the player totals and (unless save_state is False) stores the new
+    checkpoint. The caller commits.
+    """
+    conn.executemany('''
+        INSERT INTO analytics_sessions (server_name, player, join_time, leave_time, duration)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [(server_name, session['player'], session['join_time'], session['leave_time'], session['duration'])
+          for session in batch['sessions']])
+    add_session_occupancy(conn, server_name, [(session['join_time'], session['leave_time']) for session in batch['sessions']])
+    conn.executemany('''
+        INSERT INTO analytics_players (server_name, player, first_join, last_join, total_playtime, join_count)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(server_name, player) DO UPDATE SET
+            first_join = MIN(first_join, excluded.first_join),
+            last_join = MAX(last_join, excluded.last_join),
+            total_playtime = total_playtime + excluded.total_playtime,
+            join_count = join_count + excluded.join_count
+    ''', [(server_name, player_name, data['first_join'], data['last_join'], data['total_playtime'], data['join_count'])
+          for player_name, data in batch['players'].items()])
+    if not save_state:
+        return
+    conn.execute('''
+        INSERT INTO analytics_state (server_name, checkpoint_inode, checkpoint_offset, last_event_time, open_sessions, first_event_time)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(server_name) DO UPDATE SET
+            checkpoint_inode = excluded.checkpoint_inode,
+            checkpoint_offset = excluded.checkpoint_offset,
+            last_event_time = excluded.last_event_time,
+            open_sessions = excluded.open_sessions,
+            first_event_time = excluded.first_event_time
+    ''', (server_name, batch['checkpoint']['inode'], batch['checkpoint']['offset'],
+          batch['last_event_time'], json.dumps(batch['open_sessions']), batch['first_event_time']))
+
+def add_session_occupancy(conn, server_name, sessions):
+    """
+    Adds closed (join_time, leave_time) sessions to the hourly occupancy rollup:
+    every minute a player was online in counts them once, and the hour's
+    player-seconds grow by the exact overlap. Only the touched hours are read
+    and rewritten. The caller commits.
+    """
+    hours = {}  # { hour_start: [minutes array, player_seconds] }
+    for join_time, leave_time in sessions:
+        join_time, leave_time = int(join_time), int(leave_time)
+        if leave_time <= join_time:
+            continue
+        for hour_start in range(join_time - join_time % 3600, leave_time, 3600):
+            start = max(join_time, hour_start)
+            end = min(leave_time, hour_start + 3600)
+            hour = hours.get(hour_start)
+            if hour is None:
+                hour = hours[hour_start] = [array.array('H', bytes(120)), 0]
+            minutes = hour[0]
+            for minute in range((start - hour_start) // 60, (end - hour_start + 59) // 60):
+                minutes[minute] += 1
+            hour[1] += end - start
+    if not hours:
+        return
 
-def parse_log_for_sessions(server_name):
-    """Parse server logs to extract player join/leave events."""
-    server_path = os.path.join(SERVERS_DIR, server_name)
-    log_file = os.path.join(server_path, 'logs', 'latest.log')
-    
-    if not os.path.exists(log_file):
+    existing = conn.execute('''
+        SELECT hour_start, player_seconds, minutes FROM analytics_occupancy
+        WHERE server_name = ? AND hour_start BETWEEN ? AND ?
+    ''', (server_name, min(hours), max(hours))).fetchall()
+    for hour_start, player_seconds, stored in existing:
+        hour = hours.get(hour_start)
+        if hour is None:
+            continue
+        stored_minutes = array.array('H', stored)
+        hour[0] = array.array('H', (a + b for a, b in zip(hour[0], stored_minutes)))
+        hour[1] += player_seconds
+
+    rows = []
+    for hour_start, (minutes, player_seconds) in hours.items():
+        local = time.localtime(hour_start)
+        rows.append((server_name, hour_start, local.tm_wday * 24 + local.tm_hour, player_seconds, max(minutes), minutes.tobytes()))
+    conn.executemany('''
+        INSERT OR REPLACE INTO analytics_occupancy (server_name, hour_start, week_hour, player_seconds, peak, minutes)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', rows)
+
+def rebuild_session_occupancy(conn, server_name):
+    """Builds the occupancy rollup from all stored sessions (for sessions recorded before it existed). The caller commits."""
+    conn.execute("DELETE FROM analytics_occupancy WHERE server_name = ?", (server_name,))
+    cursor = conn.execute("SELECT join_time, leave_time FROM analytics_sessions WHERE server_name = ?", (server_name,))
+    while True:
+        sessions = cursor.fetchmany(10000)
+        if not sessions:
+            break
+        add_session_occupancy(conn, server_name, sessions)
+
+def query_occupancy(server_name, since=None, until=None, percentiles=(50, 90)):
+    """
+    Summarizes the occupancy rollup per local hour of the week (Monday 00:00 = 0)
+    over [since, until), by default the recorded history. Returns None without
+    data, otherwise {'from', 'to', 'hours'}, where each of the 168 hours has the
+    average players online, the peak within any minute, player-seconds, how
+    often that hour occurred in the range and the requested percentiles of its
+    hourly average.
+    """
+    with analytics_locks[server_name]:
+        conn = get_db_connection()
+        try:
+            if conn.execute("SELECT 1 FROM analytics_occupancy_pending WHERE server_name = ?", (server_name,)).fetchone():
+                # Sessions from before the rollup existed, queued by a schema migration.
+                rebuild_session_occupancy(conn, server_name)
+                conn.execute("DELETE FROM analytics_occupancy_pending WHERE server_name = ?", (server_name,))
+                conn.commit()
+            bounds = conn.execute('''
+                SELECT MIN(hour_start), MAX(hour_start) FROM analytics_occupancy WHERE server_name = ?
+            ''', (server_name,)).fetchone()
+            if bounds[0] is None:
+                return None
+            since = int(since if since is not None else bounds[0])
+            until = int(until if until is not None else bounds[1] + 3600)
+            since -= since % 3600
+            rows = conn.execute('''
+                SELECT week_hour, player_seconds, peak FROM analytics_occupancy
+                WHERE server_name = ? AND hour_start >= ? AND hour_start < ?
+            ''', (server_name, since, until)).fetchall()
+        finally:
+            conn.close()
+
+    # How often each hour of the week occurs in the range: whole weeks plus the hours of the partial one.
+    total_hours = max(0, (until - since + 3599) // 3600)
+    occurrences = [total_hours // 168] * 168
+    for hour_start in range(since + (total_hours // 168) * 168 * 3600, since + total_hours * 3600, 3600):
+        local = time.localtime(hour_start)
+        occurrences[local.tm_wday * 24 + local.tm_hour] += 1
+
+    hourly_averages = [[] for _ in range(168)]
+    player_seconds = [0] * 168
+    peaks = [0] * 168
+    for week_hour, seconds, peak in rows:
+        hourly_averages[week_hour].append(seconds / 3600)
+        player_seconds[week_hour] += seconds
+        peaks[week_hour] = max(peaks[week_hour], peak)
+
+    hours = []
+    for week_hour in range(168):
+        count = max(occurrences[week_hour], len(hourly_averages[week_hour]))
+        # Hours without a row had nobody online.
+        values = sorted(hourly_averages[week_hour])
+        values[:0] = [0.0] * (count - len(values))
+        hour = {
+            'week_hour': week_hour,
+            'day': week_hour // 24,
+            'hour': week_hour % 24,
+            'occurrences': count,
+            'player_seconds': player_seconds[week_hour],
+            'average': round(player_seconds[week_hour] / (3600 * count), 3) if count else 0.0,
+            'peak': peaks[week_hour]
+        }
+        for percentile in percentiles:
+            # Nearest-rank percentile of the hour's average occupancy.
+            rank = max(1, math.ceil(percentile / 100 * count))
+            hour[f'p{percentile:g}'] = round(values[rank - 1], 3) if count else 0.0
+        hours.append(hour)
+    return {'from': since, 'to': until, 'hours': hours}
+
+def delete_analytics(server_name):
+    """Removes all stored analytics for a server."""
+    conn = get_db_connection()
+    c = conn.cursor()
+    c.execute("DELETE FROM analytics_sessions WHERE server_name = ?", (server_name,))
+    c.execute("DELETE FROM analytics_players WHERE server_name = ?", (server_name,))
+    c.execute("DELETE FROM analytics_state WHERE server_name = ?", (server_name,))
+    c.execute("DELETE FROM analytics_imported_logs WHERE server_name = ?", (server_name,))
+    c.execute("DELETE FROM analytics_occupancy WHERE server_name = ?", (server_name,))
+    c.execute("DELETE FROM analytics_occupancy_pending WHERE server_name = ?", (server_name,))
+    conn.commit()
+    conn.close()
+
+analytics_locks = collections.defaultdict(Lock)
+
+def record_player_join(batch, player_name, join_time):
+    """Counts a join in the batch's per-player deltas."""
+    player = batch['players'].get(player_name)
+    if player is None:
+        batch['players'][player_name] = {
+            'first_join': join_time,
+            'last_join': join_time,
+            'total_playtime': 0,
+            'join_count': 1
+        }
+        return
+    player['first_join'] = min(player['first_join'], join_time)
+    player['last_join'] = max(player['last_join'], join_time)
+    player['join_count'] += 1
+
+def close_player_session(batch, player_name, leave_time):
+    """Ends an open session, recording it and adding its duration to the player's playtime."""
+    join_time = batch['open_sessions'].pop(player_name, None)
+    if join_time is None:
+        return
+    duration = max(0, leave_time - join_time)
+    batch['sessions'].append({
+        'player': player_name,
+        'join_time': join_time,
+        'leave_time': leave_time,
+        'duration': duration
+    })
+    player = batch['players'].setdefault(player_name, {
+        'first_join': join_time,
+        'last_join': join_time,
+        'total_playtime': 0,
+        'join_count': 0
+    })
+    player['total_playtime'] += duration
+
+def apply_session_event(batch, event_time, kind, player_name):
+    """Applies one classified event to the batch. batch['last_event_time'] must be the event before it."""
+    if kind in ('start', 'stop'):
+        # Nobody stays online across a restart. After a crash there is no stop line,
+        # so open sessions end at the last event seen before the new start.
+        end_time = event_time if kind == 'stop' else (batch['last_event_time'] or event_time)
+        for open_player in list(batch['open_sessions']):
+            close_player_session(batch, open_player, end_time)
+    elif kind == 'join':
+        record_player_join(batch, player_name, event_time)
+        # A second join without a leave means we missed the leave, close the old session there.
+        close_player_session(batch, player_name, event_time)
+        batch['open_sessions'][player_name] = event_time
+    else:
+        close_player_session(batch, player_name, event_time)
+
+def get_archives_since_checkpoint(server_name, state):
+    """
+    Finds the log an ingest checkpoint points into among Minecraft's archives
+    (latest.log is archived on every start) and returns [(archive, start offset)]
+    for the rest of it and every log archived after it, oldest first. The
+    archive holding the checkpoint has the last ingested event at the byte
+    before the checkpoint offset. Empty if no archive holds it.
+    """
+    checkpoint, last_event_time = state['checkpoint'], state['last_event_time']
+    if last_event_time is None or checkpoint['offset'] == 0:
         return []
-    
-    analytics = load_analytics(server_name)
-    players_data = analytics.get('players', {})
-    sessions = analytics.get('sessions', [])
-    active_sessions = {}
-    
-    # Regular expressions for join/leave events
-    join_pattern = re.compile(r'\[.*?\]: (.*?) joined the game')
-    leave_pattern = re.compile(r'\[.*?\]: (.*?) left the game')
-    timestamp_pattern = re.compile(r'\[([\d:]+)\]')
-    
-    try:
-        with open(log_file, 'r', encoding='utf-8', errors='replace') as f:
-            for line in f:
-                # Extract timestamp
-                time_match = timestamp_pattern.search(line)
-                if not time_match:
-                    continue
-                
-                timestamp = time_match.group(1)
-                current_time = time.time()
-                
-                # Check for join event
-                join_match = join_pattern.search(line)
-                if join_match:
-                    player_name = join_match.group(1)
-                    
-                    # Initialize player data if not exists
-                    if player_name not in players_data:
-                        players_data[player_name] = {
-                            'first_join': current_time,
-                            'last_join': current_time,
-                            'total_playtime': 0,
-                            'join_count': 0
-                        }
-                    
-                    players_data[player_name]['last_join'] = current_time
-                    players_data[player_name]['join_count'] += 1
-                    
-                    # Start a new session
-                    active_sessions[player_name] = {
-                        'player': player_name,
-                        'join_time': current_time,
-                        'timestamp': timestamp
+    log_dir = os.path.join(SERVERS_DIR, server_name, 'logs')
+    archives = []
+    for file_name in os.listdir(log_dir):
+        match = ROTATED_LOG_PATTERN.match(file_name)
+        # Archived after the last event we read (give or take a day of date guessing).
+        if match and os.path.getmtime(os.path.join(log_dir, file_name)) >= last_event_time - 86400:
+            archives.append(((match.group(1), int(match.group(2))), file_name))
+    archives = [file_name for _, file_name in sorted(archives)]
+    for position, file_name in enumerate(archives):
+        _, events = log_event_index.events_since(server_name, file_name, checkpoint['offset'] - 1)
+        event = next(events, None)
+        events.close()
+        # Dates are guessed differently for archives and latest.log, the time of day must match.
+        if event and event[0] == checkpoint['offset'] - 1 and (event[1] - last_event_time) % 3600 == 0:
+            return [(file_name, checkpoint['offset'])] + [(name, 0) for name in archives[position + 1:]]
+    return []
+
+def parse_log_for_sessions(server_name):
+    """
+    Ingests player join/leave events written to latest.log since the last
+    checkpoint (inode + byte offset), using the timestamps from the log itself.
+    When Minecraft has archived the checkpoint's log since, the rest of it is
+    read first. Sessions still open at the end are carried over to the next
+    refresh, so a refresh only costs as much as the log has grown. Returns a
+    summary of the batch.
+    """
+    log_file = os.path.join(SERVERS_DIR, server_name, 'logs', 'latest.log')
+    with analytics_locks[server_name]:
+        conn = get_db_connection()
+        try:
+            state = load_analytics_state(conn, server_name)
+            batch = new_analytics_batch(state)
+
+            def ingest(events):
+                last_offset = None
+                for offset, event_time, level, thread, message in events:
+                    last_offset = offset
+                    if batch['first_event_time'] is None:
+                        batch['first_event_time'] = event_time
+                    session_event = classify_session_message(message)
+                    if session_event:
+                        apply_session_event(batch, event_time, *session_event)
+                    batch['last_event_time'] = event_time
+                return last_offset
+
+            if os.path.exists(log_file):
+                checkpoint = state['checkpoint']
+                stat = os.stat(log_file)
+                start_offset = checkpoint['offset']
+                if checkpoint['inode'] != stat.st_ino or stat.st_size < checkpoint['offset']:
+                    # A new log (archived by Minecraft) or one truncated in place (e.g. cleared):
+                    # finish the archived one, then start over on the new content.
+                    if checkpoint['inode'] is not None:
+                        for archive_name, archive_offset in get_archives_since_checkpoint(server_name, state):
+                            ingest(log_event_index.events_since(server_name, archive_name, archive_offset)[1])
+                    start_offset = 0
+                meta, events = log_event_index.events_since(server_name, 'latest.log', start_offset)
+                last_offset = ingest(events)
+
+                if last_offset is not None or (meta['inode'], start_offset) != (checkpoint['inode'], checkpoint['offset']):
+                    batch['checkpoint'] = {
+                        'inode': meta['inode'],
+                        'offset': last_offset + 1 if last_offset is not None else start_offset
                     }
-                
-                # Check for leave event
-                leave_match = leave_pattern.search(line)
-                if leave_match:
-                    player_name = leave_match.group(1)
-                    
-                    if player_name in active_sessions:
-                        session = active_sessions[player_name]
-                        leave_time = current_time
-                        duration = leave_time - session['join_time']
-                        
-                        # Update player total playtime
-                        if player_name in players_data:
-                            players_data[player_name]['total_playtime'] += duration
-                        
-                        # Record session
-                        sessions.append({
-                            'player': player_name,
-                            'join_time': session['join_time'],
-                            'leave_time': leave_time,
-                            'duration': duration
-                        })
-                        
-                        del active_sessions[player_name]
-        
-        # Save updated analytics
-        analytics['players'] = players_data
-        analytics['sessions'] = sessions
-        save_analytics(server_name, analytics)
-        
-        return analytics
-        
-    except Exception as e:
-        print(f"Error parsing logs for analytics: {e}")
-        return analytics
+            save_analytics(conn, server_name, batch)
+            conn.commit()
+            return {
+                'sessions_added': len(batch['sessions']),
+                'players_updated': len(batch['players']),
+                'open_sessions': batch['open_sessions'],
+                'checkpoint': batch['checkpoint']
+            }
+        finally:
+            conn.close()
+
+class AnalyticsBackfill:
+    """
+    Imports sessions from a server's rotated logs (Minecraft's dated .log.gz
+    archives) as background jobs. Files are parsed in parallel on the log
+    worker processes, then merged oldest first so sessions carry across file
+    boundaries, and loaded in one transaction. Only
+    history from before the first event the live ingest saw is imported, so
+    nothing is counted twice, and imported files are remembered.
+    """
+
+    def __init__(self, history_size=100):
+        self.history_size = history_size
+        self._lock = Lock()
+        self._jobs = collections.OrderedDict()  # { job_id: job }
+        self._active_servers = set()
+
+    def submit(self, server_name, submitted_by=None):
+        """Starts a backfill for a server. Returns (job, already_running)."""
+        with self._lock:
+            if server_name in self._active_servers:
+                running = next(job for job in reversed(self._jobs.values())
+                               if job['server_name'] == server_name and job['state'] in (JOB_STATE_QUEUED, JOB_STATE_RUNNING))
+                return dict(running), True
+            job = {
+                'id': str(uuid.uuid4()),
+                'server_name': server_name,
+                'action': 'analytics-backfill',
+                'state': JOB_STATE_QUEUED,
+                'progress': 'Queued',
+                'files_total': 0,
+                'files_done': 0,
+                'result': None,
+                'status_code': None,
+                'submitted_by': submitted_by,
+                'created_at': time.time(),
+                'started_at': None,
+                'finished_at': None
+            }
+            self._jobs[job['id']] = job
+            self._active_servers.add(server_name)
+            while len(self._jobs) > self.history_size:
+                oldest = next(iter(self._jobs.values()))
+                if oldest['state'] not in (JOB_STATE_SUCCEEDED, JOB_STATE_FAILED):
+                    break
+                self._jobs.popitem(last=False)
+        Thread(target=self._run, args=(job['id'], server_name), daemon=True).start()
+        return dict(job), False
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job.update(fields)
+
+    def get_job(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _run(self, job_id, server_name):
+        self._update(job_id, state=JOB_STATE_RUNNING, started_at=time.time(), progress='Finding rotated logs')
+        try:
+            result = self.backfill(server_name, job_id)
+            self._update(job_id, state=JOB_STATE_SUCCEEDED, progress='Done', result=result, status_code=200)
+        except Exception as e:
+            print(f"ERROR [{server_name}]: Analytics backfill {job_id} failed: {e}")
+            self._update(job_id, state=JOB_STATE_FAILED, progress='Failed',
+                         result={'error': f'Backfill failed: {e}'}, status_code=500)
+        finally:
+            self._update(job_id, finished_at=time.time())
+            with self._lock:
+                self._active_servers.discard(server_name)
+
+    def backfill(self, server_name, job_id=None):
+        log_dir = os.path.join(SERVERS_DIR, server_name, 'logs')
+        conn = get_db_connection()
+        try:
+            imported = {row[0] for row in conn.execute(
+                "SELECT log_name FROM analytics_imported_logs WHERE server_name = ?", (server_name,))}
+        finally:
+            conn.close()
+        log_names = [os.path.relpath(path, log_dir).replace(os.sep, '/') for path in get_searchable_logs(server_name)]
+        log_names = [name for name in log_names if name != 'latest.log' and name not in imported]
+        self._update(job_id, files_total=len(log_names), progress=f'Parsing {len(log_names)} log files')
+
+        results = log_event_index.extract_session_events(
+            server_name, log_names, lambda files_done: self._update(job_id, files_done=files_done))
+
+        self._update(job_id, progress='Loading sessions')
+        with analytics_locks[server_name]:
+            conn = get_db_connection()
+            try:
+                cutoff = load_analytics_state(conn, server_name)['first_event_time']
+                batch = new_analytics_batch({'open_sessions': {}, 'last_event_time': None,
+                                             'first_event_time': None, 'checkpoint': {}})
+                for log_name in log_names:
+                    result = results[log_name]
+                    for event_time, kind, player_name, previous_time in result['events']:
+                        if cutoff is not None and event_time >= cutoff:
+                            break
+                        if previous_time is not None:
+                            batch['last_event_time'] = previous_time
+                        apply_session_event(batch, event_time, kind, player_name)
+                        batch['last_event_time'] = event_time
+                    if result['last_time'] is not None and (cutoff is None or result['last_time'] < cutoff):
+                        batch['last_event_time'] = result['last_time']
+                # Whoever was still online when the history ends left at its last event.
+                for player_name in list(batch['open_sessions']):
+                    close_player_session(batch, player_name, batch['last_event_time'])
+
+                save_analytics(conn, server_name, batch, save_state=False)
+                conn.executemany("INSERT OR IGNORE INTO analytics_imported_logs (server_name, log_name) VALUES (?, ?)",
+                                 [(server_name, log_name) for log_name in log_names])
+                conn.commit()
+            finally:
+                conn.close()
+        return {'files_imported': len(log_names), 'sessions_added': len(batch['sessions']),
+                'players_updated': len(batch['players'])}
+
+analytics_backfill = AnalyticsBackfill()
+
+def parse_analytics_page_args(default_limit):
+    """Parses limit/offset/from/to query parameters for analytics listings."""
+    limit = min(max(1, int(request.args.get('limit', default_limit))), 1000)
+    offset = max(0, int(request.args.get('offset', 0)))
+    since = request.args.get('from', type=float)
+    until = request.args.get('to', type=float)
+    return limit, offset, since, until
 
 @app.route('/api/servers/<server_name>/analytics/refresh', methods=['POST'])
 @api_auth_required
@@ -4185,129 +7815,351 @@ def refresh_analytics(server_name, api_user=None):
         return jsonify({"error": "Server not found"}), 404
     
     try:
-        analytics = parse_log_for_sessions(server_name)
-        return jsonify({"message": "Analytics refreshed successfully", "data": analytics}), 200
+        summary = parse_log_for_sessions(server_name)
+        return jsonify({"message": "Analytics refreshed successfully", "data": summary}), 200
     except Exception as e:
         return jsonify({"error": f"Failed to refresh analytics: {e}"}), 500
 
+@app.route('/api/servers/<server_name>/analytics/backfill', methods=['POST'])
+@api_auth_required
+def backfill_analytics(server_name, api_user=None):
+    """
+    Import player sessions from rotated logs
+    ---
+    tags:
+      - Analytics
+    parameters:
+      - name: server_name
+        in: path
+        type: string
+        required: true
+    responses:
+      202:
+        description: Backfill job started; poll /api/jobs/{job_id} for progress
+      200:
+        description: A backfill for this server is already running, its job is returned
+      404:
+        description: Server not found
+    """
+    server_path = os.path.join(SERVERS_DIR, server_name)
+    if not os.path.isdir(server_path):
+        return jsonify({"error": "Server not found"}), 404
+    job, already_running = analytics_backfill.submit(server_name, submitted_by=api_user.id)
+    return jsonify({"message": "Backfill already running" if already_running else "Backfill started",
+                    "job_id": job['id'], "job": job}), 200 if already_running else 202
+
 @app.route('/api/servers/<server_name>/analytics/playtime', methods=['GET'])
 @api_auth_required
 def get_player_playtime(server_name, api_user=None):
-    """Get player playtime statistics."""
+    """
+    Get player playtime statistics.
+    ---
+    tags:
+      - Analytics
+    parameters:
+      - name: server_name
+        in: path
+        type: string
+        required: true
+      - name: limit
+        in: query
+        type: integer
+        default: 100
+      - name: offset
+        in: query
+        type: integer
+        default: 0
+    responses:
+      200:
+        description: Players ordered by total playtime, most first
+    """
     server_path = os.path.join(SERVERS_DIR, server_name)
     if not os.path.isdir(server_path):
         return jsonify({"error": "Server not found"}), 404
+    try:
+        limit, offset, _, _ = parse_analytics_page_args(100)
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers"}), 400
+    
+    conn = get_db_connection()
+    rows = conn.execute('''
+        SELECT player, total_playtime, join_count, first_join, last_join
+        FROM analytics_players WHERE server_name = ?
+        ORDER BY total_playtime DESC LIMIT ? OFFSET ?
+    ''', (server_name, limit, offset)).fetchall()
+    conn.close()
     
-    analytics = load_analytics(server_name)
-    players_data = analytics.get('players', {})
-    
-    # Convert to list and sort by total playtime
     playtime_list = []
-    for player_name, data in players_data.items():
+    for player_name, total_playtime, join_count, first_join, last_join in rows:
         playtime_list.append({
             'player': player_name,
-            'total_playtime': data['total_playtime'],
-            'total_playtime_hours': round(data['total_playtime'] / 3600, 2),
-            'join_count': data['join_count'],
-            'first_join': data['first_join'],
-            'last_join': data['last_join']
+            'total_playtime': total_playtime,
+            'total_playtime_hours': round(total_playtime / 3600, 2),
+            'join_count': join_count,
+            'first_join': first_join,
+            'last_join': last_join
         })
-    
-    playtime_list.sort(key=lambda x: x['total_playtime'], reverse=True)
     return jsonify(playtime_list)
 
 @app.route('/api/servers/<server_name>/analytics/peak-hours', methods=['GET'])
 @api_auth_required
 def get_peak_hours(server_name, api_user=None):
-    """Get peak player hours statistics."""
+    """Get the average number of players online per hour of the day, optionally between ?from= and ?to=."""
     server_path = os.path.join(SERVERS_DIR, server_name)
     if not os.path.isdir(server_path):
         return jsonify({"error": "Server not found"}), 404
+    try:
+        _, _, since, until = parse_analytics_page_args(1)
+    except ValueError:
+        return jsonify({"error": "from and to must be numbers"}), 400
     
-    analytics = load_analytics(server_name)
-    sessions = analytics.get('sessions', [])
-    
-    # Initialize hour buckets (0-23)
+    occupancy = query_occupancy(server_name, since, until, percentiles=())
     hour_counts = {str(hour): 0 for hour in range(24)}
-    
-    for session in sessions:
-        join_time = session['join_time']
-        leave_time = session['leave_time']
-        
-        # Count each hour the player was online
-        join_datetime = time.localtime(join_time)
-        leave_datetime = time.localtime(leave_time)
-        
-        current_hour = join_datetime.tm_hour
-        end_hour = leave_datetime.tm_hour
-        
-        # Handle sessions spanning multiple hours
-        hours_online = int((leave_time - join_time) / 3600) + 1
-        for i in range(hours_online):
-            hour_key = str((current_hour + i) % 24)
-            hour_counts[hour_key] += 1
-    
+    if occupancy is None:
+        return jsonify(hour_counts)
+    
+    for hour in range(24):
+        days = [occupancy['hours'][day * 24 + hour] for day in range(7)]
+        occurrences = sum(day['occurrences'] for day in days)
+        if occurrences:
+            hour_counts[str(hour)] = round(sum(day['player_seconds'] for day in days) / (3600 * occurrences), 2)
     return jsonify(hour_counts)
 
+@app.route('/api/servers/<server_name>/analytics/heatmap', methods=['GET'])
+@api_auth_required
+def get_occupancy_heatmap(server_name, api_user=None):
+    """
+    Get the hour-of-week occupancy heatmap
+    ---
+    tags:
+      - Analytics
+    parameters:
+      - name: server_name
+        in: path
+        type: string
+        required: true
+      - name: from
+        in: query
+        type: number
+        required: false
+        description: Start of the range (unix time), defaults to the first recorded hour
+      - name: to
+        in: query
+        type: number
+        required: false
+        description: End of the range (unix time), defaults to the end of the last recorded hour
+      - name: percentiles
+        in: query
+        type: string
+        required: false
+        description: Comma separated percentiles of the hourly average to include (default 50,90)
+    responses:
+      200:
+        description: 168 hours (day 0 = Monday, local time) with average and peak players online, player-seconds and percentiles
+      400:
+        description: Invalid parameters
+    """
+    server_path = os.path.join(SERVERS_DIR, server_name)
+    if not os.path.isdir(server_path):
+        return jsonify({"error": "Server not found"}), 404
+    try:
+        _, _, since, until = parse_analytics_page_args(1)
+        percentiles = [float(value) for value in request.args.get('percentiles', '50,90').split(',') if value.strip()]
+    except ValueError:
+        return jsonify({"error": "from, to and percentiles must be numbers"}), 400
+    if any(not 0 < percentile <= 100 for percentile in percentiles):
+        return jsonify({"error": "percentiles must be between 0 and 100"}), 400
+    
+    occupancy = query_occupancy(server_name, since, until, percentiles=percentiles)
+    if occupancy is None:
+        return jsonify({"from": since, "to": until, "hours": []})
+    return jsonify(occupancy)
+
 @app.route('/api/servers/<server_name>/analytics/sessions', methods=['GET'])
 @api_auth_required
 def get_recent_sessions(server_name, api_user=None):
-    """Get recent player sessions."""
+    """
+    Get recent player sessions, most recent first.
+    ---
+    tags:
+      - Analytics
+    parameters:
+      - name: server_name
+        in: path
+        type: string
+        required: true
+      - name: player
+        in: query
+        type: string
+        description: Only sessions of this player
+      - name: from
+        in: query
+        type: number
+        description: Only sessions that started at or after this unix time
+      - name: to
+        in: query
+        type: number
+        description: Only sessions that started before this unix time
+      - name: limit
+        in: query
+        type: integer
+        default: 50
+      - name: offset
+        in: query
+        type: integer
+        default: 0
+    responses:
+      200:
+        description: Sessions ordered by join time, newest first
+    """
     server_path = os.path.join(SERVERS_DIR, server_name)
     if not os.path.isdir(server_path):
         return jsonify({"error": "Server not found"}), 404
-    
-    analytics = load_analytics(server_name)
-    sessions = analytics.get('sessions', [])
-    
-    # Get the last 50 sessions
-    recent_sessions = sessions[-50:] if len(sessions) > 50 else sessions
-    recent_sessions.reverse()  # Most recent first
+    try:
+        limit, offset, since, until = parse_analytics_page_args(50)
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers"}), 400
+    
+    query = "SELECT player, join_time, leave_time, duration FROM analytics_sessions WHERE server_name = ?"
+    params = [server_name]
+    player = request.args.get('player')
+    if player:
+        query += " AND player = ?"
+        params.append(player)
+    if since is not None:
+        query += " AND join_time >= ?"
+        params.append(since)
+    if until is not None:
+        query += " AND join_time < ?"
+        params.append(until)
+    query += " ORDER BY join_time DESC, id DESC LIMIT ? OFFSET ?"
+    params.extend([limit, offset])
+    
+    conn = get_db_connection()
+    rows = conn.execute(query, params).fetchall()
+    conn.close()
     
     # Format for display
     formatted_sessions = []
-    for session in recent_sessions:
+    for player_name, join_time, leave_time, duration in rows:
         formatted_sessions.append({
-            'player': session['player'],
-            'join_time': session['join_time'],
-            'leave_time': session.get('leave_time'),
-            'duration': session.get('duration', 0),
-            'duration_minutes': round(session.get('duration', 0) / 60, 2)
+            'player': player_name,
+            'join_time': join_time,
+            'leave_time': leave_time,
+            'duration': duration,
+            'duration_minutes': round(duration / 60, 2)
         })
     
     return jsonify(formatted_sessions)
 
+class OnlinePlayerTracker:
+    """
+    Keeps each server's online player set in memory, fed from the bytes written
+    to latest.log since the last look (a byte cursor, like the log tail), so a
+    poll costs as much as the log grew instead of a rescan. Server start/stop
+    lines empty the set. Every change bumps the version, which starts at the
+    creation time in milliseconds so it keeps increasing across panel restarts.
+    """
+
+    def __init__(self, read_bytes=4 * 1024 * 1024):
+        self.read_bytes = read_bytes
+        self._lock = Lock()
+        self._states = {}  # { server_name: {'cursor': str, 'players': set, 'version': int} }
+
+    @staticmethod
+    def _new_state(log_file):
+        return {'cursor': f"{os.stat(log_file).st_ino}:0", 'players': set(), 'version': int(time.time() * 1000)}
+
+    def _apply(self, state, lines):
+        players = state['players']
+        changed = False
+        for line in lines:
+            _, separator, message = line.partition(']: ')
+            session_event = classify_session_message(message.rstrip('\r\n')) if separator else None
+            if not session_event:
+                continue
+            kind, player_name = session_event
+            if kind in ('start', 'stop'):
+                changed = changed or bool(players)
+                players.clear()
+            elif kind == 'join' and player_name not in players:
+                players.add(player_name)
+                changed = True
+            elif kind == 'leave' and player_name in players:
+                players.discard(player_name)
+                changed = True
+        return changed
+
+    def get(self, server_name):
+        """Catches up with latest.log and returns (sorted players, version)."""
+        log_file = os.path.join(SERVERS_DIR, server_name, 'logs', 'latest.log')
+        with self._lock:
+            state = self._states.get(server_name)
+            try:
+                if state is None:
+                    state = self._states[server_name] = self._new_state(log_file)
+                while True:
+                    lines, state['cursor'], reset = read_log_increment(log_file, state['cursor'], max_bytes=self.read_bytes)
+                    # A rotated or truncated log keeps the set, a restart announces itself with a start line.
+                    if self._apply(state, lines):
+                        state['version'] += 1
+                    if not lines:
+                        break
+            except FileNotFoundError:
+                pass
+            return sorted(state['players']) if state else [], state['version'] if state else 0
+
+    def forget(self, server_name):
+        with self._lock:
+            self._states.pop(server_name, None)
+
+online_players = OnlinePlayerTracker()
+
 @app.route('/api/servers/<server_name>/analytics/online', methods=['GET'])
 @api_auth_required
 def get_online_players(server_name, api_user=None):
-    """Get currently online players by parsing the latest log."""
+    """
+    Get currently online players
+    ---
+    tags:
+      - Analytics
+    parameters:
+      - name: server_name
+        in: path
+        type: string
+        required: true
+      - name: version
+        in: query
+        type: integer
+        required: false
+        description: Version from the previous response; unchanged data returns 304
+    responses:
+      200:
+        description: Online players and the version of the set
+        schema:
+          type: object
+          properties:
+            players:
+              type: array
+              items:
+                type: string
+            version:
+              type: integer
+      304:
+        description: The set hasn't changed since the given version
+    """
     server_path = os.path.join(SERVERS_DIR, server_name)
     if not os.path.isdir(server_path):
         return jsonify({"error": "Server not found"}), 404
     
-    log_file = os.path.join(server_path, 'logs', 'latest.log')
-    if not os.path.exists(log_file):
-        return jsonify([])
-    
-    online_players = set()
-    join_pattern = re.compile(r'\[.*?\]: (.*?) joined the game')
-    leave_pattern = re.compile(r'\[.*?\]: (.*?) left the game')
-    
     try:
-        with open(log_file, 'r', encoding='utf-8', errors='replace') as f:
-            for line in f:
-                join_match = join_pattern.search(line)
-                if join_match:
-                    online_players.add(join_match.group(1))
-                
-                leave_match = leave_pattern.search(line)
-                if leave_match:
-                    online_players.discard(leave_match.group(1))
-        
-        return jsonify(list(online_players))
+        players, version = online_players.get(server_name)
     except Exception as e:
         print(f"Error getting online players: {e}")
-        return jsonify([])
+        return jsonify({"players": [], "version": 0})
+    if request.args.get('version') == str(version):
+        return '', 304
+    return jsonify({"players": players, "version": version})
 
 # --- Plugin/Mod Management ---
 
@@ -5354,5 +9206,5 @@ if __name__ == '__main__':
     print(f"{'='*60}\n")
     
     app.run(host=host, port=port, debug=debug, use_reloader=False)
-else: # When run with 'flask run'
+elif __name__ != '__mp_main__': # When run with 'flask run', not when a log worker process re-imports this script
     initialize_app() 
\ No newline at end of file
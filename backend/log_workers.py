@@ -0,0 +1,304 @@
+# Work that runs on the log worker processes. These are started with spawn or
+# forkserver and only import this module, so nothing here may depend on app.py
+# or its state: paths and settings come in as arguments.
+import array
+import bisect
+import collections
+import gzip
+import json
+import os
+import re
+from datetime import datetime, timedelta
+
+# --- Log Search ---
+LOG_SEARCH_CHUNK_SIZE = 4 * 1024 * 1024
+
+def search_log_file(path, pattern, ignore_case, context, limit):
+    """
+    Searches one plain or gzip-compressed log file, decompressing as a stream.
+    Runs on a log worker process. Blocks without a match are skipped with a single
+    regex scan instead of being split into lines. Returns at most `limit` matches.
+    """
+    flags = re.IGNORECASE if ignore_case else 0
+    regex = re.compile(pattern.encode('utf-8'), flags)
+    # The pre-filter sees many lines at once, so ^ and $ have to match at every line break.
+    # \A and \Z can't be made to, patterns using them are checked line by line.
+    block_regex = None if re.search(r'\\[AZ]', pattern) else re.compile(pattern.encode('utf-8'), flags | re.MULTILINE)
+    file_name = os.path.basename(path)
+    matches = []
+    before = collections.deque(maxlen=context)
+    collecting_after = []  # Matches still waiting for their trailing context lines
+    line_number = 0
+
+    def scan_lines(block):
+        nonlocal line_number, collecting_after
+        for raw_line in block.split(b'\n'):
+            line_number += 1
+            text = raw_line.decode('utf-8', errors='replace').rstrip('\r')
+            for match in collecting_after:
+                match['after'].append(text)
+            collecting_after = [match for match in collecting_after if len(match['after']) < context]
+            if len(matches) < limit and regex.search(raw_line):
+                match = {'file': file_name, 'line': line_number, 'text': text, 'before': list(before), 'after': []}
+                matches.append(match)
+                if context:
+                    collecting_after.append(match)
+            before.append(text)
+
+    opener = gzip.open if path.endswith('.gz') else open
+    remainder = b''
+    with opener(path, 'rb') as f:
+        while len(matches) < limit or collecting_after:
+            chunk = f.read(LOG_SEARCH_CHUNK_SIZE)
+            if not chunk:
+                break
+            data = remainder + chunk
+            cut = data.rfind(b'\n')
+            if cut == -1:
+                remainder = data
+                continue
+            block, remainder = data[:cut], data[cut + 1:]
+            if collecting_after or block_regex is None or block_regex.search(block):
+                scan_lines(block)
+            else:
+                line_number += block.count(b'\n') + 1
+                if context:
+                    before.extend(line.decode('utf-8', errors='replace').rstrip('\r')
+                                  for line in block.rsplit(b'\n', context)[-context:])
+        else:
+            remainder = b''  # Stopped early, the rest of the file doesn't matter
+        if remainder and (len(matches) < limit or collecting_after):
+            scan_lines(remainder)
+    return matches
+
+# --- Log Event Index ---
+LOG_LINE_PREFIX = re.compile(rb'(?:\x1b\[[0-9;]*[A-Za-z]|\r|> ?)*')
+LOG_EVENT_PATTERNS = [
+    # Forge: [12Oct2024 12:34:56.789] [Server thread/INFO] [net.minecraft.server.MinecraftServer/]: ...
+    re.compile(rb'\[(?P<day>\d{2})(?P<month>[A-Za-z]{3})(?P<year>\d{4}) (?P<h>\d{2}):(?P<m>\d{2}):(?P<s>\d{2})(?:\.\d+)?\] '
+               rb'\[(?P<thread>[^\]]+?)/(?P<level>[A-Z]+)\] \[(?P<logger>[^\]/]*)[^\]]*\]: '),
+    # Vanilla: [12:34:56] [Server thread/INFO]: ...  (and the panel's own [12:34:56] [Installer] ...)
+    re.compile(rb'\[(?P<h>\d{2}):(?P<m>\d{2}):(?P<s>\d{2})\] \[(?P<thread>[^\]]+?)(?:/(?P<level>[A-Z]+))?\]:? '),
+    # Spigot/Paper: [12:34:56 INFO]: ...
+    re.compile(rb'\[(?P<h>\d{2}):(?P<m>\d{2}):(?P<s>\d{2}) (?P<level>[A-Z]+)\]: '),
+]
+LOG_LEVELS = ['TRACE', 'DEBUG', 'INFO', 'WARN', 'ERROR', 'FATAL']
+LOG_LEVEL_CODES = {name: code for code, name in enumerate(LOG_LEVELS)}
+LOG_LEVEL_CODES.update({'WARNING': 3, 'SEVERE': 4})
+LOG_EVENT_COLUMNS = {'offset': 'Q', 'time': 'q', 'level': 'B', 'thread': 'H', 'logger': 'H', 'message': 'H'}
+
+def _empty_event_index():
+    meta = {'count': 0, 'ingested_offset': 0, 'inode': None, 'complete': False,
+            'threads': [''], 'loggers': [''], 'date': None, 'last_tod': None}
+    return meta, {name: array.array(code) for name, code in LOG_EVENT_COLUMNS.items()}
+
+def load_event_index(index_dir):
+    """Reads a log file's event index as (meta, columns), or an empty one if it is missing or damaged."""
+    try:
+        with open(os.path.join(index_dir, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return _empty_event_index()
+    columns = {}
+    for name, code in LOG_EVENT_COLUMNS.items():
+        column = array.array(code)
+        try:
+            with open(os.path.join(index_dir, f'{name}.bin'), 'rb') as f:
+                column.frombytes(f.read(meta['count'] * column.itemsize))
+        except (OSError, ValueError):
+            return _empty_event_index()
+        columns[name] = column
+    if any(len(column) != meta['count'] for column in columns.values()):
+        return _empty_event_index()
+    return meta, columns
+
+def _save_event_index(index_dir, meta, new_columns, rebuild):
+    os.makedirs(index_dir, exist_ok=True)
+    for name, column in new_columns.items():
+        column_path = os.path.join(index_dir, f'{name}.bin')
+        with open(column_path, 'wb' if rebuild else 'r+b' if os.path.exists(column_path) else 'wb') as f:
+            # Appends after the last committed record, dropping anything a crash left behind.
+            f.seek(0 if rebuild else (meta['count'] - len(column)) * column.itemsize)
+            f.write(column.tobytes())
+            f.truncate()
+    temp_path = os.path.join(index_dir, 'meta.json.tmp')
+    with open(temp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(temp_path, os.path.join(index_dir, 'meta.json'))
+
+def _intern(table, value):
+    try:
+        return table.index(value)
+    except ValueError:
+        if len(table) >= 0xFFFF:
+            return 0
+        table.append(value)
+        return len(table) - 1
+
+def _parse_events(data, base_offset, meta, state, columns, days):
+    """
+    Parses complete lines into the columns. 'time' holds the time of day until
+    _resolve_dates runs, `days` the day (relative number or explicit date) of each event.
+    """
+    offset = base_offset
+    for raw_line in data.split(b'\n')[:-1]:
+        line_offset = offset
+        offset += len(raw_line) + 1
+        start = LOG_LINE_PREFIX.match(raw_line).end()
+        for pattern in LOG_EVENT_PATTERNS:
+            match = pattern.match(raw_line, start)
+            if match:
+                break
+        else:
+            continue
+        groups = match.groupdict()
+        tod = int(groups['h']) * 3600 + int(groups['m']) * 60 + int(groups['s'])
+        if groups.get('year'):
+            days.append(datetime.strptime((groups['day'] + groups['month'] + groups['year']).decode(), '%d%b%Y').date())
+        else:
+            # The clock going back by more than an hour means the log crossed midnight.
+            if state['last_tod'] is not None and tod < state['last_tod'] - 3600:
+                state['day'] += 1
+            days.append(state['day'])
+        state['last_tod'] = tod
+        columns['offset'].append(line_offset)
+        columns['time'].append(tod)
+        columns['level'].append(LOG_LEVEL_CODES.get((groups['level'] or b'INFO').decode('ascii'), 2))
+        columns['thread'].append(_intern(meta['threads'], groups['thread'].decode('utf-8', 'replace')) if groups.get('thread') else 0)
+        columns['logger'].append(_intern(meta['loggers'], groups['logger'].decode('utf-8', 'replace')) if groups.get('logger') else 0)
+        columns['message'].append(min(match.end(), 0xFFFF))
+
+def _resolve_dates(meta, state, columns, days, anchor):
+    """Turns the parsed times of day into unix timestamps."""
+    if meta['date'] is not None:
+        # Continue from the day of the last indexed event.
+        first_date = datetime.strptime(meta['date'], '%Y-%m-%d').date()
+    elif anchor[0] == 'start':
+        first_date = datetime.fromtimestamp(anchor[1]).date()
+    else:
+        # Anchored at the end (a live file's mtime): the last event happened on or before that day.
+        end = datetime.fromtimestamp(anchor[1])
+        end_tod = end.hour * 3600 + end.minute * 60 + end.second
+        late = state['last_tod'] is not None and state['last_tod'] > end_tod + 300
+        first_date = end.date() - timedelta(days=state['day'] + (1 if late else 0))
+    event_date = None
+    for i, day in enumerate(days):
+        event_date = day if not isinstance(day, int) else first_date + timedelta(days=day)
+        columns['time'][i] += int(datetime.combine(event_date, datetime.min.time()).timestamp())
+    if event_date is not None:
+        meta['date'] = event_date.isoformat()
+    meta['last_tod'] = state['last_tod']
+
+def update_event_index(log_path, index_dir, anchor=None):
+    """
+    Brings the event index of one log file up to date and returns its meta. `anchor`
+    is where the date of the first ('start', time) or last ('end', time) event comes
+    from, as lines only carry the time; by default the file's mtime ends it. The
+    caller makes sure only one process updates a file's index at a time.
+    """
+    meta, _ = load_event_index(index_dir)
+    if meta['complete']:
+        return meta
+    stat = os.stat(log_path)
+    compressed = log_path.endswith('.gz')
+    rebuild = meta['count'] == 0 or (not compressed and (meta['inode'] != stat.st_ino or stat.st_size < meta['ingested_offset']))
+    if rebuild:
+        meta, _ = _empty_event_index()
+    elif stat.st_size == meta['ingested_offset']:
+        return meta
+    if anchor is None:
+        anchor = ('end', stat.st_mtime)
+
+    collected = {name: array.array(code) for name, code in LOG_EVENT_COLUMNS.items()}
+    days = []
+    state = {'day': 0, 'last_tod': meta['last_tod']}
+    base_count = meta['count']
+    opener = gzip.open if compressed else open
+    with opener(log_path, 'rb') as f:
+        f.seek(meta['ingested_offset'])
+        remainder = b''
+        offset = meta['ingested_offset']
+        while True:
+            chunk = f.read(LOG_SEARCH_CHUNK_SIZE)
+            if not chunk:
+                break
+            data = remainder + chunk
+            cut = data.rfind(b'\n') + 1
+            data, remainder = data[:cut], data[cut:]
+            _parse_events(data, offset, meta, state, collected, days)
+            offset += len(data)
+        if compressed and remainder:
+            _parse_events(remainder + b'\n', offset, meta, state, collected, days)
+            offset += len(remainder)
+    _resolve_dates(meta, state, collected, days, anchor)
+
+    meta['count'] = base_count + len(collected['offset'])
+    meta['ingested_offset'] = offset
+    meta['inode'] = stat.st_ino
+    meta['complete'] = compressed
+    _save_event_index(index_dir, meta, collected, rebuild)
+    return meta
+
+def read_events(log_path, meta, columns, start_offset=0):
+    """
+    Yields the indexed events at or after start_offset as (offset, time, level, thread,
+    message) tuples. The file is read once, sequentially, from the first of those events.
+    """
+    offsets = columns['offset']
+    count = meta['count']
+    first = bisect.bisect_left(offsets, start_offset)
+    if first >= count:
+        return
+    opener = gzip.open if log_path.endswith('.gz') else open
+    with opener(log_path, 'rb') as f:
+        f.seek(offsets[first])
+        buffer, buffer_start, position = b'', offsets[first], 0
+        for i in range(first, count):
+            end = offsets[i + 1] if i + 1 < count else meta['ingested_offset']
+            if buffer_start + len(buffer) < end:
+                # Keep only the unread part of the buffer, then read ahead in large chunks.
+                buffer, buffer_start, position = buffer[position:], buffer_start + position, 0
+                buffer += f.read(max(LOG_SEARCH_CHUNK_SIZE, end - buffer_start - len(buffer)))
+            start = offsets[i] - buffer_start
+            raw = buffer[start:end - buffer_start]
+            position = end - buffer_start
+            yield (offsets[i], columns['time'][i], LOG_LEVELS[columns['level'][i]],
+                   meta['threads'][columns['thread'][i]],
+                   raw[columns['message'][i]:].rstrip(b'\r\n').decode('utf-8', errors='replace'))
+
+# --- Session Events ---
+PLAYER_JOIN_MESSAGE = re.compile(r'^(\w+) joined the game')
+PLAYER_LEAVE_MESSAGE = re.compile(r'^(\w+) left the game')
+SERVER_START_PATTERN = re.compile(r'^Starting minecraft server version')
+SERVER_STOP_PATTERN = re.compile(r'^Stopping (?:the )?server')
+
+def classify_session_message(message):
+    """Returns (kind, player) for messages that affect sessions ('start', 'stop', 'join', 'leave'), else None."""
+    if SERVER_START_PATTERN.search(message):
+        return 'start', None
+    if SERVER_STOP_PATTERN.search(message):
+        return 'stop', None
+    join_match = PLAYER_JOIN_MESSAGE.match(message)
+    if join_match:
+        return 'join', join_match.group(1)
+    leave_match = PLAYER_LEAVE_MESSAGE.match(message)
+    if leave_match:
+        return 'leave', leave_match.group(1)
+    return None
+
+def extract_session_events(log_path, index_dir, anchor=None):
+    """
+    Indexes one rotated log and returns its session events as (time, kind, player,
+    previous_time) tuples, where previous_time is the time of the log event before
+    it, plus the time of the file's last event.
+    """
+    update_event_index(log_path, index_dir, anchor)
+    meta, columns = load_event_index(index_dir)
+    session_events = []
+    previous_time = None
+    for offset, event_time, level, thread, message in read_events(log_path, meta, columns):
+        session_event = classify_session_message(message)
+        if session_event:
+            session_events.append((event_time, session_event[0], session_event[1], previous_time))
+        previous_time = event_time
+    return {'events': session_events, 'last_time': previous_time}
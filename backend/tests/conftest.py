@@ -0,0 +1,60 @@
+import importlib.util
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import uuid
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """
+    Imports app.py from a copy in a temporary directory, so its config.json,
+    users.db, servers and server configs all live there instead of the checkout.
+    """
+    root = tmp_path_factory.mktemp('panel')
+    backend_dir = root / 'backend'
+    for directory in (backend_dir, root / 'servers', root / 'configs'):
+        directory.mkdir()
+    for file_name in ('app.py', 'log_workers.py'):
+        shutil.copy(os.path.join(BACKEND_DIR, file_name), backend_dir / file_name)
+    with open(backend_dir / 'config.json', 'w') as f:
+        json.dump({
+            'servers_dir': str(root / 'servers'),
+            'configs_dir': str(root / 'configs'),
+            'secret_key': 'test',
+            'migrated_scripts_to_config_dir': True
+        }, f)
+    sys.path.insert(0, str(backend_dir))  # Where app.py and the log worker processes import log_workers from
+    spec = importlib.util.spec_from_file_location('app', backend_dir / 'app.py')
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['app'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def fresh_db(app_module, tmp_path):
+    """Points the app at an empty, migrated database for one test."""
+    app_module.DB_FILE = str(tmp_path / 'users.db')
+    app_module.db_pool = app_module.DatabasePool()
+    app_module.permission_cache.bump()
+    app_module.init_db()
+    yield app_module.DB_FILE
+    while not app_module.db_pool._idle.empty():
+        sqlite3.Connection.close(app_module.db_pool._idle.get_nowait())
+
+
+@pytest.fixture
+def server_name(app_module):
+    """Creates an empty server directory and removes it (and its configs) afterwards."""
+    name = f'test-{uuid.uuid4().hex[:8]}'
+    os.makedirs(os.path.join(app_module.SERVERS_DIR, name, 'logs'))
+    yield name
+    shutil.rmtree(os.path.join(app_module.SERVERS_DIR, name), ignore_errors=True)
+    shutil.rmtree(os.path.join(app_module.CONFIGS_DIR, name), ignore_errors=True)
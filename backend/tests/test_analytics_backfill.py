@@ -0,0 +1,45 @@
+import gzip
+import os
+from datetime import datetime
+
+
+def write_archive(app_module, server_name, name, lines):
+    with gzip.open(os.path.join(app_module.SERVERS_DIR, server_name, 'logs', name), 'wt') as f:
+        f.write(''.join(f'[{stamp}] [Server thread/INFO]: {message}\n' for stamp, message in lines))
+
+
+def sessions(app_module, server_name):
+    conn = app_module.get_db_connection()
+    try:
+        return conn.execute(
+            "SELECT player, join_time, duration FROM analytics_sessions WHERE server_name = ? ORDER BY join_time",
+            (server_name,)).fetchall()
+    finally:
+        conn.close()
+
+
+def test_backfill_imports_archives_on_the_worker_processes(app_module, fresh_db, server_name):
+    write_archive(app_module, server_name, '2024-03-01-1.log.gz', [
+        ('10:00:00', 'Starting minecraft server version 1.20.4'),
+        ('10:05:00', 'Alice joined the game'),
+        ('10:15:00', 'Alice left the game'),
+    ])
+    write_archive(app_module, server_name, '2024-03-02-1.log.gz', [
+        ('09:00:00', 'Bob joined the game'),
+        ('09:30:00', 'Bob left the game'),
+    ])
+
+    result = app_module.analytics_backfill.backfill(server_name)
+
+    assert result['files_imported'] == 2
+    day = datetime(2024, 3, 1).timestamp()
+    assert sessions(app_module, server_name) == [
+        ('Alice', day + 10 * 3600 + 300, 600),
+        ('Bob', day + 86400 + 9 * 3600, 1800),
+    ]
+    # The workers left the archives' event indexes behind for later queries.
+    meta = app_module.log_event_index.update(server_name, '2024-03-01-1.log.gz')
+    assert meta['complete'] and meta['count'] == 3
+
+    # Imported files are remembered.
+    assert app_module.analytics_backfill.backfill(server_name)['files_imported'] == 0
@@ -0,0 +1,33 @@
+import time
+
+
+def test_pruned_jobs_are_reported_as_failed(app_module, monkeypatch):
+    def stop_server(server_name):
+        if server_name == 'slow':
+            time.sleep(0.5)
+        return {'message': 'stopped'}, 200
+
+    monkeypatch.setattr(app_module, 'stop_server', stop_server)
+    monkeypatch.setattr(app_module, 'lifecycle_jobs', app_module.LifecycleJobQueue(max_workers=3, history_size=1))
+    outcomes = []
+
+    # 'quick' finishes while 'slow' runs, and is pruned when 'last' is submitted.
+    app_module.run_bulk_action(['slow', 'quick', 'last'], 'stop', concurrency=3, stagger=0.15,
+                               wait_for_done=False, done_timeout=1, submitted_by=None, emit=outcomes.append)
+
+    assert [(outcome['server'], outcome['state']) for outcome in outcomes] == [
+        ('slow', app_module.JOB_STATE_SUCCEEDED),
+        ('quick', app_module.JOB_STATE_FAILED),
+        ('last', app_module.JOB_STATE_SUCCEEDED),
+    ]
+
+
+def test_waiting_holds_the_job_while_it_is_pruned(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'stop_server', lambda server_name: ({'message': 'stopped'}, 200))
+    jobs = app_module.LifecycleJobQueue(max_workers=1, history_size=1)
+    first = jobs.submit('a', 'stop')
+    assert jobs.wait_for_job(first['id'], timeout=10)['state'] == app_module.JOB_STATE_SUCCEEDED
+
+    second = jobs.submit('b', 'stop')
+    assert jobs.wait_for_job(first['id']) is None
+    assert jobs.wait_for_job(second['id'], timeout=10)['result'] == {'message': 'stopped'}
@@ -0,0 +1,61 @@
+import gzip
+import os
+from datetime import datetime, timedelta
+
+
+def log_line(minutes_ago, message):
+    stamp = (datetime.now() - timedelta(minutes=minutes_ago)).strftime('%H:%M:%S')
+    return f'[{stamp}] [Server thread/INFO]: {message}\n'
+
+
+def capture_file(app_module, server_name):
+    return os.path.join(app_module.SERVERS_DIR, server_name, 'logs', app_module.CONSOLE_CAPTURE_FILE)
+
+
+def test_rotation_renames_the_capture_into_a_segment(app_module, server_name):
+    log_file = capture_file(app_module, server_name)
+    content = log_line(20, 'Alice joined the game') + log_line(10, 'Bob joined the game') + log_line(5, 'Alice left the game')
+    with open(log_file, 'w') as f:
+        f.write(content)
+
+    entry = app_module.console_log_rotator.rotate(server_name)
+
+    assert not os.path.exists(log_file)  # Stopped server: nobody reopens it until the next start
+    segment_path = os.path.join(os.path.dirname(log_file), app_module.CONSOLE_SEGMENT_DIR, entry['file'])
+    with gzip.open(segment_path, 'rt') as f:
+        assert f.read() == content
+    assert entry['bytes'] == len(content.encode())
+    assert entry['online_at_end'] == ['Bob']
+    assert app_module.console_log_rotator.load_index(server_name)['segments'] == [entry]
+
+
+def test_rotation_has_screen_reopen_the_capture_of_a_running_server(app_module, server_name, monkeypatch):
+    log_file = capture_file(app_module, server_name)
+    with open(log_file, 'w') as f:
+        f.write(log_line(1, 'Done'))
+    reopened = []
+    monkeypatch.setattr(app_module, 'is_server_running', lambda name: True)
+    monkeypatch.setattr(app_module.ConsoleLogRotator, '_reopen_screen_log',
+                        staticmethod(lambda name: reopened.append(name) or open(log_file, 'w').close()))
+
+    entry = app_module.console_log_rotator.rotate(server_name)
+
+    assert reopened == [server_name]
+    assert entry['lines'] == 1
+    assert os.path.getsize(log_file) == 0
+
+
+def test_latest_log_is_left_to_minecraft(app_module, server_name):
+    latest_log = os.path.join(app_module.SERVERS_DIR, server_name, 'logs', 'latest.log')
+    with open(latest_log, 'w') as f:
+        f.write(log_line(1, 'Done'))
+    rotator = app_module.ConsoleLogRotator(max_bytes=1, max_age=0, keep_segments=10)
+    assert rotator.maybe_rotate(server_name) is None
+    assert os.path.getsize(latest_log) > 0
+
+
+def test_automatic_rotation_can_be_turned_off(app_module):
+    rotator = app_module.ConsoleLogRotator(max_bytes=1, max_age=0, keep_segments=10, enabled=False)
+    rotator.start()
+    assert not rotator._started
+    assert app_module.ConsoleLogRotator(max_bytes=1, max_age=0, keep_segments=10).enabled
@@ -0,0 +1,66 @@
+import os
+
+
+def write(path, text, mode='a'):
+    with open(path, mode) as f:
+        f.write(text)
+
+
+def test_first_read_returns_only_the_tail(app_module, tmp_path):
+    log_file = str(tmp_path / 'latest.log')
+    write(log_file, ''.join(f'line {i}\n' for i in range(100)), 'w')
+    lines, cursor, reset = app_module.read_log_increment(log_file, tail_bytes=30)
+    assert reset
+    # The tail starts mid-line, which is skipped.
+    assert lines == ['line 97\n', 'line 98\n', 'line 99\n']
+    assert cursor == f'{os.stat(log_file).st_ino}:{os.path.getsize(log_file)}'
+
+
+def test_reads_only_new_complete_lines(app_module, tmp_path):
+    log_file = str(tmp_path / 'latest.log')
+    write(log_file, 'first\n', 'w')
+    _, cursor, _ = app_module.read_log_increment(log_file)
+
+    write(log_file, 'second\nthi')
+    lines, cursor, reset = app_module.read_log_increment(log_file, cursor)
+    assert (lines, reset) == (['second\n'], False)
+
+    # The partial line is handed out once it is complete.
+    write(log_file, 'rd\n')
+    lines, cursor, reset = app_module.read_log_increment(log_file, cursor)
+    assert (lines, reset) == (['third\n'], False)
+
+    lines, _, reset = app_module.read_log_increment(log_file, cursor)
+    assert (lines, reset) == ([], False)
+
+
+def test_rotated_log_starts_over_at_the_beginning(app_module, tmp_path):
+    log_file = str(tmp_path / 'latest.log')
+    write(log_file, 'old 1\nold 2\n', 'w')
+    _, cursor, _ = app_module.read_log_increment(log_file)
+
+    os.rename(log_file, str(tmp_path / 'rotated.log'))
+    write(log_file, 'new 1\n', 'w')
+    lines, cursor, reset = app_module.read_log_increment(log_file, cursor)
+    assert reset
+    assert lines == ['new 1\n']
+    assert cursor.startswith(f'{os.stat(log_file).st_ino}:')
+
+
+def test_truncated_log_starts_over_at_the_beginning(app_module, tmp_path):
+    log_file = str(tmp_path / 'latest.log')
+    write(log_file, 'a long line before truncation\n', 'w')
+    _, cursor, _ = app_module.read_log_increment(log_file)
+
+    write(log_file, 'short\n', 'w')
+    lines, _, reset = app_module.read_log_increment(log_file, cursor)
+    assert reset
+    assert lines == ['short\n']
+
+
+def test_invalid_cursor_is_treated_as_none(app_module, tmp_path):
+    log_file = str(tmp_path / 'latest.log')
+    write(log_file, 'only line\n', 'w')
+    lines, _, reset = app_module.read_log_increment(log_file, 'not-a-cursor')
+    assert reset
+    assert lines == ['only line\n']
@@ -0,0 +1,58 @@
+import gzip
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+
+LOG = ''.join(f'[11:59:{i:02d}] [Server thread/INFO]: line {i}\n' for i in range(10))
+LOG += '[12:00:00] [Server thread/INFO]: hello\n'
+LOG += '[12:00:01] [Server thread/WARN]: world\n'
+
+
+def write_log(tmp_path, name='latest.log'):
+    path = str(tmp_path / name)
+    opener = gzip.open if name.endswith('.gz') else open
+    with opener(path, 'wt') as f:
+        f.write(LOG)
+    return path
+
+
+def lines_found(app_module, path, pattern, ignore_case=False, context=0, limit=100):
+    return [match['line'] for match in app_module.search_log_file(path, pattern, ignore_case, context, limit)]
+
+
+def test_plain_search_reports_matching_lines_with_context(app_module, tmp_path):
+    path = write_log(tmp_path)
+    matches = app_module.search_log_file(path, 'HELLO', True, 1, 100)
+    assert [(match['line'], match['before'], match['after']) for match in matches] == [
+        (11, ['[11:59:09] [Server thread/INFO]: line 9'], ['[12:00:01] [Server thread/WARN]: world'])
+    ]
+
+
+def test_anchored_patterns_match_at_every_line(app_module, tmp_path):
+    for name in ('latest.log', '2024-01-01-1.log.gz'):
+        path = write_log(tmp_path, name)
+        assert lines_found(app_module, path, r'^\[12:00') == [11, 12]
+        assert lines_found(app_module, path, r'line 3$') == [4]
+        assert lines_found(app_module, path, r'\A\[11:59:05\]') == [6]
+
+
+def test_search_stops_at_the_limit(app_module, tmp_path):
+    path = write_log(tmp_path)
+    assert lines_found(app_module, path, 'INFO', limit=3) == [1, 2, 3]
+
+
+def test_search_runs_on_the_worker_processes(app_module, tmp_path):
+    path = write_log(tmp_path, '2024-01-01-1.log.gz')
+    future = app_module.submit_log_work(app_module.search_log_file, path, 'world', False, 0, 100)
+    assert [match['line'] for match in future.result(timeout=60)] == [12]
+
+
+def test_worker_pool_is_replaced_after_a_worker_dies(app_module, tmp_path):
+    path = write_log(tmp_path)
+    crashed = app_module.submit_log_work(os._exit, 1)
+    with pytest.raises(BrokenProcessPool):
+        crashed.result(timeout=60)
+    future = app_module.submit_log_work(app_module.search_log_file, path, 'hello', False, 0, 100)
+    assert [match['line'] for match in future.result(timeout=60)] == [11]
@@ -0,0 +1,43 @@
+import os
+import time
+
+
+def test_new_files_start_with_the_format_header(app_module, server_name):
+    store = app_module.MetricsStore()
+    now = int(time.time())
+    store.record(server_name, now, {'cpu_percent': 12.5, 'players': 3})
+
+    with open(store._path(server_name, 'raw'), 'rb') as f:
+        header = f.read(app_module.METRIC_HEADER.size)
+    assert app_module.METRIC_HEADER.unpack(header) == (
+        app_module.METRIC_MAGIC, app_module.METRIC_FORMAT_VERSION, len(app_module.METRIC_NAMES))
+    records = store._read_range(server_name, 'raw', now, now + 1)
+    assert [(record[0], record[2], record[6]) for record in records] == [(now, 12.5, 3.0)]
+
+
+def test_files_in_another_format_are_moved_aside(app_module, server_name):
+    store = app_module.MetricsStore()
+    path = store._path(server_name, 'raw')
+    os.makedirs(os.path.dirname(path))
+    with open(path, 'wb') as f:
+        f.write(b'\0' * app_module.METRIC_RECORD.size * 3)
+
+    now = int(time.time())
+    store.record(server_name, now, {'players': 1})
+
+    assert os.path.getsize(path + '.incompatible') == app_module.METRIC_RECORD.size * 3
+    assert len(store._read_range(server_name, 'raw', 0, now + 1)) == 1
+
+
+def test_expiry_runs_when_a_minute_closes(app_module, server_name, monkeypatch):
+    store = app_module.MetricsStore()
+    expired = []
+    monkeypatch.setattr(store, '_expire', lambda server, tier, retention: expired.append(tier))
+    minute = int(time.time()) // 3600 * 3600
+
+    for second in range(0, 60, 5):
+        store.record(server_name, minute + second, {'players': 1})
+    assert expired == []
+
+    store.record(server_name, minute + 60, {'players': 1})
+    assert expired == ['1m', 'raw']
@@ -0,0 +1,98 @@
+import sqlite3
+from threading import Thread
+
+
+def schema(db_file):
+    conn = sqlite3.connect(db_file)
+    try:
+        return sorted(conn.execute("SELECT type, name, sql FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'"))
+    finally:
+        conn.close()
+
+
+def pragma(db_file, name):
+    conn = sqlite3.connect(db_file)
+    try:
+        return conn.execute(f'PRAGMA {name}').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_fresh_database_gets_every_migration(app_module, fresh_db):
+    assert pragma(fresh_db, 'user_version') == app_module.SCHEMA_MIGRATIONS[-1][0]
+    assert pragma(fresh_db, 'journal_mode') == 'wal'
+    index_names = {name for kind, name, _ in schema(fresh_db) if kind == 'index'}
+    assert {'idx_user_server_permissions_server', 'idx_group_server_permissions_server',
+            'idx_user_group_memberships_group'} <= index_names
+
+
+def test_applied_migrations_are_skipped(app_module, fresh_db, monkeypatch):
+    applied = []
+    monkeypatch.setattr(app_module, 'SCHEMA_MIGRATIONS', [
+        (version, lambda c, version=version: applied.append(version))
+        for version, _ in app_module.SCHEMA_MIGRATIONS
+    ])
+    before = schema(fresh_db)
+    app_module.init_db()
+    assert applied == []
+    assert schema(fresh_db) == before
+
+
+def test_unversioned_database_is_upgraded_in_place(app_module, fresh_db):
+    app_module.create_user('alice', 'pw', 'user')
+    before = schema(fresh_db)
+    # A database created before migrations were versioned has the tables but no version.
+    conn = sqlite3.connect(fresh_db)
+    conn.execute('PRAGMA user_version = 0')
+    conn.commit()
+    conn.close()
+
+    app_module.init_db()
+
+    assert pragma(fresh_db, 'user_version') == app_module.SCHEMA_MIGRATIONS[-1][0]
+    assert schema(fresh_db) == before
+    assert app_module.get_user_by_username('alice') is not None
+
+
+def test_failed_migration_is_rolled_back(app_module, fresh_db, monkeypatch):
+    def broken(c):
+        c.execute('CREATE TABLE half_done (id INTEGER)')
+        raise RuntimeError('boom')
+
+    version = app_module.SCHEMA_MIGRATIONS[-1][0] + 1
+    monkeypatch.setattr(app_module, 'SCHEMA_MIGRATIONS', app_module.SCHEMA_MIGRATIONS + [(version, broken)])
+    try:
+        app_module.init_db()
+    except RuntimeError:
+        pass
+    assert pragma(fresh_db, 'user_version') == version - 1
+    assert 'half_done' not in {name for _, name, _ in schema(fresh_db)}
+
+
+def test_request_threads_reuse_pooled_connections(app_module, fresh_db):
+    used = []
+
+    def request():
+        conn = app_module.get_db_connection()
+        used.append(conn)
+        conn.execute('SELECT 1')
+        conn.close()
+
+    # Like werkzeug's threaded server: every request runs on a new thread.
+    for _ in range(5):
+        thread = Thread(target=request)
+        thread.start()
+        thread.join()
+    assert all(conn is used[0] for conn in used)
+
+
+def test_returned_connection_has_no_open_transaction(app_module, fresh_db):
+    conn = app_module.get_db_connection()
+    conn.execute("INSERT INTO user_groups (name) VALUES ('uncommitted')")
+    conn.close()
+    conn = app_module.get_db_connection()
+    try:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM user_groups").fetchone()[0] == 0
+    finally:
+        conn.close()
@@ -0,0 +1,47 @@
+from datetime import datetime
+
+
+def store_sessions(app_module, server_name, sessions, with_occupancy):
+    batch = app_module.new_analytics_batch({'open_sessions': {}, 'last_event_time': None,
+                                            'first_event_time': None, 'checkpoint': {'inode': None, 'offset': 0}})
+    batch['sessions'] = [{'player': player, 'join_time': join_time, 'leave_time': leave_time,
+                          'duration': leave_time - join_time} for player, join_time, leave_time in sessions]
+    conn = app_module.get_db_connection()
+    try:
+        app_module.save_analytics(conn, server_name, batch, save_state=False)
+        if not with_occupancy:
+            conn.execute("DELETE FROM analytics_occupancy WHERE server_name = ?", (server_name,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def player_seconds(app_module, server_name):
+    occupancy = app_module.query_occupancy(server_name, percentiles=())
+    return sum(hour['player_seconds'] for hour in occupancy['hours'])
+
+
+def test_sessions_from_before_the_rollup_are_binned_once(app_module, fresh_db, server_name):
+    day = int(datetime(2024, 3, 4).timestamp())
+    # Stored by a version without the rollup.
+    store_sessions(app_module, server_name, [('Alice', day + 3600, day + 7200)], with_occupancy=False)
+    conn = app_module.get_db_connection()
+    conn.execute('PRAGMA user_version = 2')
+    conn.commit()
+    conn.close()
+    app_module.init_db()
+
+    # A refresh closes a session before anyone looks at the peak hours.
+    store_sessions(app_module, server_name, [('Bob', day + 10800, day + 11400)], with_occupancy=True)
+
+    assert player_seconds(app_module, server_name) == 3600 + 600
+    # The rebuild doesn't happen again, so later sessions aren't counted twice.
+    store_sessions(app_module, server_name, [('Carol', day + 14400, day + 15000)], with_occupancy=True)
+    assert player_seconds(app_module, server_name) == 3600 + 600 + 600
+
+
+def test_new_servers_are_not_queued_for_a_rebuild(app_module, fresh_db, server_name):
+    day = int(datetime(2024, 3, 4).timestamp())
+    store_sessions(app_module, server_name, [('Alice', day, day + 60)], with_occupancy=False)
+    app_module.init_db()
+    assert app_module.query_occupancy(server_name) is None
@@ -0,0 +1,90 @@
+import pytest
+
+
+@pytest.fixture
+def admin_client(app_module, fresh_db):
+    app_module.create_user('admin', 'secret', 'admin')
+    client = app_module.app.test_client()
+    assert client.post('/api/auth/login', json={'username': 'admin', 'password': 'secret'}).status_code == 200
+    return client
+
+
+def user_id(app_module, username):
+    conn = app_module.get_db_connection()
+    try:
+        return conn.execute('SELECT id FROM users WHERE username = ?', (username,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def granted(app_module, mask):
+    return {name for name in app_module.PERMISSION_FLAGS if app_module.has_permission(mask, name)}
+
+
+def test_mask_round_trips_through_the_dict_form(app_module):
+    permissions = {name: False for name in app_module.PERMISSION_COLUMNS}
+    permissions.update(can_view_logs=True, can_manage_worlds=True, can_delete=True)
+    mask = app_module.permissions_to_mask(permissions)
+    assert app_module.permissions_to_dict(mask) == permissions
+    assert granted(app_module, mask) == {'can_view_logs', 'can_manage_worlds', 'can_delete'}
+
+
+def test_direct_group_and_wildcard_permissions_are_combined(app_module, admin_client):
+    app_module.create_user('bob', 'pw', 'user')
+    bob = user_id(app_module, 'bob')
+    group = admin_client.post('/api/admin/groups', json={'name': 'moderators'}).get_json()['id']
+    assert admin_client.post(f'/api/admin/groups/{group}/members', json={'user_id': bob}).status_code == 201
+
+    admin_client.put(f'/api/admin/servers/alpha/permissions/users/{bob}', json={'can_view_logs': True})
+    admin_client.put(f'/api/admin/servers/alpha/permissions/groups/{group}', json={'can_start_server': True})
+    admin_client.put(f'/api/admin/servers/*/permissions/groups/{group}', json={'can_view_analytics': True})
+
+    resolved = app_module.resolve_user_permissions(bob, ['alpha', 'beta'])
+    assert granted(app_module, resolved['alpha']) == {'can_view_logs', 'can_start_server', 'can_view_analytics'}
+    assert granted(app_module, resolved['beta']) == {'can_view_analytics'}
+
+
+def test_cached_permissions_follow_changes(app_module, admin_client):
+    app_module.create_user('bob', 'pw', 'user')
+    bob = user_id(app_module, 'bob')
+    assert app_module.get_user_permission_mask(bob, 'alpha') == 0
+
+    admin_client.put(f'/api/admin/servers/alpha/permissions/users/{bob}', json={'can_edit_files': True})
+    assert granted(app_module, app_module.get_user_permission_mask(bob, 'alpha')) == {'can_edit_files'}
+
+    admin_client.delete(f'/api/admin/servers/alpha/permissions/users/{bob}')
+    assert app_module.get_user_permission_mask(bob, 'alpha') == 0
+
+
+def test_granular_permission_can_be_revoked_while_a_legacy_one_is_set(app_module, admin_client):
+    app_module.create_user('bob', 'pw', 'user')
+    bob = user_id(app_module, 'bob')
+    # A row from before the granular permissions, after the baseline migration copied them over.
+    conn = app_module.get_db_connection()
+    try:
+        conn.execute('''
+            INSERT INTO user_server_permissions (user_id, server_name, can_edit_config, can_edit_files, can_manage_plugins)
+            VALUES (?, 'alpha', 1, 1, 1)
+        ''', (bob,))
+        conn.execute(f"UPDATE user_server_permissions SET permission_mask = {app_module.permission_mask_sql()}")
+        conn.commit()
+    finally:
+        conn.close()
+    app_module.permission_cache.bump()
+    assert app_module.has_permission(app_module.get_user_permission_mask(bob, 'alpha'), 'can_edit_files')
+
+    admin_client.put(f'/api/admin/servers/alpha/permissions/users/{bob}', json={'can_manage_plugins': True})
+
+    mask = app_module.get_user_permission_mask(bob, 'alpha')
+    assert not app_module.has_permission(mask, 'can_edit_files')
+    assert app_module.has_permission(mask, 'can_manage_plugins')
+
+
+def test_permission_decorator_checks_the_resolved_mask(app_module, admin_client):
+    app_module.create_user('bob', 'pw', 'user')
+    bob = user_id(app_module, 'bob')
+    admin_client.put(f'/api/admin/servers/alpha/permissions/users/{bob}', json={'can_view_logs': True})
+    client = app_module.app.test_client()
+    client.post('/api/auth/login', json={'username': 'bob', 'password': 'pw'})
+    assert client.get('/api/servers/beta/logs/segments').status_code == 403
+    assert client.get('/api/servers/alpha/logs/segments').status_code != 403
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import os
+import socket
+from threading import Thread
+
+import pytest
+
+
+class FakeSlpResponder:
+    """Answers Server List Pings on localhost with a fixed status and counts the connections."""
+
+    def __init__(self, app_module, status):
+        self.app = app_module
+        self.status = status
+        self.connections = 0
+        self._sock = socket.create_server(('127.0.0.1', 0))
+        self.port = self._sock.getsockname()[1]
+        Thread(target=self._serve, daemon=True).start()
+
+    def close(self):
+        self._sock.close()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def _read_varint(stream):
+        value = 0
+        for shift in range(0, 35, 7):
+            byte = stream.read(1)[0]
+            value |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return value
+        raise ValueError('VarInt is too big')
+
+    def _read_packet(self, stream):
+        data = stream.read(self._read_varint(stream))
+        packet_id, offset = self.app._decode_varint(data)
+        return packet_id, data[offset:]
+
+    def _handle(self, conn):
+        with conn, conn.makefile('rb') as stream:
+            packet_id, handshake = self._read_packet(stream)
+            assert packet_id == 0x00 and handshake[-1] == 1  # Next state: status
+            packet_id, _ = self._read_packet(stream)
+            assert packet_id == 0x00
+            body = json.dumps(self.status).encode('utf-8')
+            conn.sendall(self.app._encode_packet(0x00, self.app._encode_varint(len(body)) + body))
+            packet_id, payload = self._read_packet(stream)
+            assert packet_id == 0x01
+            conn.sendall(self.app._encode_packet(0x01, payload))
+
+
+STATUS = {
+    'version': {'name': '1.20.4', 'protocol': 765},
+    'players': {'max': 20, 'online': 3},
+    'description': {'text': '§aHello ', 'extra': [{'text': 'world'}]}
+}
+
+
+@pytest.fixture
+def responder(app_module):
+    fake = FakeSlpResponder(app_module, STATUS)
+    yield fake
+    fake.close()
+
+
+def test_varint_round_trip(app_module):
+    for value in (0, 1, 127, 128, 25565, 2 ** 31 - 1, -1):
+        decoded, offset = app_module._decode_varint(app_module._encode_varint(value))
+        assert decoded == value & 0xFFFFFFFF
+        assert offset == len(app_module._encode_varint(value))
+
+
+def test_ping_parses_status(app_module, responder):
+    result = asyncio.run(app_module.ping_minecraft_server('127.0.0.1', responder.port))
+    assert result['online'] is True
+    assert result['players_online'] == 3
+    assert result['max_players'] == 20
+    assert result['motd'] == 'Hello world'
+    assert result['version'] == '1.20.4'
+    assert result['protocol'] == 765
+    assert result['latency'] >= 0
+
+
+def test_pinger_caches_results(app_module, responder, server_name):
+    with open(os.path.join(app_module.SERVERS_DIR, server_name, 'server.properties'), 'w') as f:
+        f.write(f'server-port={responder.port}\n')
+    pinger = app_module.ServerListPinger(cache_ttl=60, timeout=2)
+    first = pinger.get_status(server_name)
+    second = pinger.get_status(server_name)
+    assert first['online'] and first['players_online'] == 3
+    assert second == first
+    assert responder.connections == 1
+
+
+def test_pinger_reports_unreachable_server(app_module, server_name):
+    unused = socket.create_server(('127.0.0.1', 0))
+    port = unused.getsockname()[1]
+    unused.close()
+    with open(os.path.join(app_module.SERVERS_DIR, server_name, 'server.properties'), 'w') as f:
+        f.write(f'server-port={port}\n')
+    result = app_module.ServerListPinger(cache_ttl=60, timeout=1).get_status(server_name)
+    assert result['online'] is False
+    assert result['error']
@@ -0,0 +1,57 @@
+import gzip
+import os
+from datetime import datetime, timedelta
+
+
+def log_line(minutes_ago, message):
+    stamp = (datetime.now() - timedelta(minutes=minutes_ago)).strftime('%H:%M:%S')
+    return f'[{stamp}] [Server thread/INFO]: {message}\n'
+
+
+def sessions(app_module, server_name):
+    conn = app_module.get_db_connection()
+    try:
+        return conn.execute(
+            "SELECT player, duration FROM analytics_sessions WHERE server_name = ? ORDER BY join_time",
+            (server_name,)).fetchall()
+    finally:
+        conn.close()
+
+
+def test_refresh_only_reads_new_lines(app_module, fresh_db, server_name):
+    log_file = os.path.join(app_module.SERVERS_DIR, server_name, 'logs', 'latest.log')
+    with open(log_file, 'w') as f:
+        f.write(log_line(30, 'Starting minecraft server version 1.20.4') + log_line(20, 'Alice joined the game'))
+    assert list(app_module.parse_log_for_sessions(server_name)['open_sessions']) == ['Alice']
+
+    with open(log_file, 'a') as f:
+        f.write(log_line(10, 'Alice left the game'))
+    assert app_module.parse_log_for_sessions(server_name)['sessions_added'] == 1
+    assert app_module.parse_log_for_sessions(server_name)['sessions_added'] == 0
+    assert sessions(app_module, server_name) == [('Alice', 600)]
+
+
+def test_refresh_finishes_the_log_minecraft_archived(app_module, fresh_db, server_name):
+    log_dir = os.path.join(app_module.SERVERS_DIR, server_name, 'logs')
+    log_file = os.path.join(log_dir, 'latest.log')
+    with open(log_file, 'w') as f:
+        f.write(log_line(40, 'Starting minecraft server version 1.20.4') + log_line(30, 'Alice joined the game'))
+    app_module.parse_log_for_sessions(server_name)
+
+    # Written after the refresh, then the server restarts and Minecraft archives the log.
+    with open(log_file, 'a') as f:
+        f.write(log_line(20, 'Alice left the game') + log_line(15, 'Bob joined the game')
+                + log_line(12, 'Bob left the game') + log_line(11, 'Stopping the server'))
+    with open(log_file, 'rb') as source, gzip.open(os.path.join(log_dir, f"{datetime.now():%Y-%m-%d}-1.log.gz"), 'wb') as archive:
+        archive.write(source.read())
+    with open(log_file + '.new', 'w') as f:
+        f.write(log_line(10, 'Starting minecraft server version 1.20.4')
+                + log_line(5, 'Carol joined the game') + log_line(2, 'Carol left the game'))
+    os.replace(log_file + '.new', log_file)
+
+    summary = app_module.parse_log_for_sessions(server_name)
+
+    assert summary['sessions_added'] == 3
+    assert sessions(app_module, server_name) == [('Alice', 600), ('Bob', 180), ('Carol', 180)]
+    assert summary['checkpoint']['inode'] == os.stat(log_file).st_ino
+    assert app_module.parse_log_for_sessions(server_name)['sessions_added'] == 0
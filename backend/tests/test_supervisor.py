@@ -0,0 +1,33 @@
+import os
+import sys
+import uuid
+
+
+def fake_java(tmp_path):
+    """A python interpreter the supervisor sees as a java process."""
+    path = tmp_path / 'java'
+    os.symlink(sys.executable, path)
+    return str(path)
+
+
+def test_server_is_down_when_its_jvm_exits_under_a_lingering_session(app_module, tmp_path):
+    server_name = f'test-{uuid.uuid4().hex[:8]}'
+    # Like a start script that waits at a prompt after the server stops.
+    script = f"'{fake_java(tmp_path)}' -c 'import time; time.sleep(1)'; sleep 60"
+    pid = app_module.supervisor.launch(server_name, ['bash', '-c', script])
+
+    assert app_module.supervisor.wait_for_exit(server_name, timeout=30)
+    state = app_module.supervisor.get_state(server_name)
+    assert (state['state'], state['pid']) == (app_module.SERVER_STATE_CRASHED, pid)
+    assert not app_module.psutil.pid_exists(pid)
+
+
+def test_sessions_gone_since_the_snapshot_are_not_adopted(app_module, monkeypatch):
+    server_name = f'test-{uuid.uuid4().hex[:8]}'
+    registry = app_module.ScreenSessionRegistry(ttl=60)
+    snapshots = iter([{app_module.get_screen_session_name(server_name): 2 ** 22 + 1}, {}])
+    monkeypatch.setattr(registry, '_take_snapshot', lambda: next(snapshots))
+    monkeypatch.setattr(app_module, 'screen_registry', registry)
+
+    assert app_module.is_server_running(server_name) is False
+    assert app_module.supervisor.get_state(server_name) is None
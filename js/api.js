@@ -46,10 +46,26 @@
         });
     }
 
+    // Polls a lifecycle job (start/stop/restart) until it has finished and returns it.
+    async function waitForJob(jobId, intervalMs = 1000) {
+        while (true) {
+            const response = await authenticatedFetch(`/api/jobs/${jobId}`);
+            const job = await response.json();
+            if (!response.ok) {
+                throw new Error(job.error || 'Failed to fetch job status.');
+            }
+            if (job.state === 'succeeded' || job.state === 'failed') {
+                return job;
+            }
+            await new Promise(resolve => setTimeout(resolve, intervalMs));
+        }
+    }
+
     window.MineServerGUI = window.MineServerGUI || {};
     window.MineServerGUI.getApiBaseUrl = getApiBaseUrl;
     window.MineServerGUI.buildApiUrl = buildApiUrl;
     window.MineServerGUI.authenticatedFetch = authenticatedFetch;
+    window.MineServerGUI.waitForJob = waitForJob;
     window.MineServerGUI.setApiBaseUrl = (baseUrl) => {
         const normalized = normalizeBaseUrl(baseUrl);
         if (!normalized) {
@@ -346,7 +346,8 @@ document.addEventListener('DOMContentLoaded', async function () {
 
     let currentPath = '.';
     let selectedFiles = new Set();
-    let currentLogLine = 0;
+    let logCursor = null; // Opaque byte cursor returned by /log
+    let clearLogViewOnNextLines = true;
     let isLogAutoscrollEnabled = true;
     let currentServerState = {};
     let pollingInterval;
@@ -364,6 +365,7 @@ document.addEventListener('DOMContentLoaded', async function () {
         if (pollingInterval) {
             clearInterval(pollingInterval);
             pollingInterval = null;
+            closeLogStream();
             console.log('[POLL] Polling stopped.');
         }
     };
@@ -522,7 +524,8 @@ document.addEventListener('DOMContentLoaded', async function () {
         // When starting, clear the old logs from the view for a fresh start.
         if (action === 'start') {
             logOutputEl.innerHTML = '<p class="text-body-secondary">[Starting server...]</p>';
-            currentLogLine = 0;
+            // The cursor is kept: the backend notices the log rotation on startup and resets it.
+            clearLogViewOnNextLines = true;
         }
 
         console.log(`[ACTION] User triggered '${action}' for server '${serverId}'.`);
@@ -540,8 +543,14 @@ document.addEventListener('DOMContentLoaded', async function () {
             if (!response.ok) {
                 throw new Error(data.error || `Failed to ${action} server.`);
             }
+
+            // The action runs as a background job; wait for its outcome.
+            const job = await window.MineServerGUI.waitForJob(data.job_id);
+            if (job.state === 'failed') {
+                throw new Error((job.result && job.result.error) || `Failed to ${action} server.`);
+            }
             
-            console.log(`[API SUCCESS] Action '${action}' completed:`, data.message);
+            console.log(`[API SUCCESS] Action '${action}' completed:`, job.result && job.result.message);
 
         } catch (error) {
             console.error(`[CLIENT ERROR] Error during '${action}' action:`, error);
@@ -828,35 +837,129 @@ document.addEventListener('DOMContentLoaded', async function () {
         return cleanedLine;
     };
 
+    const appendLogLines = (lines, reset) => {
+        // The log was rotated or truncated, so what is on screen belongs to the old file.
+        if (reset) clearLogViewOnNextLines = true;
+
+        if (lines && lines.length > 0) {
+            // Clear the "loading" message (or the old file's lines) once new lines arrive.
+            if (clearLogViewOnNextLines) {
+                logOutputEl.innerHTML = '';
+                clearLogViewOnNextLines = false;
+            }
+            lines.forEach(line => {
+                const cleanedLine = cleanLogLine(line);
+                // Don't render empty lines or standalone console prompts
+                if (cleanedLine.trim() === '' || cleanedLine.trim() === '>') {
+                    return;
+                }
+                const p = document.createElement('p');
+                p.textContent = cleanedLine;
+                logOutputEl.appendChild(p);
+            });
+            // Auto-scroll to the bottom
+            logOutputEl.scrollTop = logOutputEl.scrollHeight;
+        }
+    };
+
+    // --- Live log stream (SSE), with /log polling as the fallback ---
+    let logStream = null;
+    let logStreamEventId = null; // Resume cursor when the stream is reopened
+    let logStreamUnsupported = false;
+
+    const openLogStream = () => {
+        if (logStream || logStreamUnsupported || typeof EventSource === 'undefined') return;
+        const query = logStreamEventId ? `?cursor=${encodeURIComponent(logStreamEventId)}` : '';
+        const stream = new EventSource(`${API_URL}/api/servers/${serverId}/log/stream${query}`, { withCredentials: true });
+        let opened = false;
+        stream.onopen = () => { opened = true; };
+        stream.addEventListener('log', (event) => {
+            logStreamEventId = event.lastEventId;
+            const data = JSON.parse(event.data);
+            appendLogLines(data.lines, data.reset);
+        });
+        stream.onerror = () => {
+            // The browser reconnects on its own (resuming via Last-Event-ID) unless the request
+            // itself was rejected, e.g. by a backend without the stream endpoint.
+            if (stream.readyState === EventSource.CLOSED) {
+                if (!opened) {
+                    console.warn('[LOG] Log stream unavailable, falling back to polling.');
+                    logStreamUnsupported = true;
+                }
+                closeLogStream();
+            }
+        };
+        logStream = stream;
+    };
+
+    const closeLogStream = () => {
+        if (logStream) {
+            logStream.close();
+            logStream = null;
+        }
+    };
+
+    // --- Level filter, served from the backend's structured log event index ---
+    const logLevelFilterEl = document.getElementById('log-level-filter');
+    let logLevelFilter = '';
+    let lastFilteredOffset = null;
+
+    const fetchFilteredLogs = async () => {
+        try {
+            const response = await authenticatedFetch(`${API_URL}/api/servers/${serverId}/logs/events?level=${encodeURIComponent(logLevelFilter)}&limit=500`);
+            const data = await response.json();
+            if (!response.ok) throw new Error(data.error || data.msg || `Server returned status ${response.status}`);
+
+            const events = data.events || [];
+            const newestOffset = events.length ? events[events.length - 1].offset : -1;
+            if (newestOffset === lastFilteredOffset) return; // Nothing new matched
+            lastFilteredOffset = newestOffset;
+
+            logOutputEl.innerHTML = '';
+            clearLogViewOnNextLines = false;
+            if (events.length === 0) {
+                logOutputEl.innerHTML = '<p class="text-body-secondary">[No matching log entries]</p>';
+                return;
+            }
+            events.forEach(event => appendLogLines(event.text.split('\n'), false));
+        } catch (error) {
+            console.warn('Failed to fetch filtered logs:', error);
+        }
+    };
+
+    logLevelFilterEl.addEventListener('change', () => {
+        logLevelFilter = logLevelFilterEl.value;
+        lastFilteredOffset = null;
+        logOutputEl.innerHTML = '<p class="text-body-secondary">[Loading server logs...]</p>';
+        // Either way the view is rebuilt from scratch.
+        closeLogStream();
+        logCursor = null;
+        logStreamEventId = null;
+        clearLogViewOnNextLines = true;
+        fetchLogs();
+    });
+
     const fetchLogs = async () => {
+        if (logLevelFilter) {
+            await fetchFilteredLogs();
+            return;
+        }
+        if (logStream) return; // Lines are pushed by the stream
+        if (!logStreamUnsupported && typeof EventSource !== 'undefined') {
+            openLogStream();
+            return;
+        }
         try {
-            const response = await authenticatedFetch(`${API_URL}/api/servers/${serverId}/log?since=${currentLogLine}`);
+            const query = logCursor ? `?cursor=${encodeURIComponent(logCursor)}` : '';
+            const response = await authenticatedFetch(`${API_URL}/api/servers/${serverId}/log${query}`);
             if (!response.ok) throw new Error(`Server returned status ${response.status}`);
             
             const data = await response.json();
 
             if (data.error) throw new Error(data.error);
 
-            if (data.lines && data.lines.length > 0) {
-                // If this is the first fetch, clear the "loading" message.
-                if (currentLogLine === 0) {
-                    logOutputEl.innerHTML = '';
-                }
-                data.lines.forEach(line => {
-                    const cleanedLine = cleanLogLine(line);
-                    // Don't render empty lines or standalone console prompts
-                    if (cleanedLine.trim() === '' || cleanedLine.trim() === '>') {
-                        return;
-                    }
-                    const p = document.createElement('p');
-                    p.textContent = cleanedLine;
-                    logOutputEl.appendChild(p);
-                });
-                // Auto-scroll to the bottom
-                logOutputEl.scrollTop = logOutputEl.scrollHeight;
-            }
-            
-            currentLogLine = data.line_count;
+            appendLogLines(data.lines, data.reset);
+            logCursor = data.cursor;
 
         } catch (error) {
             console.warn('Failed to fetch logs:', error);
@@ -894,7 +997,8 @@ document.addEventListener('DOMContentLoaded', async function () {
             
             // Clear the log display in the UI
             logOutputEl.innerHTML = '<p class="text-success m-0">[Logs cleared]</p>';
-            currentLogLine = 0; // Reset the line counter
+            logCursor = null; // Start over from the tail of the (now empty) log
+            clearLogViewOnNextLines = true;
             
         } catch (error) {
             console.error('Error clearing logs:', error);
@@ -1008,13 +1112,24 @@ document.addEventListener('DOMContentLoaded', async function () {
 
         consoleInputEl.disabled = true;
         try {
-            await authenticatedFetch(`${API_URL}/api/servers/${serverId}/console`, {
+            const response = await authenticatedFetch(`${API_URL}/api/servers/${serverId}/console`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({ command }),
             });
+            const data = await response.json();
             consoleInputEl.value = '';
 
+            // Commands sent over RCON return their output, which never shows up in the log.
+            if (data.response) {
+                const p = document.createElement('p');
+                p.className = 'text-info';
+                p.textContent = `> ${command}\n${data.response.replace(/\u00A7./g, '')}`; // Strip § formatting codes
+                p.style.whiteSpace = 'pre-wrap';
+                logOutputEl.appendChild(p);
+                logOutputEl.scrollTop = logOutputEl.scrollHeight;
+            }
+
         } catch (error) {
             console.error('Command send error:', error);
         } finally {
@@ -1419,8 +1534,11 @@ document.addEventListener('DOMContentLoaded', async function () {
         isLogAutoscrollEnabled = logAutoscrollSwitch.checked;
         localStorage.setItem(`mc_log_autoscroll_${serverId}`, isLogAutoscrollEnabled);
         // If we just re-enabled it, fetch the latest logs immediately.
+        // While paused the stream is closed, and resumes from its last event when reopened.
         if (isLogAutoscrollEnabled) {
             fetchLogs();
+        } else {
+            closeLogStream();
         }
     });
 
@@ -2517,12 +2635,17 @@ document.addEventListener('DOMContentLoaded', async function () {
         }
     };
     
+    let onlinePlayersVersion = null;
+    
     const fetchOnlinePlayers = async () => {
         try {
-            const response = await authenticatedFetch(`${API_URL}/api/servers/${serverId}/analytics/online`);
+            const versionQuery = onlinePlayersVersion !== null ? `?version=${onlinePlayersVersion}` : '';
+            const response = await authenticatedFetch(`${API_URL}/api/servers/${serverId}/analytics/online${versionQuery}`);
+            if (response.status === 304) return; // Nobody joined or left since the last poll
             if (!response.ok) throw new Error('Failed to fetch online players');
-            const players = await response.json();
-            renderOnlinePlayers(players);
+            const data = await response.json();
+            onlinePlayersVersion = data.version;
+            renderOnlinePlayers(data.players);
         } catch (error) {
             console.error('Error fetching online players:', error);
         }
@@ -2629,7 +2752,7 @@ document.addEventListener('DOMContentLoaded', async function () {
             else if (percentage > 0) colorClass = 'bg-primary';
             
             hourBlock.innerHTML = `
-                <div class="rounded p-2 ${colorClass} mb-1" style="height: ${Math.max(30, percentage)}px; opacity: ${0.3 + (percentage / 100) * 0.7};" title="${count} sessions at ${hour}:00"></div>
+                <div class="rounded p-2 ${colorClass} mb-1" style="height: ${Math.max(30, percentage)}px; opacity: ${0.3 + (percentage / 100) * 0.7};" title="${count} players online on average at ${hour}:00"></div>
                 <small class="text-body-secondary">${hour}:00</small>
             `;
             
@@ -337,9 +337,13 @@ document.addEventListener('DOMContentLoaded', async () => {
                 method: 'POST',
                 credentials: 'include'
             });
+            const data = await response.json();
             if (!response.ok) {
-                const errorData = await response.json();
-                throw new Error(errorData.error || `Failed to ${action} server`);
+                throw new Error(data.error || `Failed to ${action} server`);
+            }
+            const job = await window.MineServerGUI.waitForJob(data.job_id);
+            if (job.state === 'failed') {
+                throw new Error((job.result && job.result.error) || `Failed to ${action} server`);
             }
             setTimeout(fetchServers, 2000);
         } catch (error) {